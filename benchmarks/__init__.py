@@ -0,0 +1 @@
+"""Benchmarks for the agent's framework hot paths."""
@@ -0,0 +1,112 @@
+"""Compare per-step framework overhead of the LangGraph workflow and the lean runner.
+
+Usage:
+    python -m benchmarks.bench_engine --steps 1 3 7 --runs 50
+
+Both engines execute the same scripted plan against a zero-latency
+ScriptedChatModel and an in-memory tool, so the measured time is almost
+entirely framework overhead. A run's time includes fixed costs (planning,
+the workspace manifest), so the per-step figures are the slope of run time
+over plan size, fitted across the measured sizes, and the intercept is the
+fixed cost per run. Prints a JSON report.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any
+
+from src.agent.graph.runner import LeanPlanRunner
+from src.agent.graph.workflow import create_planning_agent_graph
+from src.agent.llm.fake import ScriptedChatModel, plan_responder
+from src.agent.logging import setup_logging
+
+from .fixtures import echo, planning_state
+
+
+def time_engine(engine: Any, runs: int) -> list[float]:
+    """Invoke an engine repeatedly and return per-run wall times."""
+    engine.invoke(planning_state())  # warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine.invoke(planning_state())
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def per_step(sizes: list[int], run_ms: list[float]) -> dict[str, float] | None:
+    """Fit run time against plan size.
+
+    Args:
+        sizes: Plan sizes
+        run_ms: Median run time for each size
+
+    Returns:
+        Milliseconds per step (the slope) and per run (the intercept), or
+        None with fewer than two distinct sizes
+    """
+    if len(set(sizes)) < 2:
+        return None
+    slope, intercept = statistics.linear_regression(sizes, run_ms)
+    return {"step_ms": round(slope, 3), "fixed_ms": round(intercept, 3)}
+
+
+def benchmark(step_counts: list[int], runs: int) -> dict[str, Any]:
+    """Measure both engines for each plan size.
+
+    Args:
+        step_counts: Plan sizes to measure
+        runs: Timed runs per engine and plan size
+
+    Returns:
+        Report with per-run timings for each size and the per-step and fixed
+        costs of each engine, in milliseconds
+    """
+    results = []
+    for n_steps in step_counts:
+        llm = ScriptedChatModel(responder=plan_responder(n_steps))
+        graph = time_engine(create_planning_agent_graph(llm, [echo]), runs)
+        lean = time_engine(LeanPlanRunner(llm, [echo]), runs)
+
+        graph_ms = statistics.median(graph) * 1000
+        lean_ms = statistics.median(lean) * 1000
+        results.append(
+            {
+                "steps": n_steps,
+                "graph_run_ms": round(graph_ms, 3),
+                "lean_run_ms": round(lean_ms, 3),
+                "speedup": round(graph_ms / lean_ms, 2) if lean_ms else None,
+            }
+        )
+
+    sizes = [result["steps"] for result in results]
+    graph_fit = per_step(sizes, [result["graph_run_ms"] for result in results])
+    lean_fit = per_step(sizes, [result["lean_run_ms"] for result in results])
+    overhead_removed = None
+    if graph_fit is not None and lean_fit is not None:
+        overhead_removed = round(graph_fit["step_ms"] - lean_fit["step_ms"], 3)
+    return {
+        "benchmark": "engine",
+        "runs": runs,
+        "results": results,
+        "graph": graph_fit,
+        "lean": lean_fit,
+        "overhead_removed_per_step_ms": overhead_removed,
+    }
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, nargs="+", default=[1, 3, 5, 7])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_logging(level="WARNING")
+    print(json.dumps(benchmark(args.steps, args.runs), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Framework overhead of the simple and planning graphs on a scripted LLM.
+
+Usage:
+    python -m benchmarks.bench_graphs --sizes 1 3 7 --runs 30 --output report.json
+    python -m benchmarks.bench_graphs --baseline report.json --tolerance 0.25
+
+Both graphs run against a zero-latency ScriptedChatModel and an in-memory
+tool, so every number is framework cost. For each graph and size (tool
+rounds for the simple graph, plan steps for the planning graph) the report
+holds median run time, steps per second, median time per node, and the
+peak and retained Python memory of one session. With ``--baseline`` the
+run exits non-zero when a metric is worse than the baseline by more than
+the tolerance.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Callable
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.agent.graph.workflow import create_agent_graph, create_planning_agent_graph
+from src.agent.llm.fake import ScriptedChatModel, plan_responder, tool_loop_responder
+from src.agent.logging import setup_logging
+
+from .fixtures import echo, planning_state, simple_state
+
+# Metrics compared against a baseline; higher is worse for all of them
+GATED_METRICS = ("run_ms", "per_step_ms", "peak_kb")
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Callback handler that records the wall time of each graph node run."""
+
+    def __init__(self) -> None:
+        """Initialize the timer."""
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self._started: dict[UUID, tuple[str, float]] = {}
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Runnables inside a node inherit its metadata; only time the node itself
+        if node is not None and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id: UUID) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            node, start = started
+            self.durations[node].append(time.perf_counter() - start)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+
+def _scenarios(size: int) -> dict[str, tuple[Any, Callable[[], dict[str, Any]]]]:
+    """Build each graph with a script that takes ``size`` steps."""
+    return {
+        "simple": (
+            create_agent_graph(ScriptedChatModel(responder=tool_loop_responder(size)), [echo]),
+            simple_state,
+        ),
+        "planning": (
+            create_planning_agent_graph(ScriptedChatModel(responder=plan_responder(size)), [echo]),
+            planning_state,
+        ),
+    }
+
+
+def measure_memory(graph: Any, make_input: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+    """Measure the Python memory of one session with tracemalloc.
+
+    Returns:
+        Peak memory allocated during the run and memory still held after it
+        (the final state included) in KiB, and the retained block count
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        blocks_before = sys.getallocatedblocks()
+        state = graph.invoke(make_input())
+        gc.collect()
+        after, peak = tracemalloc.get_traced_memory()
+        blocks_after = sys.getallocatedblocks()
+    finally:
+        tracemalloc.stop()
+    del state
+    return {
+        "peak_kb": round((peak - before) / 1024, 1),
+        "retained_kb": round((after - before) / 1024, 1),
+        "retained_blocks": blocks_after - blocks_before,
+    }
+
+
+def measure(
+    graph: Any, make_input: Callable[[], dict[str, Any]], size: int, runs: int
+) -> dict[str, Any]:
+    """Measure timing, per-node latency and memory for one graph.
+
+    Args:
+        graph: Compiled graph
+        make_input: Builds a fresh graph input
+        size: Steps each run takes
+        runs: Timed runs
+
+    Returns:
+        Metrics for this graph and size
+    """
+    graph.invoke(make_input())  # warm-up
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        graph.invoke(make_input())
+        timings.append(time.perf_counter() - start)
+
+    # Callbacks add their own cost, so node timings come from separate runs
+    timer = NodeTimer()
+    for _ in range(runs):
+        graph.invoke(make_input(), config={"callbacks": [timer]})
+
+    run_s = statistics.median(timings)
+    return {
+        "run_ms": round(run_s * 1000, 3),
+        "per_step_ms": round(run_s * 1000 / size, 3),
+        "steps_per_s": round(size / run_s, 1) if run_s else None,
+        "nodes_ms": {
+            node: round(statistics.median(durations) * 1000, 3)
+            for node, durations in sorted(timer.durations.items())
+        },
+        **measure_memory(graph, make_input),
+    }
+
+
+def benchmark(sizes: list[int], runs: int) -> dict[str, Any]:
+    """Measure both graphs for each size.
+
+    Args:
+        sizes: Tool rounds (simple) and plan steps (planning) to measure
+        runs: Timed runs per graph and size
+
+    Returns:
+        Report with one result per graph and size
+    """
+    results = []
+    for size in sizes:
+        for name, (graph, make_input) in _scenarios(size).items():
+            results.append({"graph": name, "size": size, **measure(graph, make_input, size, runs)})
+    return {
+        "benchmark": "graphs",
+        "runs": runs,
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Find metrics that regressed against a baseline report.
+
+    Args:
+        report: Current report
+        baseline: Earlier report from ``benchmark``
+        tolerance: Allowed relative increase (0.25 = 25% worse)
+
+    Returns:
+        One description per regression; empty when within tolerance
+    """
+    previous = {(r["graph"], r["size"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        base = previous.get((result["graph"], result["size"]))
+        if base is None:
+            continue
+        for metric in GATED_METRICS:
+            old, new = base.get(metric), result.get(metric)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append(
+                    f"{result['graph']}[{result['size']}] {metric}: "
+                    f"{old} -> {new} (+{(new / old - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point.
+
+    Returns:
+        1 if a metric regressed past the baseline tolerance, else 0
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 3, 5, 7])
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Earlier report to gate regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    setup_logging(level="WARNING")
+    report = benchmark(args.sizes, args.runs)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Cold import time of the agent, measured with ``python -X importtime``.
+
+Usage:
+    python -m benchmarks.bench_import --runs 5 --budget-ms 1500
+    python -m benchmarks.bench_import --module src.agent.core.batch --top 20
+
+Each run imports the module in a fresh interpreter and reads the cumulative
+import time from ``-X importtime``. The report holds the median, the modules
+with the largest self time, and any modules that should only load on first
+use (provider SDKs, YAML) but were imported anyway. The run exits non-zero
+when the median exceeds the budget or a deferred module was imported.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any
+
+DEFAULT_MODULE = "src.agent.core.agent"
+
+# Loaded inside create_llm and get_prompt, never by importing the agent
+DEFERRED_MODULES = ("langchain_openai", "langchain_anthropic", "openai", "anthropic", "yaml")
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """Parse ``-X importtime`` output.
+
+    Args:
+        stderr: Interpreter stderr
+
+    Returns:
+        Self and cumulative microseconds keyed by module name
+    """
+    modules: dict[str, tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import(module: str) -> dict[str, tuple[int, int]]:
+    """Import a module in a fresh interpreter.
+
+    Args:
+        module: Dotted module name
+
+    Returns:
+        Parsed import times of every module loaded
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def benchmark(module: str = DEFAULT_MODULE, runs: int = 5, top: int = 10) -> dict[str, Any]:
+    """Measure cold import time over several runs.
+
+    Args:
+        module: Dotted module name
+        runs: Number of fresh interpreters
+        top: Number of slowest modules to list
+
+    Returns:
+        Report with median and per-run totals, slowest modules by self time,
+        and deferred modules that were imported
+    """
+    samples = [measure_import(module) for _ in range(runs)]
+    totals_ms = [sample[module][1] / 1000 for sample in samples]
+    last = samples[-1]
+    slowest = sorted(last.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "module": module,
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "median_ms": round(statistics.median(totals_ms), 1),
+        "totals_ms": [round(total, 1) for total in totals_ms],
+        "slowest_self_ms": {name: round(times[0] / 1000, 1) for name, times in slowest},
+        "deferred_imported": [name for name in DEFERRED_MODULES if name in last],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point.
+
+    Returns:
+        1 if the median import time exceeds the budget or a deferred module
+        was imported, else 0
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    args = parser.parse_args(argv)
+
+    report = benchmark(args.module, args.runs, args.top)
+    print(json.dumps(report, indent=2))
+
+    failed = False
+    if report["median_ms"] > args.budget_ms:
+        print(
+            f"OVER BUDGET {args.module}: {report['median_ms']} ms > {args.budget_ms} ms",
+            file=sys.stderr,
+        )
+        failed = True
+    for name in report["deferred_imported"]:
+        print(f"EAGER IMPORT {name} is loaded by importing {args.module}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""Tools and inputs shared by the benchmarks."""
+
+from typing import Any
+
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+
+
+@tool
+def echo(text: str) -> str:
+    """Echo the given text."""
+    return text
+
+
+def planning_state(request: str = "Process items") -> dict[str, Any]:
+    """Build the planning-graph input for one run."""
+    return {
+        "messages": [HumanMessage(content=request)],
+        "plan": None,
+        "current_step_index": 0,
+        "step_results": {},
+        "replans_count": 0,
+        "active_steps": 1,
+    }
+
+
+def simple_state(request: str = "Process items") -> dict[str, Any]:
+    """Build the simple-graph input for one run."""
+    return {"messages": [HumanMessage(content=request)]}
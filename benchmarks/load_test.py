@@ -0,0 +1,179 @@
+"""Concurrent-session load test against a local OpenAI-compatible stub.
+
+Usage:
+    python -m benchmarks.load_test --sessions 200 --concurrency 50 --profile realistic
+    python -m benchmarks.load_test --sessions 100 --rate 20 --llm-concurrency 16
+
+Starts a StubServer, points every CodeAgent at it through ``base_url`` and
+runs ``--sessions`` agent sessions on ``--concurrency`` threads, each in its
+own workspace. Sessions arrive all at once, or at ``--rate`` per second.
+Prints a JSON report with throughput and end-to-end, service and queueing
+time percentiles. Queueing time is the wait for a free session thread;
+with ``--rpm``/``--tpm``/``--llm-concurrency`` the shared LLM scheduler is
+enabled and its admission waits are reported too.
+"""
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from src.agent.core.agent import CodeAgent
+from src.agent.llm.client import clear_llm_registry
+from src.agent.llm.scheduler import configure_scheduler, get_scheduler, reset_scheduler
+from src.agent.logging import setup_logging
+from src.agent.tools.file import use_workspace
+
+from .stub_server import PROFILES, StubServer
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """Summarize durations with nearest-rank percentiles, in seconds."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))]
+
+    return {
+        "p50": round(rank(0.50), 4),
+        "p95": round(rank(0.95), 4),
+        "p99": round(rank(0.99), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def run_load_test(
+    sessions: int,
+    concurrency: int,
+    profile: str = "realistic",
+    mode: str = "planning",
+    plan_steps: int = 2,
+    rate: float | None = None,
+    scheduler_options: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Drive concurrent agent sessions against a stub server.
+
+    Args:
+        sessions: Total number of sessions
+        concurrency: Sessions running at once
+        profile: Stub latency profile name
+        mode: Agent mode - 'simple' or 'planning'
+        plan_steps: Steps in the plans the stub returns
+        rate: Session arrivals per second (None submits all at once)
+        scheduler_options: LLMScheduler arguments; enables the shared scheduler
+
+    Returns:
+        Load test report
+    """
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    clear_llm_registry()
+    if scheduler_options:
+        configure_scheduler(**scheduler_options)
+
+    timings: list[dict[str, float]] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    with StubServer(profile, plan_steps) as server, tempfile.TemporaryDirectory() as root:
+
+        def session(index: int, submitted: float) -> None:
+            started = time.perf_counter()
+            try:
+                with use_workspace(os.path.join(root, f"session-{index}")):
+                    agent = CodeAgent(mode=mode, base_url=server.base_url)
+                    agent.run(f"Inspect the workspace ({index})")
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                return
+            finished = time.perf_counter()
+            with lock:
+                timings.append(
+                    {
+                        "queue": started - submitted,
+                        "service": finished - started,
+                        "latency": finished - submitted,
+                    }
+                )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="session") as pool:
+            for index in range(sessions):
+                if rate:
+                    time.sleep(max(0.0, start + index / rate - time.perf_counter()))
+                pool.submit(session, index, time.perf_counter())
+        duration = time.perf_counter() - start
+        server_stats = server.stats()
+
+    scheduler = get_scheduler()
+    scheduler_stats = scheduler.stats() if scheduler is not None else None
+    if scheduler_options:
+        reset_scheduler()
+    clear_llm_registry()
+
+    return {
+        "benchmark": "load",
+        "profile": profile,
+        "mode": mode,
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "rate": rate,
+        "duration_s": round(duration, 3),
+        "throughput_per_s": round(len(timings) / duration, 2) if duration else None,
+        "completed": len(timings),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "latency_s": percentiles([t["latency"] for t in timings]),
+        "service_s": percentiles([t["service"] for t in timings]),
+        "queue_s": percentiles([t["queue"] for t in timings]),
+        "llm_requests": server_stats["requests"],
+        "llm_max_in_flight": server_stats["max_in_flight"],
+        "scheduler": scheduler_stats,
+    }
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--mode", choices=["planning", "simple"], default="planning")
+    parser.add_argument("--plan-steps", type=int, default=2)
+    parser.add_argument("--rate", type=float, help="Session arrivals per second")
+    parser.add_argument("--rpm", type=float, help="Scheduler requests per minute")
+    parser.add_argument("--tpm", type=float, help="Scheduler tokens per minute")
+    parser.add_argument("--llm-concurrency", type=int, help="Scheduler calls in flight")
+    args = parser.parse_args()
+
+    setup_logging(level="WARNING")
+    scheduler_options = {
+        key: value
+        for key, value in {
+            "requests_per_minute": args.rpm,
+            "tokens_per_minute": args.tpm,
+            "max_concurrency": args.llm_concurrency,
+        }.items()
+        if value is not None
+    }
+    report = run_load_test(
+        sessions=args.sessions,
+        concurrency=args.concurrency,
+        profile=args.profile,
+        mode=args.mode,
+        plan_steps=args.plan_steps,
+        rate=args.rate,
+        scheduler_options=scheduler_options or None,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
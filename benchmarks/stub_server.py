@@ -0,0 +1,337 @@
+"""Local OpenAI-compatible chat completions server for load tests.
+
+Usage:
+    python -m benchmarks.stub_server --port 8900 --profile realistic
+
+Answers ``POST /v1/chat/completions`` (plain and ``stream: true``) with
+deterministic agent-shaped replies, delayed according to a latency profile:
+
+- Requests that offer the ``Plan`` tool or a ``Plan`` JSON schema get a plan
+  of ``plan_steps`` list_directory steps
+- Other requests with tools get a ``list_directory`` call, unless the last
+  message is a tool result, which gets a short final answer
+- Requests without tools get a short text answer
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """How long the stub takes to answer.
+
+    A reply takes ``ttft_s`` plus one token interval per completion token,
+    each scaled by a random factor within ``±jitter``.
+    """
+
+    ttft_s: float = 0.0
+    tokens_per_s: float = 0.0  # 0 means completion tokens take no time
+    jitter: float = 0.0
+
+
+PROFILES = {
+    "instant": LatencyProfile(),
+    "fast": LatencyProfile(ttft_s=0.05, tokens_per_s=500, jitter=0.2),
+    "realistic": LatencyProfile(ttft_s=0.4, tokens_per_s=80, jitter=0.3),
+    "slow": LatencyProfile(ttft_s=1.5, tokens_per_s=25, jitter=0.5),
+}
+
+
+def _count_tokens(text: str) -> int:
+    """Approximate token count (4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def _plan(n_steps: int) -> dict[str, Any]:
+    return {
+        "goal": "Inspect the workspace",
+        "reasoning": "List the directory once per step",
+        "steps": [
+            {
+                "step_number": i + 1,
+                "action": "list_directory",
+                "description": f"List the workspace ({i + 1})",
+                "input_data": ".",
+                "expected_output": "Directory listing",
+            }
+            for i in range(n_steps)
+        ],
+    }
+
+
+def _tool_names(body: dict[str, Any]) -> list[str]:
+    return [tool.get("function", {}).get("name", "") for tool in body.get("tools") or []]
+
+
+def build_reply(body: dict[str, Any], plan_steps: int) -> dict[str, Any]:
+    """Choose the assistant message for a chat completions request.
+
+    Args:
+        body: Request JSON
+        plan_steps: Number of steps in generated plans
+
+    Returns:
+        Assistant message with 'content' and optional 'tool_calls'
+    """
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return {"content": json.dumps(_plan(plan_steps)), "tool_calls": []}
+
+    tool_names = _tool_names(body)
+    if "Plan" in tool_names:
+        return {"content": "", "tool_calls": [("Plan", _plan(plan_steps))]}
+
+    messages = body.get("messages") or []
+    if tool_names and (not messages or messages[-1].get("role") != "tool"):
+        return {"content": "", "tool_calls": [("list_directory", {"path": "."})]}
+    return {"content": "Done. The workspace has been inspected.", "tool_calls": []}
+
+
+class StubServer:
+    """OpenAI-compatible stub running on a background thread.
+
+    Tracks the number of requests served and the highest number of
+    requests in flight at once.
+    """
+
+    def __init__(
+        self,
+        profile: LatencyProfile | str = "instant",
+        plan_steps: int = 2,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+    ):
+        """Initialize the server.
+
+        Args:
+            profile: Latency profile or the name of one in PROFILES
+            plan_steps: Number of steps in generated plans
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            seed: Seed for latency jitter
+        """
+        self.profile = PROFILES[profile] if isinstance(profile, str) else profile
+        self.plan_steps = plan_steps
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI-style base URL, ending in /v1."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _scaled(self, seconds: float) -> float:
+        if not seconds or not self.profile.jitter:
+            return seconds
+        with self._lock:
+            factor = self._random.uniform(1 - self.profile.jitter, 1 + self.profile.jitter)
+        return seconds * factor
+
+    def _token_delay(self) -> float:
+        if not self.profile.tokens_per_s:
+            return 0.0
+        return self._scaled(1 / self.profile.tokens_per_s)
+
+    def stats(self) -> dict[str, int]:
+        """Return request counters."""
+        with self._lock:
+            return {"requests": self.requests, "max_in_flight": self.max_in_flight}
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_HEAD(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+
+                with server._lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    if body.get("stream"):
+                        self._stream(body)
+                    else:
+                        self._complete(body)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _reply(self, body: dict[str, Any]) -> tuple[dict[str, Any], dict[str, int]]:
+                reply = build_reply(body, server.plan_steps)
+                prompt = json.dumps(body.get("messages", []))
+                completion = reply["content"] + "".join(
+                    json.dumps(args) for _, args in reply["tool_calls"]
+                )
+                usage = {
+                    "prompt_tokens": _count_tokens(prompt),
+                    "completion_tokens": _count_tokens(completion),
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                return reply, usage
+
+            def _message(self, reply: dict[str, Any]) -> dict[str, Any]:
+                message: dict[str, Any] = {"role": "assistant", "content": reply["content"] or None}
+                if reply["tool_calls"]:
+                    message["tool_calls"] = [
+                        {
+                            "id": f"call_{uuid.uuid4().hex[:12]}",
+                            "type": "function",
+                            "function": {"name": name, "arguments": json.dumps(args)},
+                        }
+                        for name, args in reply["tool_calls"]
+                    ]
+                return message
+
+            def _envelope(self, body: dict[str, Any], **fields: Any) -> dict[str, Any]:
+                return {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    **fields,
+                }
+
+            def _complete(self, body: dict[str, Any]) -> None:
+                reply, usage = self._reply(body)
+                time.sleep(
+                    server._scaled(server.profile.ttft_s)
+                    + server._token_delay() * usage["completion_tokens"]
+                )
+                message = self._message(reply)
+                payload = self._envelope(
+                    body,
+                    object="chat.completion",
+                    choices=[
+                        {
+                            "index": 0,
+                            "message": message,
+                            "finish_reason": "tool_calls" if reply["tool_calls"] else "stop",
+                        }
+                    ],
+                    usage=usage,
+                )
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_event(self, payload: dict[str, Any] | str) -> None:
+                text = payload if isinstance(payload, str) else json.dumps(payload)
+                data = f"data: {text}\n\n".encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _stream(self, body: dict[str, Any]) -> None:
+                reply, usage = self._reply(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                time.sleep(server._scaled(server.profile.ttft_s))
+
+                def chunk(delta: dict[str, Any], finish: str | None = None) -> dict[str, Any]:
+                    return self._envelope(
+                        body,
+                        object="chat.completion.chunk",
+                        choices=[{"index": 0, "delta": delta, "finish_reason": finish}],
+                    )
+
+                message = self._message(reply)
+                if reply["tool_calls"]:
+                    time.sleep(server._token_delay() * usage["completion_tokens"])
+                    calls = [{"index": i, **call} for i, call in enumerate(message["tool_calls"])]
+                    self._send_event(chunk({"role": "assistant", "tool_calls": calls}))
+                    finish = "tool_calls"
+                else:
+                    words = reply["content"].split(" ")
+                    for i, word in enumerate(words):
+                        time.sleep(server._token_delay())
+                        text = word if i == len(words) - 1 else word + " "
+                        self._send_event(chunk({"role": "assistant", "content": text}))
+                    finish = "stop"
+                self._send_event(chunk({}, finish))
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    self._send_event(
+                        self._envelope(
+                            body, object="chat.completion.chunk", choices=[], usage=usage
+                        )
+                    )
+                self._send_event("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def start(self) -> "StubServer":
+        """Start serving on a background thread."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="stub-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--plan-steps", type=int, default=2)
+    args = parser.parse_args()
+
+    server = StubServer(args.profile, args.plan_steps, args.host, args.port)
+    print(f"Serving {args.profile} profile at {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
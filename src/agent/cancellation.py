@@ -0,0 +1,223 @@
+"""Deadlines and cooperative cancellation of agent runs.
+
+A CancellationToken is active for the whole of a run (``use_cancellation``)
+and reaches the work the run does in three ways:
+
+- ``CancellationCallbackHandler``, installed in the run's callbacks, checks it
+  whenever a graph node, LLM call or tool call starts, and on every streamed
+  token
+- The shared provider HTTP clients (``llm.pool``) refuse to send requests once
+  it has fired, and cap each request's timeouts at the time left, so an
+  in-flight request is aborted at the deadline
+- Long-running code can call ``check_cancelled()`` itself
+
+When the token fires, RunCancelled is raised. Like asyncio.CancelledError it
+derives from BaseException, so provider SDK retry loops and ``except
+Exception`` handlers do not swallow it.
+"""
+
+import threading
+import time
+import weakref
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+CANCELLED = "cancelled"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+
+
+class RunCancelled(BaseException):
+    """Raised inside a run whose token was cancelled or whose deadline passed."""
+
+    def __init__(self, reason: str):
+        """Initialize the exception.
+
+        Args:
+            reason: CANCELLED or DEADLINE_EXCEEDED
+        """
+        super().__init__(f"Run stopped: {reason}")
+        self.reason = reason
+
+
+class CancellationToken:
+    """Cancellation flag for one run, with an optional deadline.
+
+    Thread-safe: ``cancel`` may be called from any thread, e.g. by a server
+    whose client disconnected.
+
+    A token created with a ``parent`` also fires when the parent does, and
+    its deadline is the earlier of its own and the parent's; the parent is
+    not changed, so a caller's token can be shared by several runs.
+    """
+
+    def __init__(self, timeout: float | None = None, parent: "CancellationToken | None" = None):
+        """Initialize the token.
+
+        Args:
+            timeout: Seconds from now until the deadline, or None for no deadline
+            parent: Token whose cancellation and deadline this one also obeys
+        """
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.parent = parent
+        self._reason: str | None = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._children: weakref.WeakSet[CancellationToken] = weakref.WeakSet()
+        if parent is not None:
+            parent._adopt(self)
+
+    def _adopt(self, child: "CancellationToken") -> None:
+        """Pass this token's cancellation on to a child token."""
+        with self._lock:
+            if self._reason is None:
+                self._children.add(child)
+                return
+            reason = self._reason
+        child.cancel(reason)
+
+    def cancel(self, reason: str = CANCELLED) -> None:
+        """Stop the run at its next cancellation check.
+
+        Args:
+            reason: Reason reported by the run; the first one given wins
+        """
+        with self._lock:
+            if self._reason is not None:
+                return
+            self._reason = reason
+            self._event.set()
+            children = list(self._children)
+        for child in children:
+            child.cancel(reason)
+
+    def _deadline(self) -> float | None:
+        """The earliest deadline of this token and its parents."""
+        parent = self.parent._deadline() if self.parent is not None else None
+        if parent is None or self.deadline is None:
+            return self.deadline if parent is None else parent
+        return min(self.deadline, parent)
+
+    @property
+    def reason(self) -> str | None:
+        """Why the token fired, or None if it has not."""
+        if self._reason is not None:
+            return self._reason
+        deadline = self._deadline()
+        if deadline is not None and time.monotonic() >= deadline:
+            return DEADLINE_EXCEEDED
+        return None
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token was cancelled or its deadline has passed."""
+        return self.reason is not None
+
+    def remaining(self) -> float | None:
+        """Seconds left until the deadline, or None without one."""
+        deadline = self._deadline()
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    def raise_if_cancelled(self) -> None:
+        """Raise RunCancelled if the token has fired."""
+        reason = self.reason
+        if reason is not None:
+            raise RunCancelled(reason)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the token fires or ``timeout`` seconds pass.
+
+        Returns:
+            Whether the token has fired
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        self._event.wait(timeout)
+        return self.cancelled
+
+
+_token: ContextVar[CancellationToken | None] = ContextVar("cancellation_token", default=None)
+
+
+def current_token() -> CancellationToken | None:
+    """Return the cancellation token of the run in the current context, if any."""
+    return _token.get()
+
+
+def check_cancelled() -> None:
+    """Raise RunCancelled if the current run's token has fired."""
+    token = _token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def use_cancellation(token: CancellationToken) -> Iterator[CancellationToken]:
+    """Make a token the current run's token within the block.
+
+    Args:
+        token: Token to activate
+
+    Yields:
+        The token
+    """
+    reset = _token.set(token)
+    try:
+        yield token
+    finally:
+        _token.reset(reset)
+
+
+class CancellationCallbackHandler(BaseCallbackHandler):
+    """Callback handler that stops a run once its token fires.
+
+    Also keeps the state the most recent graph node started from, which
+    holds every completed step result and is returned as the partial result
+    of a stopped run.
+    """
+
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, token: CancellationToken) -> None:
+        """Initialize the handler.
+
+        Args:
+            token: Token to check
+        """
+        self.token = token
+        self.last_state: dict[str, Any] | None = None
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        metadata: dict[str, Any] | None = None,
+        name: str | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self.token.raise_if_cancelled()
+        # Only the node itself gets the full state; its writers and edge
+        # functions run as child chains with the same metadata
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and name == node and isinstance(inputs, dict):
+            self.last_state = inputs
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
+
+    def on_llm_start(self, serialized: Any, prompts: Any, **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
+
+    def on_tool_start(self, serialized: Any, input_str: str, **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
@@ -1,70 +1,648 @@
 """Main CodeAgent class."""
 
+import os
 import sys
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any
 
 from dotenv import load_dotenv
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage
 
+from ..cancellation import (
+    CancellationCallbackHandler,
+    CancellationToken,
+    RunCancelled,
+    use_cancellation,
+)
+from ..graph.runner import LeanPlanRunner
 from ..graph.workflow import create_agent_graph, create_planning_agent_graph
-from ..llm.client import create_llm
-from ..logging import setup_logging
+from ..llm.client import create_llm, prewarm_llms
+from ..llm.scheduler import ROLE_PRIORITIES, ScheduledChatModel, get_scheduler
+from ..logging import get_logger, setup_logging
+from ..metrics import (
+    MetricsCallbackHandler,
+    RunMetrics,
+    collect_run,
+    observe_run,
+    record_route,
+)
+from ..profiling import ProfileConfig, ProfileSession, RunProfiler, profile_config_from_env
+from ..tools.engine import ToolLimits
 from ..tools.file import list_directory, read_file, write_file
+from ..tools.memo import ToolMemo, use_memo
+from ..tracing import ChromeTracer, trace_dir_from_env
+from .complexity import PLANNING, SIMPLE, classify_request
+from .events import STREAM_MODES, AgentEvent, EventTranslator
+from .session import Session, SessionStore
+
+logger = get_logger(__name__)
+
+# Graph nodes that can be routed to their own model
+MODEL_ROLES = ("planner", "executor", "replanner", "agent")
+
+# How a stopped run's partial output describes why it stopped
+_STOP_REASONS = {"cancelled": "was cancelled", "deadline_exceeded": "hit its deadline"}
+
+
+def _stopped_output(state: dict[str, Any], reason: str) -> str:
+    """Describe how far a run got before it was stopped."""
+    plan = state.get("plan")
+    progress = ""
+    if plan is not None:
+        done = len(state.get("step_results") or {})
+        progress = f" after {done} of {plan.total_steps} steps"
+    return f"Run {_STOP_REASONS.get(reason, reason)}{progress}."
+
+
+@dataclass
+class RunResult:
+    """Outcome of a single agent run."""
+
+    output: str
+    state: dict[str, Any] = field(default_factory=dict)
+    duration_s: float = 0.0
+    metrics: dict[str, Any] = field(default_factory=dict)
+    trace_path: str | None = None
+    profile_paths: list[str] = field(default_factory=list)
+    session_id: str | None = None
+    status: str = "completed"
+    mode: str = ""  # Mode the run used, when the agent routes requests
+
+    def stats(self) -> dict[str, Any]:
+        """Summarize the run for reporting.
+
+        Returns:
+            Duration, message count, metrics summary and, for planning runs,
+            step progress
+        """
+        stats: dict[str, Any] = {
+            "duration_s": round(self.duration_s, 3),
+            "messages": len(self.state.get("messages", [])),
+        }
+        if self.status != "completed":
+            stats["status"] = self.status
+        if self.mode:
+            stats["mode"] = self.mode
+        plan = self.state.get("plan")
+        if plan is not None:
+            stats["plan_steps"] = plan.total_steps
+            stats["completed_steps"] = len(self.state.get("step_results", {}))
+            stats["replans"] = self.state.get("replans_count", 0)
+        if self.metrics:
+            stats["metrics"] = self.metrics
+        return stats
+
+
+@dataclass
+class _RunHooks:
+    """Per-run instrumentation set up by CodeAgent._begin_run."""
+
+    metrics: RunMetrics
+    tracer: ChromeTracer | None
+    profile: ProfileSession | None
+    config: dict[str, Any]
+    mode: str
+    cancellation: CancellationCallbackHandler | None = None
 
 
 class CodeAgent:
     """Code agent with file manipulation tools.
 
-    Supports two modes:
+    Supports three modes:
     - simple: Direct tool-calling (Phase 1)
     - planning: Plan-and-execute (Phase 2)
+    - auto: Each request runs in simple or planning mode, as an offline
+      classifier of the request text decides
     """
 
-    def __init__(self, model: str = "gpt-4o-mini", mode: str = "planning"):
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        mode: str = "planning",
+        stream_plan: bool = False,
+        fuse_steps: int = 1,
+        node_models: dict[str, str] | None = None,
+        executor_fallback: bool = False,
+        fallback_models: list[str] | None = None,
+        tenant: str = "default",
+        engine: str = "graph",
+        base_url: str | None = None,
+        trace_dir: str | None = None,
+        profile: ProfileConfig | str | None = None,
+        session_store: SessionStore | None = None,
+        prompt_cache: bool = False,
+        tool_limits: dict[str, ToolLimits] | None = None,
+    ):
         """Initialize the code agent.
 
         Args:
             model: Model name for LLM
-            mode: Agent mode - 'simple' or 'planning'
+            mode: Agent mode - 'simple', 'planning' or 'auto'
+            stream_plan: In planning mode, start executing step 1 while the
+                         rest of the plan is still streaming
+            fuse_steps: In planning mode, maximum number of independent
+                        steps executed together in one LLM call
+            node_models: Per-node model overrides keyed by role ('planner',
+                         'executor', 'replanner', 'agent'); other roles use
+                         ``model``
+            executor_fallback: Retry executor steps with the planner model
+                               when the executor model's tool calls fail to parse
+            fallback_models: Models every node's model hedges and fails over to
+            tenant: Tenant name used for fair scheduling when a process-wide
+                    LLM scheduler is configured
+            engine: In planning mode, 'graph' for the LangGraph workflow or
+                    'lean' for the lightweight LeanPlanRunner
+            base_url: API base URL for every model, e.g. a local
+                      OpenAI-compatible server
+            trace_dir: Write a Chrome trace of every run to this directory
+                       (defaults to the BSAI_TRACE_DIR environment variable)
+            profile: Profile runs with this configuration, or a profiler
+                     mode ('cprofile' or 'sampling') with default settings
+                     (defaults to the BSAI_PROFILE* environment variables)
+            session_store: Store for runs given a ``session_id`` (defaults
+                           to a new in-memory store)
+            prompt_cache: Opt into provider prompt caching for every model
+                          (see ``create_llm``)
+            tool_limits: Per-tool timeouts, concurrency caps and output
+                         limits, keyed by tool name (see ``ToolLimits``)
+
+        Raises:
+            ValueError: If node_models contains an unknown role
         """
-        self.llm = create_llm(model)
+        unknown = set(node_models or {}) - set(MODEL_ROLES)
+        if unknown:
+            raise ValueError(f"Unknown model roles: {sorted(unknown)}")
+
+        self.node_models = {role: model for role in MODEL_ROLES} | (node_models or {})
+
+        def make_llm(name: str) -> BaseChatModel:
+            endpoint: dict[str, Any] = {"base_url": base_url} if base_url else {}
+            if prompt_cache:
+                endpoint["prompt_cache"] = True
+            fallbacks = [m for m in fallback_models or [] if m != name]
+            if fallbacks:
+                return create_llm(name, fallbacks=fallbacks, **endpoint)
+            return create_llm(name, **endpoint)
+
+        # Create one client per distinct model name
+        llms = {model: make_llm(model)}
+        for name in self.node_models.values():
+            if name not in llms:
+                llms[name] = make_llm(name)
+
+        self.llm = llms[model]
+        self.node_llms = {role: llms[name] for role, name in self.node_models.items()}
+
+        # Admit calls through the shared scheduler, ranked by node role
+        scheduler = get_scheduler()
+        if scheduler is not None:
+            self.node_llms = {
+                role: ScheduledChatModel(
+                    model=llm,
+                    scheduler=scheduler,
+                    priority=ROLE_PRIORITIES[role],
+                    tenant=tenant,
+                )
+                for role, llm in self.node_llms.items()
+            }
         self.tools = [read_file, write_file, list_directory]
         self.mode = mode
+        self.trace_dir = trace_dir or trace_dir_from_env()
+        if isinstance(profile, str):
+            profile = ProfileConfig(mode=profile)
+        profile = profile or profile_config_from_env()
+        self.profiler = RunProfiler(profile) if profile else None
+        self.sessions = session_store or SessionStore()
 
-        if mode == "planning":
-            self.graph = create_planning_agent_graph(self.llm, self.tools)
-        else:
-            self.graph = create_agent_graph(self.llm, self.tools)
+        # Auto mode builds both graphs and picks one per request
+        self.graphs: dict[str, Any] = {}
+        if mode in (PLANNING, "auto"):
+            planner_llm = self.node_llms["planner"]
+            executor_llm = self.node_llms["executor"]
+            fallback_llm = None
+            if executor_fallback and self.node_models["executor"] != self.node_models["planner"]:
+                fallback_llm = planner_llm
 
-    def run(self, user_input: str) -> str:
-        """Run the agent with user input.
+            build = LeanPlanRunner if engine == "lean" else create_planning_agent_graph
+            self.graphs[PLANNING] = build(
+                planner_llm,
+                self.tools,
+                stream_plan=stream_plan,
+                fuse_steps=fuse_steps,
+                executor_llm=executor_llm,
+                replanner_llm=self.node_llms["replanner"],
+                executor_fallback_llm=fallback_llm,
+                tool_limits=tool_limits,
+            )
+        if mode != PLANNING:
+            self.graphs[SIMPLE] = create_agent_graph(
+                self.node_llms["agent"], self.tools, tool_limits=tool_limits
+            )
+        self.graph = self.graphs.get(PLANNING) or self.graphs[SIMPLE]
 
-        Args:
-            user_input: User's request
+    def _route(self, user_input: str) -> str:
+        """Return the mode a request runs in.
 
-        Returns:
-            Agent's response
+        In auto mode, the request is classified and the decision logged and
+        counted; otherwise it is the agent's mode.
+        """
+        if self.mode != "auto":
+            return PLANNING if self.mode == PLANNING else SIMPLE
+        decision = classify_request(user_input)
+        record_route(decision.mode, decision.rule)
+        logger.info(
+            "Request routed", mode=decision.mode, rule=decision.rule, detail=decision.detail
+        )
+        return decision.mode
+
+    def _initial_state(
+        self, user_input: str, session: Session | None = None, mode: str = PLANNING
+    ) -> dict[str, Any]:
+        """Build the graph input for a new request in the given mode.
+
+        In a session, the planner gets the earlier turns as context and the
+        simple agent gets the compacted conversation.
         """
-        if self.mode == "planning":
-            initial_state = {
+        if mode == PLANNING:
+            return {
                 "messages": [HumanMessage(content=user_input)],
                 "plan": None,
                 "current_step_index": 0,
                 "step_results": {},
                 "replans_count": 0,
+                "active_steps": 1,
+                "session_context": session.context() if session else "",
             }
-        else:
-            initial_state = {"messages": [HumanMessage(content=user_input)]}
+        history = session.messages if session else []
+        return {"messages": [*history, HumanMessage(content=user_input)]}
+
+    def _open_session(self, session_id: str | None) -> Session | None:
+        """Load a session and drop file contents that changed since its last turn."""
+        if session_id is None:
+            return None
+        session = self.sessions.get_or_create(session_id)
+        session.refresh()
+        return session
+
+    def _close_session(
+        self, session: Session | None, user_input: str, state: dict[str, Any], output: str
+    ) -> None:
+        """Record a successful turn in its session."""
+        if session is not None:
+            session.record_turn(user_input, state, output)
+            self.sessions.save(session)
+
+    @staticmethod
+    def _run_token(
+        timeout: float | None, cancel_token: CancellationToken | None
+    ) -> CancellationToken | None:
+        """Combine a run's timeout and caller token into the token for the run.
+
+        The timeout goes on a child of the caller's token, which is left as it
+        was and can be passed to later runs.
+        """
+        if timeout is None:
+            return cancel_token
+        return CancellationToken(timeout, parent=cancel_token)
+
+    def _begin_run(
+        self,
+        stack: ExitStack,
+        mode: str,
+        session: Session | None = None,
+        token: CancellationToken | None = None,
+    ) -> _RunHooks:
+        """Start collecting metrics (and a trace or profile, if enabled) for one run.
+
+        Read-only tool calls are memoized for the session, or for this run
+        when there is none. With a token, every node, LLM call and tool call
+        checks it before starting.
+
+        Returns:
+            The run's metrics collector, tracer, profile session, graph config
+            and cancellation handler
+        """
+        profile = self.profiler.start(stack) if self.profiler else None
+        run = stack.enter_context(collect_run())
+        stack.enter_context(use_memo(session.memo if session else ToolMemo()))
+        callbacks: list[Any] = [MetricsCallbackHandler()]
+        cancellation = None
+        if token is not None:
+            stack.enter_context(use_cancellation(token))
+            cancellation = CancellationCallbackHandler(token)
+            callbacks.insert(0, cancellation)
+        tracer = None
+        if self.trace_dir:
+            tracer = ChromeTracer(name=f"CodeAgent ({mode})")
+            stack.enter_context(tracer.span("run"))
+            callbacks.append(tracer)
+        if profile is not None:
+            callbacks.append(profile.tracker)
+        return _RunHooks(run, tracer, profile, {"callbacks": callbacks}, mode, cancellation)
+
+    def _finish_run(
+        self, start: float, hooks: _RunHooks, status: str = "ok"
+    ) -> tuple[dict[str, Any], str | None]:
+        """Record a finished run.
+
+        Returns:
+            Metrics summary and the written trace path, if tracing
+        """
+        observe_run(hooks.mode, time.perf_counter() - start, status=status)
+        tracer = hooks.tracer
+        trace_path = tracer.write(self.trace_dir) if tracer and self.trace_dir else None
+        return hooks.metrics.summary(), trace_path
+
+    def run_detailed(
+        self,
+        user_input: str,
+        session_id: str | None = None,
+        timeout: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> RunResult:
+        """Run the agent and return the response with the final state.
+
+        Args:
+            user_input: User's request
+            session_id: Continue this session, creating it if new
+            timeout: Stop the run after this many seconds
+            cancel_token: Token another thread can cancel to stop the run
 
-        result = self.graph.invoke(initial_state)
-        return str(result["messages"][-1].content)
+        Returns:
+            Run result with response, final graph state, timing, metrics,
+            trace path and profile files. A stopped run returns the state it
+            had reached, with the results of its completed steps, and its
+            status says why it stopped.
+        """
+        start = time.perf_counter()
+        session = self._open_session(session_id)
+        token = self._run_token(timeout, cancel_token)
+        mode = self._route(user_input)
+        with ExitStack() as stack:
+            hooks = self._begin_run(stack, mode, session, token)
+            try:
+                result = self.graphs[mode].invoke(
+                    self._initial_state(user_input, session, mode), config=hooks.config
+                )
+            except RunCancelled as e:
+                stack.close()
+                state = hooks.cancellation.last_state if hooks.cancellation else None
+                return self._stopped_result(start, hooks, e.reason, state or {}, session_id)
+            except Exception:
+                stack.close()
+                self._finish_run(start, hooks, status="error")
+                raise
+        metrics, trace_path = self._finish_run(start, hooks)
+        output = str(result["messages"][-1].content)
+        self._close_session(session, user_input, result, output)
+        return RunResult(
+            output=output,
+            state=result,
+            duration_s=time.perf_counter() - start,
+            metrics=metrics,
+            trace_path=trace_path,
+            profile_paths=hooks.profile.paths if hooks.profile else [],
+            session_id=session_id,
+            mode=hooks.mode if self.mode == "auto" else "",
+        )
+
+    def _stopped_result(
+        self,
+        start: float,
+        hooks: _RunHooks,
+        reason: str,
+        state: dict[str, Any],
+        session_id: str | None,
+    ) -> RunResult:
+        """Record a run stopped by its token and build its partial result."""
+        metrics, trace_path = self._finish_run(start, hooks, status=reason)
+        return RunResult(
+            output=_stopped_output(state, reason),
+            state=dict(state),
+            duration_s=time.perf_counter() - start,
+            metrics=metrics,
+            trace_path=trace_path,
+            profile_paths=hooks.profile.paths if hooks.profile else [],
+            session_id=session_id,
+            status=reason,
+            mode=hooks.mode if self.mode == "auto" else "",
+        )
+
+    def _stopped_event(self, result: RunResult) -> AgentEvent:
+        """Build the final event of a stopped streaming run."""
+        return AgentEvent(
+            "done",
+            {
+                "output": result.output,
+                "status": result.status,
+                "step_results": result.state.get("step_results", {}),
+                "metrics": result.metrics,
+                "trace_path": result.trace_path,
+                "profile_paths": result.profile_paths,
+            },
+        )
+
+    def stream(
+        self,
+        user_input: str,
+        session_id: str | None = None,
+        timeout: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> Iterator[AgentEvent]:
+        """Run the agent, yielding events as they happen.
+
+        Args:
+            user_input: User's request
+            session_id: Continue this session, creating it if new
+            timeout: Stop the run after this many seconds
+            cancel_token: Token another thread can cancel to stop the run
+
+        Yields:
+            Plan, step, tool and token events, then a final 'done' event
+            whose data also holds the run's metrics summary, trace path and
+            profile files. When the run is stopped, the 'done' event holds
+            its status and completed step results instead.
+        """
+        translator = EventTranslator()
+        start = time.perf_counter()
+        session = self._open_session(session_id)
+        token = self._run_token(timeout, cancel_token)
+        mode = self._route(user_input)
+        with ExitStack() as stack:
+            hooks = self._begin_run(stack, mode, session, token)
+            graph_events = self.graphs[mode].stream(
+                self._initial_state(user_input, session, mode),
+                config=hooks.config,
+                stream_mode=STREAM_MODES,
+            )
+            try:
+                for stream_mode, chunk in graph_events:
+                    yield from translator.translate(stream_mode, chunk)
+            except GeneratorExit:
+                # The consumer stopped reading: stop the graph and record the run
+                graph_events.close()
+                stack.close()
+                self._finish_run(start, hooks, status="cancelled")
+                raise
+            except RunCancelled as e:
+                stack.close()
+                result = self._stopped_result(
+                    start, hooks, e.reason, translator.final_state, session_id
+                )
+                yield self._stopped_event(result)
+                return
+            except Exception:
+                stack.close()
+                self._finish_run(start, hooks, status="error")
+                raise
+        metrics, trace_path = self._finish_run(start, hooks)
+        done = translator.done()
+        self._close_session(session, user_input, translator.final_state, done.data["output"])
+        profile_paths = hooks.profile.paths if hooks.profile else []
+        yield AgentEvent(
+            "done",
+            {
+                **done.data,
+                "metrics": metrics,
+                "trace_path": trace_path,
+                "profile_paths": profile_paths,
+            },
+        )
+
+    async def astream(
+        self,
+        user_input: str,
+        session_id: str | None = None,
+        timeout: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> AsyncIterator[AgentEvent]:
+        """Asynchronously run the agent, yielding events as they happen.
+
+        Args:
+            user_input: User's request
+            session_id: Continue this session, creating it if new
+            timeout: Stop the run after this many seconds
+            cancel_token: Token another task or thread can cancel to stop
+                          the run
+
+        Yields:
+            Plan, step, tool and token events, then a final 'done' event
+            whose data also holds the run's metrics summary, trace path and
+            profile files. When the run is stopped, the 'done' event holds
+            its status and completed step results instead.
+        """
+        translator = EventTranslator()
+        start = time.perf_counter()
+        session = self._open_session(session_id)
+        token = self._run_token(timeout, cancel_token)
+        mode = self._route(user_input)
+        with ExitStack() as stack:
+            hooks = self._begin_run(stack, mode, session, token)
+            graph_events = self.graphs[mode].astream(
+                self._initial_state(user_input, session, mode),
+                config=hooks.config,
+                stream_mode=STREAM_MODES,
+            )
+            try:
+                async for stream_mode, chunk in graph_events:
+                    for event in translator.translate(stream_mode, chunk):
+                        yield event
+            except GeneratorExit:
+                # The consumer stopped reading: stop the graph and record the run
+                await graph_events.aclose()
+                stack.close()
+                self._finish_run(start, hooks, status="cancelled")
+                raise
+            except RunCancelled as e:
+                stack.close()
+                result = self._stopped_result(
+                    start, hooks, e.reason, translator.final_state, session_id
+                )
+                yield self._stopped_event(result)
+                return
+            except Exception:
+                stack.close()
+                self._finish_run(start, hooks, status="error")
+                raise
+        metrics, trace_path = self._finish_run(start, hooks)
+        done = translator.done()
+        self._close_session(session, user_input, translator.final_state, done.data["output"])
+        profile_paths = hooks.profile.paths if hooks.profile else []
+        yield AgentEvent(
+            "done",
+            {
+                **done.data,
+                "metrics": metrics,
+                "trace_path": trace_path,
+                "profile_paths": profile_paths,
+            },
+        )
+
+    def run(
+        self,
+        user_input: str,
+        session_id: str | None = None,
+        timeout: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> str:
+        """Run the agent with user input.
+
+        Args:
+            user_input: User's request
+            session_id: Continue this session, creating it if new
+            timeout: Stop the run after this many seconds
+            cancel_token: Token another thread can cancel to stop the run
+
+        Returns:
+            Agent's response, or a note on how far it got if it was stopped
+        """
+        return self.run_detailed(user_input, session_id, timeout, cancel_token).output
+
+
+def render_event(event: AgentEvent, previous: AgentEvent | None = None) -> None:
+    """Print a streamed run event for the interactive CLI.
+
+    Args:
+        event: Event to render
+        previous: Event rendered before it, used to avoid repeating a
+                  response that was already streamed token by token
+    """
+    data = event.data
+    if event.type == "token":
+        print(data["text"], end="", flush=True)
+    elif event.type == "plan_created":
+        label = "Replanned" if data["replanned"] else "Plan"
+        print(f"\n{label}: {data['goal']}")
+        for step in data["steps"]:
+            print(f"  {step['step_number']}. [{step['action']}] {step['description']}")
+    elif event.type == "plan_optimized":
+        print(f"Optimized to {len(data['steps'])} steps:")
+        for step in data["steps"]:
+            print(f"  {step['step_number']}. [{step['action']}] {step['description']}")
+    elif event.type == "step_started":
+        print(f"\n> Step {data['step']}/{data['total']}: {data['description']}")
+    elif event.type == "tool_called":
+        print(f"  - {data['tool']}({data['args']})")
+    elif event.type == "step_finished":
+        print(f"  = Step {data['step']} done")
+    elif event.type == "done":
+        if previous is not None and previous.type == "token":
+            print()
+        else:
+            print(f"\n{data['output']}")
 
 
 if __name__ == "__main__":
     load_dotenv()
-    setup_logging(level="DEBUG")
+    setup_logging(level=os.environ.get("LOG_LEVEL", "WARNING"))
 
     mode = sys.argv[1] if len(sys.argv) > 1 else "planning"
     agent = CodeAgent(mode=mode)
+    prewarm_llms(sorted(set(agent.node_models.values())))
     print(f"Code Agent Ready (mode={mode}). Type 'exit' to quit.")
 
     while True:
@@ -72,5 +650,7 @@ if __name__ == "__main__":
         if user_input.lower() == "exit":
             break
 
-        response = agent.run(user_input)
-        print(f"\n{response}")
+        previous = None
+        for event in agent.stream(user_input, session_id="cli"):
+            render_event(event, previous)
+            previous = event
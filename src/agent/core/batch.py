@@ -0,0 +1,320 @@
+"""Batch runner for JSONL workloads.
+
+Usage:
+    python -m src.agent.core.batch requests.jsonl results.jsonl --workers 4
+
+Each input line is a JSON object with an ``id`` and an ``input`` (the user
+request). Every run gets its own workspace directory under
+``--workspace-root``, named after its ID, so IDs must be unique and a single
+path component. Results are appended to the output file as they
+finish, so a restarted batch skips IDs that already completed successfully.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import traceback
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, TextIO
+
+from dotenv import load_dotenv
+
+from ..logging import get_logger, setup_logging
+from ..tools.file import use_workspace
+from .agent import CodeAgent
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class BatchConfig:
+    """Settings shared by every run in a batch."""
+
+    model: str = "gpt-4o-mini"
+    mode: str = "planning"
+    workspace_root: str = "workspaces"
+    log_level: str = "WARNING"
+    timeout: float | None = None
+
+
+def _is_path_component(request_id: str) -> bool:
+    """Check that an ID names a single directory under the workspace root."""
+    return (
+        request_id not in ("", ".", "..")
+        and not any(sep in request_id for sep in ("/", "\\", "\0"))
+        and not os.path.splitdrive(request_id)[0]
+    )
+
+
+def workspace_path(workspace_root: str, request_id: str) -> str:
+    """Return the workspace directory of a request.
+
+    Args:
+        workspace_root: Directory holding every run's workspace
+        request_id: Request ID
+
+    Returns:
+        The request's directory under ``workspace_root``
+
+    Raises:
+        ValueError: If the ID is not a single path component
+    """
+    if not _is_path_component(request_id):
+        raise ValueError(f"Request id {request_id!r} is not a valid directory name")
+    return os.path.join(workspace_root, request_id)
+
+
+def read_requests(path: str) -> Iterator[dict[str, Any]]:
+    """Read batch requests from a JSONL file.
+
+    Args:
+        path: Input JSONL path
+
+    Yields:
+        Request objects with 'id' and 'input' keys
+
+    Raises:
+        ValueError: If a line is missing either key, or its ID cannot be
+                    used as a workspace directory name or repeats an
+                    earlier one
+    """
+    seen: dict[str, int] = {}
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if "id" not in request or "input" not in request:
+                raise ValueError(f"{path}:{line_number}: request needs 'id' and 'input'")
+            request["id"] = str(request["id"])
+            if not _is_path_component(request["id"]):
+                raise ValueError(
+                    f"{path}:{line_number}: id {request['id']!r} must be a single path component"
+                )
+            if request["id"] in seen:
+                raise ValueError(
+                    f"{path}:{line_number}: id {request['id']!r} already used on line "
+                    f"{seen[request['id']]}"
+                )
+            seen[request["id"]] = line_number
+            yield request
+
+
+def completed_ids(path: str) -> set[str]:
+    """Return IDs that already finished successfully in an output file.
+
+    Args:
+        path: Output JSONL path (may not exist yet)
+
+    Returns:
+        IDs with status 'ok'
+    """
+    if not os.path.exists(path):
+        return set()
+
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut off by an interrupted run
+                continue
+            if record.get("status") == "ok":
+                done.add(str(record["id"]))
+    return done
+
+
+_agent: CodeAgent | None = None
+_config: BatchConfig | None = None
+
+
+def _init_worker(config: BatchConfig) -> None:
+    """Create the agent reused by every run in this worker."""
+    global _agent, _config
+    load_dotenv()
+    setup_logging(level=config.log_level)
+    _config = config
+    _agent = CodeAgent(model=config.model, mode=config.mode)
+
+
+def run_request(request: dict[str, Any]) -> dict[str, Any]:
+    """Run one request in its own workspace using the worker's agent.
+
+    Args:
+        request: Request object with 'id' and 'input'
+
+    Returns:
+        Output record with status, response, error and run stats
+    """
+    if _agent is None or _config is None:
+        raise RuntimeError("Batch worker not initialized")
+
+    workspace = workspace_path(_config.workspace_root, request["id"])
+    record: dict[str, Any] = {"id": request["id"], "workspace": workspace}
+    try:
+        with use_workspace(workspace):
+            result = _agent.run_detailed(request["input"], timeout=_config.timeout)
+    except Exception as e:
+        logger.error("Batch run failed", id=request["id"], error=str(e))
+        record.update(
+            status="error",
+            error=f"{type(e).__name__}: {e}",
+            traceback=traceback.format_exc(),
+        )
+        return record
+
+    # Stopped runs are not 'ok', so a rerun of the batch retries them
+    status = "ok" if result.status == "completed" else result.status
+    record.update(status=status, output=result.output, stats=result.stats())
+    return record
+
+
+def _write_record(out: TextIO, record: dict[str, Any]) -> None:
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def run_with_processes(
+    requests: list[dict[str, Any]], out: TextIO, config: BatchConfig, workers: int
+) -> int:
+    """Run requests on a pool of worker processes.
+
+    Args:
+        requests: Requests to run
+        out: Open output file
+        config: Batch settings
+        workers: Number of worker processes
+
+    Returns:
+        Number of failed runs
+    """
+    failures = 0
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(config,)
+    ) as pool:
+        futures = [pool.submit(run_request, request) for request in requests]
+        for future in as_completed(futures):
+            record = future.result()
+            failures += record["status"] != "ok"
+            _write_record(out, record)
+    return failures
+
+
+async def run_with_tasks(
+    requests: list[dict[str, Any]], out: TextIO, config: BatchConfig, workers: int
+) -> int:
+    """Run requests as concurrent asyncio tasks in this process.
+
+    Args:
+        requests: Requests to run
+        out: Open output file
+        config: Batch settings
+        workers: Maximum number of concurrent runs
+
+    Returns:
+        Number of failed runs
+    """
+    _init_worker(config)
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run_one(request: dict[str, Any]) -> dict[str, Any]:
+        async with semaphore:
+            return await asyncio.to_thread(run_request, request)
+
+    failures = 0
+    for next_done in asyncio.as_completed([run_one(request) for request in requests]):
+        record = await next_done
+        failures += record["status"] != "ok"
+        _write_record(out, record)
+    return failures
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    config: BatchConfig,
+    workers: int = 4,
+    executor: str = "process",
+) -> dict[str, int]:
+    """Run every pending request from a JSONL file.
+
+    Args:
+        input_path: Input JSONL path
+        output_path: Output JSONL path, appended to
+        config: Batch settings
+        workers: Number of worker processes or concurrent tasks
+        executor: 'process' for a process pool, 'async' for asyncio tasks
+
+    Returns:
+        Counts of total, skipped, run and failed requests
+    """
+    requests = list(read_requests(input_path))
+    done = completed_ids(output_path)
+    pending = [request for request in requests if request["id"] not in done]
+    logger.info(
+        "Batch started",
+        total=len(requests),
+        skipped=len(requests) - len(pending),
+        workers=workers,
+        executor=executor,
+    )
+
+    failures = 0
+    if pending:
+        with open(output_path, "a", encoding="utf-8") as out:
+            if executor == "async":
+                failures = asyncio.run(run_with_tasks(pending, out, config, workers))
+            else:
+                failures = run_with_processes(pending, out, config, workers)
+
+    summary = {
+        "total": len(requests),
+        "skipped": len(requests) - len(pending),
+        "run": len(pending),
+        "failed": failures,
+    }
+    logger.info("Batch finished", **summary)
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point.
+
+    Args:
+        argv: Arguments (defaults to sys.argv)
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Run agent requests from a JSONL file")
+    parser.add_argument("input", help="Input JSONL with 'id' and 'input' per line")
+    parser.add_argument("output", help="Output JSONL, appended to")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=["process", "async"], default="process")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--mode", choices=["planning", "simple", "auto"], default="planning")
+    parser.add_argument("--workspace-root", default="workspaces")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--timeout", type=float, help="Stop each run after this many seconds")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    setup_logging(level=args.log_level)
+    config = BatchConfig(
+        model=args.model,
+        mode=args.mode,
+        workspace_root=args.workspace_root,
+        log_level=args.log_level,
+        timeout=args.timeout,
+    )
+    summary = run_batch(args.input, args.output, config, args.workers, args.executor)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Offline request classifier for the 'auto' agent mode.
+
+A plan-and-execute run costs a planner call plus at least one executor call,
+even for "read foo.txt", which the simple tool loop answers in one round
+trip. ``classify_request`` decides from the request text alone, without an
+LLM call, whether a request is a single tool action (simple loop) or
+multi-step work (plan-and-execute). It errs towards planning: anything it
+does not recognize as a single action is planned.
+"""
+
+import re
+from dataclasses import dataclass
+
+SIMPLE = "simple"
+PLANNING = "planning"
+
+MAX_SIMPLE_WORDS = 25
+
+# Verbs naming one tool action each
+_ACTION_VERBS = {
+    "read": (
+        "read",
+        "show",
+        "cat",
+        "open",
+        "display",
+        "print",
+        "view",
+        "contents of",
+        "what is in",
+        "what's in",
+    ),
+    "list": ("list", "ls", "what files", "which files"),
+    "write": ("write", "save", "create"),
+}
+# Work that takes several tool calls or reasoning over their results
+_COMPLEX_VERBS = (
+    "refactor",
+    "implement",
+    "fix",
+    "debug",
+    "analyze",
+    "analyse",
+    "summarize",
+    "summarise",
+    "compare",
+    "explain",
+    "review",
+    "test",
+    "migrate",
+    "rename",
+    "update",
+    "modify",
+    "edit",
+    "convert",
+    "find",
+    "search",
+)
+_SEQUENCE = re.compile(
+    r"\b(?:then|after(?:wards)?|before|finally|next|also)\b|;|^\s*(?:\d+[.)]|[-*])\s", re.M
+)
+_QUANTIFIER = re.compile(r"\b(?:each|every|all|both)\b")
+_PATH = re.compile(
+    r"(?<![\w/])(?:[\w.-]+/)*[\w-]+\.[A-Za-z0-9]{1,8}\b|(?<![\w/])[\w.-]+/(?:[\w.-]+/?)*"
+)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Which graph a request runs on, and why."""
+
+    mode: str  # SIMPLE or PLANNING
+    rule: str  # Short rule name, used as a metric label
+    detail: str = ""  # What triggered the rule, for logs
+
+
+def _has_word(text: str, phrase: str) -> bool:
+    """Check whether text contains a phrase or, for one word, any form of it.
+
+    A word matches as a stem, so "implement" also finds "implements" and
+    "implemented"; a final "e" is dropped first, so "update" finds
+    "updating". Stems match some unrelated words too ("fixture"), which
+    only errs towards planning.
+    """
+    if " " in phrase:
+        return re.search(rf"\b{re.escape(phrase)}\b", text) is not None
+    stem = phrase[:-1] if phrase.endswith("e") else phrase
+    return re.search(rf"\b{re.escape(stem)}\w*", text) is not None
+
+
+def classify_request(text: str) -> RouteDecision:
+    """Classify a request as a single tool action or multi-step work.
+
+    Args:
+        text: The user's request
+
+    Returns:
+        SIMPLE for one read, listing or write of at most one path, PLANNING
+        for everything else
+    """
+    lowered = text.lower()
+    words = len(lowered.split())
+    if words > MAX_SIMPLE_WORDS:
+        return RouteDecision(PLANNING, "long", f"{words} words")
+    if match := _SEQUENCE.search(lowered):
+        return RouteDecision(PLANNING, "sequence", match.group().strip())
+    if match := _QUANTIFIER.search(lowered):
+        return RouteDecision(PLANNING, "quantifier", match.group())
+    for verb in _COMPLEX_VERBS:
+        if _has_word(lowered, verb):
+            return RouteDecision(PLANNING, "complex_verb", verb)
+
+    paths = set(_PATH.findall(text))
+    if len(paths) > 1:
+        return RouteDecision(PLANNING, "multi_path", ", ".join(sorted(paths)))
+    actions = [
+        action
+        for action, verbs in _ACTION_VERBS.items()
+        if any(_has_word(lowered, verb) for verb in verbs)
+    ]
+    if len(actions) > 1:
+        return RouteDecision(PLANNING, "multi_action", ", ".join(actions))
+    if not actions:
+        return RouteDecision(PLANNING, "no_action")
+    return RouteDecision(SIMPLE, "single_action", actions[0])
@@ -0,0 +1,156 @@
+"""Run events emitted while an agent run is streaming."""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+# Graph stream modes consumed by EventTranslator
+STREAM_MODES = ["updates", "messages", "values"]
+
+
+@dataclass(frozen=True)
+class AgentEvent:
+    """A single event in a streamed agent run.
+
+    Types:
+        plan_created: A plan (or replan) is ready
+        plan_optimized: Redundant steps were removed from the plan
+        step_started: A plan step began executing
+        tool_called: The LLM requested a tool call
+        step_finished: A plan step's tool result was recorded
+        token: A chunk of LLM output text
+        done: The run finished; ``data['output']`` holds the response
+    """
+
+    type: str
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+def _chunk_text(message: BaseMessage) -> str:
+    """Extract the text of a message chunk, including content block lists."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+    )
+
+
+class EventTranslator:
+    """Turns LangGraph stream output into AgentEvents.
+
+    Feed it the ``(mode, chunk)`` pairs produced by ``graph.stream`` or
+    ``graph.astream`` with ``stream_mode=STREAM_MODES``.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the translator."""
+        self.final_state: dict[str, Any] = {}
+        self._plan: Any = None
+        self._step_index = 0
+
+    def _step_started(self, index: int) -> AgentEvent:
+        step = self._plan.steps[index]
+        return AgentEvent(
+            "step_started",
+            {
+                "step": step.step_number,
+                "total": self._plan.total_steps,
+                "action": step.action,
+                "description": step.description,
+            },
+        )
+
+    def _from_update(self, node: str, update: dict[str, Any]) -> list[AgentEvent]:
+        events: list[AgentEvent] = []
+
+        plan = update.get("plan")
+        if plan is not None and node == "optimizer":
+            self._plan = plan
+            events.append(
+                AgentEvent("plan_optimized", {"steps": [step.model_dump() for step in plan.steps]})
+            )
+        elif plan is not None:
+            self._plan = plan
+            self._step_index = update.get("current_step_index", 0)
+            events.append(
+                AgentEvent(
+                    "plan_created",
+                    {
+                        "goal": plan.goal,
+                        "steps": [step.model_dump() for step in plan.steps],
+                        "replanned": node == "replanner",
+                    },
+                )
+            )
+            if plan.total_steps:
+                events.append(self._step_started(0))
+
+        messages = update.get("messages") or []
+        last = messages[-1] if messages else None
+        if isinstance(last, AIMessage) and last.tool_calls:
+            active_steps = update.get("active_steps", 1)
+            if self._plan is not None:
+                # Fused windows start the extra steps together with the current one
+                for index in range(self._step_index + 1, self._step_index + active_steps):
+                    if index < self._plan.total_steps:
+                        events.append(self._step_started(index))
+            for tool_call in last.tool_calls:
+                events.append(
+                    AgentEvent(
+                        "tool_called", {"tool": tool_call["name"], "args": tool_call["args"]}
+                    )
+                )
+
+        if node == "process_result" and self._plan is not None:
+            new_index = update.get("current_step_index", self._step_index)
+            results = update.get("step_results", {})
+            for index in range(self._step_index, new_index):
+                events.append(
+                    AgentEvent(
+                        "step_finished",
+                        {"step": index + 1, "result": results.get(index, "")},
+                    )
+                )
+            self._step_index = new_index
+            if new_index < self._plan.total_steps:
+                events.append(self._step_started(new_index))
+
+        return events
+
+    def translate(self, mode: str, chunk: Any) -> list[AgentEvent]:
+        """Translate one stream item into events.
+
+        Args:
+            mode: Stream mode the chunk came from
+            chunk: Stream payload
+
+        Returns:
+            Events for this item (possibly none)
+        """
+        if mode == "values":
+            self.final_state = chunk
+            return []
+
+        if mode == "messages":
+            message, metadata = chunk
+            if isinstance(message, AIMessageChunk):
+                text = _chunk_text(message)
+                if text:
+                    return [
+                        AgentEvent("token", {"node": metadata.get("langgraph_node"), "text": text})
+                    ]
+            return []
+
+        events: list[AgentEvent] = []
+        for node, update in chunk.items():
+            if update:
+                events.extend(self._from_update(node, update))
+        return events
+
+    def done(self) -> AgentEvent:
+        """Build the final event from the last graph state."""
+        messages = self.final_state.get("messages") or []
+        output = str(messages[-1].content) if messages else ""
+        return AgentEvent("done", {"output": output})
@@ -0,0 +1,335 @@
+"""Persistent multi-turn sessions.
+
+A ``Session`` carries what a follow-up request needs from earlier turns: a
+compacted conversation (one user message and one answer per turn), the last
+plan and its step results, the contents of workspace files the agent
+already read or wrote, and a memo of its read-only tool calls. The planner receives this as a short context block,
+so a follow-up plans only the remaining work instead of starting over.
+
+Sessions live in memory (``SessionStore``) or, to share them between
+worker processes, in a SQLite database (``SqliteSessionStore``).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
+
+from ..models.plan import Plan
+from ..tools.file import resolve_path
+from ..tools.memo import ToolMemo
+
+# Tools whose results describe workspace files, keyed by the file path argument
+_FILE_TOOLS = {"read_file": "path", "list_directory": "path"}
+
+
+@dataclass
+class KnownFile:
+    """Workspace file content seen in an earlier turn."""
+
+    content: str
+    mtime: float | None  # None when the file could not be stat'ed
+
+
+@dataclass
+class Session:
+    """State kept between the turns of one conversation."""
+
+    session_id: str
+    messages: list[BaseMessage] = field(default_factory=list)
+    plan: Plan | None = None
+    step_results: dict[int, str] = field(default_factory=dict)
+    files: dict[str, KnownFile] = field(default_factory=dict)  # Keyed by '<tool>:<path>'
+    memo: ToolMemo = field(default_factory=ToolMemo)  # Reads and listings reused across turns
+    turns: int = 0
+    updated_at: float = field(default_factory=time.time)
+
+    max_turns: int = 5  # Conversation turns kept
+    max_chars: int = 300  # Per answer and step result in the context block
+    max_file_chars: int = 1500  # Per known file in the context block
+    max_files_chars: int = 6000  # All known files in the context block
+
+    def record_turn(self, user_input: str, state: dict[str, Any], output: str) -> None:
+        """Fold a finished run into the session.
+
+        Args:
+            user_input: The turn's request
+            state: Final graph state of the run
+            output: The agent's answer
+        """
+        self.messages = [
+            *self.messages,
+            HumanMessage(content=user_input),
+            AIMessage(content=output),
+        ][-2 * self.max_turns :]
+        if state.get("plan") is not None:
+            self.plan = state["plan"]
+            self.step_results = dict(state.get("step_results") or {})
+        self._record_files(state.get("messages") or [])
+        self.turns += 1
+        self.updated_at = time.time()
+
+    def _record_files(self, messages: list[BaseMessage]) -> None:
+        """Remember file contents from the turn's tool calls and results."""
+        results = {m.tool_call_id: str(m.content) for m in messages if isinstance(m, ToolMessage)}
+        for message in messages:
+            if not isinstance(message, AIMessage):
+                continue
+            for tool_call in message.tool_calls:
+                name, args = tool_call["name"], tool_call["args"]
+                if name == "write_file" and "path" in args and "content" in args:
+                    self.files.pop(f"list_directory:{os.path.dirname(args['path']) or '.'}", None)
+                    self._remember(f"read_file:{args['path']}", args["path"], args["content"])
+                elif name in _FILE_TOOLS:
+                    content = results.get(tool_call["id"] or "")
+                    path = args.get(_FILE_TOOLS[name], ".")
+                    if content is not None and not content.startswith("Error"):
+                        self._remember(f"{name}:{path}", path, content)
+
+    def _remember(self, key: str, path: str, content: str) -> None:
+        try:
+            mtime: float | None = os.path.getmtime(resolve_path(path))
+        except OSError:
+            mtime = None
+        self.files[key] = KnownFile(content, mtime)
+
+    def refresh(self) -> None:
+        """Forget known files that changed on disk since they were seen.
+
+        Call it inside the session's workspace before building a new turn.
+        """
+        for key, known in list(self.files.items()):
+            path = key.split(":", 1)[1]
+            try:
+                mtime: float | None = os.path.getmtime(resolve_path(path))
+            except OSError:
+                mtime = None
+            if mtime != known.mtime:
+                del self.files[key]
+
+    def context(self) -> str:
+        """Render the session for the planner's follow-up prompt.
+
+        Returns:
+            Context block, or '' for a session without turns
+        """
+        if not self.turns:
+            return ""
+
+        def clip(text: str, limit: int) -> str:
+            return text if len(text) <= limit else text[:limit] + "..."
+
+        lines = ["Conversation:"]
+        for message in self.messages:
+            role = "User" if isinstance(message, HumanMessage) else "Agent"
+            lines.append(f"- {role}: {clip(str(message.content), self.max_chars)}")
+
+        if self.plan is not None:
+            lines.append(f"\nLast plan: {self.plan.goal}")
+            for idx, result in sorted(self.step_results.items()):
+                action = self.plan.steps[idx].action if idx < self.plan.total_steps else "step"
+                lines.append(f"- Step {idx + 1} [{action}]: {clip(result, self.max_chars)}")
+
+        budget = self.max_files_chars
+        file_lines: list[str] = []
+        for key, known in reversed(self.files.items()):
+            tool, path = key.split(":", 1)
+            label = f"{path} (directory listing)" if tool == "list_directory" else path
+            if budget <= 0:
+                break
+            content = clip(known.content, min(self.max_file_chars, budget))
+            budget -= len(content)
+            file_lines.append(f"--- {label} ---\n{content}")
+        if file_lines:
+            lines.append("\nKnown workspace contents:")
+            lines.extend(reversed(file_lines))
+
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the session to JSON-compatible data.
+
+        The tool memo is left out: it is a cache of this process's reads and
+        starts empty wherever the session is loaded.
+        """
+        return {
+            "session_id": self.session_id,
+            "messages": messages_to_dict(self.messages),
+            "plan": self.plan.model_dump() if self.plan is not None else None,
+            "step_results": {str(idx): result for idx, result in self.step_results.items()},
+            "files": {key: [known.content, known.mtime] for key, known in self.files.items()},
+            "turns": self.turns,
+            "updated_at": self.updated_at,
+            "max_turns": self.max_turns,
+            "max_chars": self.max_chars,
+            "max_file_chars": self.max_file_chars,
+            "max_files_chars": self.max_files_chars,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Session":
+        """Rebuild a session serialized with ``to_dict``."""
+        plan = data.get("plan")
+        return cls(
+            session_id=data["session_id"],
+            messages=messages_from_dict(data.get("messages") or []),
+            plan=Plan.model_validate(plan) if plan is not None else None,
+            step_results={int(idx): result for idx, result in data["step_results"].items()},
+            files={key: KnownFile(*known) for key, known in data["files"].items()},
+            turns=data["turns"],
+            updated_at=data["updated_at"],
+            max_turns=data["max_turns"],
+            max_chars=data["max_chars"],
+            max_file_chars=data["max_file_chars"],
+            max_files_chars=data["max_files_chars"],
+        )
+
+
+class SessionStore:
+    """In-memory session store, evicting the least recently used sessions."""
+
+    def __init__(self, max_sessions: int = 1000):
+        """Initialize the store.
+
+        Args:
+            max_sessions: Sessions kept before the oldest is evicted
+        """
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Session | None:
+        """Return a session, or None if it does not exist."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id: str) -> Session:
+        """Return a session, creating an empty one if needed."""
+        return self.get(session_id) or Session(session_id)
+
+    def save(self, session: Session) -> None:
+        """Store a session after a turn."""
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session if it exists."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+class SqliteSessionStore(SessionStore):
+    """Session store in a SQLite database, shared by every process that opens it.
+
+    The database runs in WAL mode, so readers in one process do not block a
+    writer in another. Each thread of each process gets its own connection.
+    Tool memos are not stored; the store keeps one per session in memory,
+    which a worker reuses as long as the session's turns are routed to it.
+    """
+
+    def __init__(self, path: str, max_sessions: int = 1000, timeout: float = 30.0):
+        """Initialize the store, creating the database if needed.
+
+        Args:
+            path: Database file
+            max_sessions: Sessions kept before the least recently saved is evicted
+            timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path
+        self.max_sessions = max_sessions
+        self.timeout = timeout
+        self._local = threading.local()
+        self._memos: OrderedDict[str, ToolMemo] = OrderedDict()
+        self._lock = threading.Lock()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening a new one after a fork."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _memo(self, session_id: str) -> ToolMemo:
+        with self._lock:
+            memo = self._memos.pop(session_id, None)
+            if memo is None:
+                memo = ToolMemo()
+            self._memos[session_id] = memo
+            while len(self._memos) > self.max_sessions:
+                self._memos.popitem(last=False)
+            return memo
+
+    def get(self, session_id: str) -> Session | None:
+        """Return a session, or None if it does not exist."""
+        row = (
+            self._connect()
+            .execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        session = Session.from_dict(json.loads(row[0]))
+        session.memo = self._memo(session_id)
+        return session
+
+    def save(self, session: Session) -> None:
+        """Store a session after a turn."""
+        conn = self._connect()
+        with self._lock:
+            self._memos[session.session_id] = session.memo
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET "
+                "data = excluded.data, updated_at = excluded.updated_at",
+                (session.session_id, json.dumps(session.to_dict()), session.updated_at),
+            )
+            conn.execute(
+                "DELETE FROM sessions WHERE session_id NOT IN "
+                "(SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT ?)",
+                (self.max_sessions,),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session if it exists."""
+        self._connect().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        with self._lock:
+            self._memos.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return int(self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0])
@@ -0,0 +1,339 @@
+"""Multi-process workers behind a local dispatcher.
+
+Usage:
+    python -m src.agent.core.workers --workers 4 --session-db sessions.db \\
+        < requests.jsonl > results.jsonl
+
+A single process is limited by the GIL and by blocking LLM calls.
+``WorkerPool`` runs agents in N worker processes, each with its own request
+queue, and dispatches from the parent:
+
+- Requests with a ``session_id`` always go to the same worker (a stable hash
+  of the ID), so a session's turns run one at a time and reuse that
+  worker's tool memo
+- Requests without one go to the worker with the fewest runs in flight
+
+Each worker sends its records back on its own pipe, and the dispatcher
+watches the workers' process sentinels, so a worker that dies is noticed at
+once and cannot leave a lock shared with the other workers held.
+
+Sessions live in a shared SQLite database (``SqliteSessionStore``), so no
+state is lost when a worker is replaced and the pool can be resized or
+restarted. A worker that dies fails its pending runs and is restarted.
+Workers are spawned rather than forked, since the dispatcher and the agent
+run background threads whose locks a fork could copy while held.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import traceback
+from collections.abc import Callable
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, cast
+
+from dotenv import load_dotenv
+
+from ..logging import get_logger, setup_logging
+from ..tools.file import use_workspace
+from .agent import CodeAgent
+from .session import SessionStore, SqliteSessionStore
+
+logger = get_logger(__name__)
+
+AgentFactory = Callable[["WorkerConfig", SessionStore], CodeAgent]
+
+_mp = multiprocessing.get_context("spawn")
+
+
+@dataclass(frozen=True)
+class WorkerConfig:
+    """Settings shared by every worker process."""
+
+    session_db: str = "sessions.db"
+    model: str = "gpt-4o-mini"
+    mode: str = "planning"
+    workspace: str | None = None  # Defaults to each worker's current workspace
+    log_level: str = "WARNING"
+    timeout: float | None = None
+
+
+def _run_job(agent: CodeAgent, config: WorkerConfig, job: dict[str, Any]) -> dict[str, Any]:
+    """Run one request, reporting failures in the record instead of raising."""
+    record: dict[str, Any] = {"session_id": job["session_id"], "worker": os.getpid()}
+    workspace = use_workspace(config.workspace) if config.workspace else nullcontext()
+    try:
+        with workspace:
+            result = agent.run_detailed(
+                job["input"], session_id=job["session_id"], timeout=config.timeout
+            )
+    except Exception as e:
+        logger.error("Worker run failed", session_id=job["session_id"], error=str(e))
+        record.update(
+            status="error", error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc()
+        )
+        return record
+    status = "ok" if result.status == "completed" else result.status
+    record.update(status=status, output=result.output, stats=result.stats())
+    return record
+
+
+def create_agent(config: WorkerConfig, session_store: SessionStore) -> CodeAgent:
+    """Create a worker's agent; the default ``AgentFactory``."""
+    return CodeAgent(model=config.model, mode=config.mode, session_store=session_store)
+
+
+def _worker_main(
+    config: WorkerConfig,
+    agent_factory: AgentFactory,
+    requests: "multiprocessing.Queue[dict[str, Any] | None]",
+    results: Connection,
+) -> None:
+    """Serve requests from a queue until it yields None."""
+    load_dotenv()
+    setup_logging(level=config.log_level)
+    agent = agent_factory(config, SqliteSessionStore(config.session_db))
+    while (job := requests.get()) is not None:
+        results.send((job["job_id"], _run_job(agent, config, job)))
+
+
+def worker_for(session_id: str, workers: int) -> int:
+    """Return the index of the worker that owns a session.
+
+    Uses a stable hash, so the mapping survives dispatcher restarts.
+    """
+    digest = hashlib.blake2b(session_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % workers
+
+
+class WorkerPool:
+    """Agent worker processes with session-affinity dispatch."""
+
+    def __init__(
+        self,
+        config: WorkerConfig,
+        workers: int | None = None,
+        agent_factory: AgentFactory = create_agent,
+    ):
+        """Initialize the pool; call ``start`` or use it as a context manager.
+
+        Args:
+            config: Worker settings
+            workers: Number of worker processes (defaults to the CPU count)
+            agent_factory: Module-level function creating each worker's agent
+                           from the config and the shared session store
+        """
+        self.config = config
+        self.workers = workers or os.cpu_count() or 1
+        self.agent_factory = agent_factory
+        self._processes: list[Any] = [None] * self.workers
+        self._queues: list[Any] = [None] * self.workers  # Requests, per worker
+        self._conns: list[Connection | None] = [None] * self.workers  # Records, per worker
+        # job id -> (worker, future)
+        self._pending: dict[int, tuple[int, Future[dict[str, Any]]]] = {}
+        self._in_flight = [0] * self.workers
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector: threading.Thread | None = None
+        self._stopping = False  # Workers exiting now are not restarted
+        self._closed = threading.Event()  # All workers exited; drain and stop collecting
+
+    def _spawn(self, index: int, requests: "multiprocessing.Queue[dict[str, Any] | None]") -> None:
+        """Start worker ``index`` on a request queue, with a fresh record pipe."""
+        reader, writer = _mp.Pipe(duplex=False)
+        process = _mp.Process(
+            target=_worker_main,
+            args=(self.config, self.agent_factory, requests, writer),
+            name=f"agent-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        # Only the worker writes, so the pipe reads EOF once it exits
+        writer.close()
+        with self._lock:
+            self._processes[index] = process
+            self._conns[index] = reader
+
+    def start(self) -> "WorkerPool":
+        """Start the worker processes and the result collector."""
+        # Create the database before workers race to do it
+        SqliteSessionStore(self.config.session_db)
+        for index in range(self.workers):
+            self._queues[index] = _mp.Queue()
+            self._spawn(index, self._queues[index])
+        self._collector = threading.Thread(
+            target=self._collect, name="agent-worker-results", daemon=True
+        )
+        self._collector.start()
+        logger.info("Worker pool started", workers=self.workers, session_db=self.config.session_db)
+        return self
+
+    def submit(self, user_input: str, session_id: str | None = None) -> Future[dict[str, Any]]:
+        """Queue a request on a worker.
+
+        Args:
+            user_input: The user's request
+            session_id: Continue this session; all its turns run on one worker
+
+        Returns:
+            Future resolving to the run's record: status, output or error,
+            stats, session_id and the worker's pid
+        """
+        future: Future[dict[str, Any]] = Future()
+        with self._lock:
+            if session_id is not None:
+                index = worker_for(session_id, self.workers)
+            else:
+                index = min(range(self.workers), key=self._in_flight.__getitem__)
+            job_id = next(self._job_ids)
+            self._pending[job_id] = (index, future)
+            self._in_flight[index] += 1
+            job = {"job_id": job_id, "input": user_input, "session_id": session_id}
+            self._queues[index].put(job)
+        return future
+
+    def run(self, user_input: str, session_id: str | None = None) -> dict[str, Any]:
+        """Run a request on a worker and wait for its record."""
+        return self.submit(user_input, session_id).result()
+
+    def _finish(self, job_id: int) -> Future[dict[str, Any]] | None:
+        with self._lock:
+            entry = self._pending.pop(job_id, None)
+            if entry is None:
+                return None
+            self._in_flight[entry[0]] -= 1
+            return entry[1]
+
+    def _receive(self, index: int) -> None:
+        """Read one record from a worker's pipe and resolve its future."""
+        conn = self._conns[index]
+        if conn is None:
+            return
+        try:
+            job_id, record = cast(tuple[int, dict[str, Any]], conn.recv())
+        except (EOFError, OSError):
+            conn.close()
+            self._conns[index] = None
+            return
+        future = self._finish(job_id)
+        if future is not None:
+            future.set_result(record)
+
+    def _restart(self, index: int) -> None:
+        """Fail the runs of a worker that died and start a replacement."""
+        process = self._processes[index]
+        process.join()
+        while (conn := self._conns[index]) is not None and conn.poll():
+            self._receive(index)
+        logger.error("Worker died, restarting", worker=index, exitcode=process.exitcode)
+        with self._lock:
+            # Requests still queued for the dead worker are failed with it;
+            # new ones go to the replacement's queue
+            lost = [job_id for job_id, (owner, _) in self._pending.items() if owner == index]
+            self._queues[index].cancel_join_thread()
+            self._queues[index] = requests = _mp.Queue()
+        self._spawn(index, requests)
+        for job_id in lost:
+            future = self._finish(job_id)
+            if future is not None:
+                future.set_exception(
+                    RuntimeError(f"Worker {index} exited with code {process.exitcode}")
+                )
+
+    def _collect(self) -> None:
+        """Resolve futures as records arrive; replace workers that die."""
+        while True:
+            conns = {conn: i for i, conn in enumerate(self._conns) if conn is not None}
+            sentinels: dict[int, int] = {}
+            if not self._stopping:
+                sentinels = {process.sentinel: i for i, process in enumerate(self._processes)}
+            ready = wait([*conns, *sentinels], timeout=0.5)
+            for obj in ready:
+                if obj in conns:
+                    self._receive(conns[obj])
+            for obj in ready:
+                if obj in sentinels and not self._stopping:
+                    self._restart(sentinels[obj])
+            if not ready and self._closed.is_set():
+                return
+
+    def close(self) -> None:
+        """Let the workers finish their queued requests, then stop them."""
+        self._stopping = True
+        for requests in self._queues:
+            requests.put(None)
+        for process in self._processes:
+            process.join()
+        self._closed.set()
+        if self._collector is not None:
+            self._collector.join()
+        for job_id in list(self._pending):
+            future = self._finish(job_id)
+            if future is not None:
+                future.set_exception(RuntimeError("Worker pool closed"))
+
+    def __enter__(self) -> "WorkerPool":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point: JSONL requests on stdin, records on stdout.
+
+    Args:
+        argv: Arguments (defaults to sys.argv)
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Serve agent requests from worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--session-db", default="sessions.db")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--mode", choices=["planning", "simple", "auto"], default="planning")
+    parser.add_argument("--workspace", help="Workspace shared by every worker")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--timeout", type=float, help="Stop each run after this many seconds")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    setup_logging(level=args.log_level)
+    config = WorkerConfig(
+        session_db=args.session_db,
+        model=args.model,
+        mode=args.mode,
+        workspace=args.workspace,
+        log_level=args.log_level,
+        timeout=args.timeout,
+    )
+    failures = 0
+    with WorkerPool(config, args.workers) as pool:
+        futures = []
+        for line in sys.stdin:
+            if line.strip():
+                request = json.loads(line)
+                future = pool.submit(request["input"], request.get("session_id"))
+                futures.append((request.get("id"), future))
+        for request_id, future in futures:
+            try:
+                record = future.result()
+            except RuntimeError as e:
+                record = {"status": "error", "error": str(e)}
+            failures += record["status"] != "ok"
+            sys.stdout.write(json.dumps({"id": request_id, **record}, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,13 @@
 """Node factory functions for planning agent workflow."""
 
 from .executor import create_executor_node
+from .optimizer import create_optimizer_node
 from .planner import create_planner_node
 from .replanner import create_replanner_node
 
-__all__ = ["create_planner_node", "create_executor_node", "create_replanner_node"]
+__all__ = [
+    "create_planner_node",
+    "create_optimizer_node",
+    "create_executor_node",
+    "create_replanner_node",
+]
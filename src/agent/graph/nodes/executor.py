@@ -1,29 +1,197 @@
 """Executor node for performing plan steps."""
 
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 
-from ...logging import get_logger
-from ...prompts import get_prompt
+from ...logging import get_logger, preview
+from ...metrics import record_retry
+from ...models.plan import Plan, PlanStep
+from ...prompts import get_prompt, prompt_attributes
+from ...tools.file import resolve_path
+from ...tools.memo import MEMOIZABLE_TOOLS, get_memo
 from ..state import PlanningAgentState
+from .prefetch import StepPrefetcher
 
 logger = get_logger(__name__)
 
-EXECUTOR_SYSTEM_PROMPT = get_prompt("executor")
-EXECUTOR_TEMPLATE = get_prompt("executor_template")
+# EXECUTOR_* prompt constants, loaded on first access
+__getattr__ = prompt_attributes(
+    __name__,
+    {
+        "EXECUTOR_SYSTEM_PROMPT": "executor",
+        "EXECUTOR_PLAN_TEMPLATE": "executor_plan_template",
+        "EXECUTOR_TEMPLATE": "executor_template",
+        "EXECUTOR_BATCH_TEMPLATE": "executor_batch_template",
+    },
+)
 
+# Actions that only read the workspace, so adjacent steps can't depend on each other
+FUSABLE_ACTIONS = frozenset({"read_file", "list_directory"})
 
-def create_executor_node(llm: BaseChatModel, tools: list):
+
+def _format_previous_context(step_results: dict[int, str]) -> str:
+    """Summarize the results of previously completed steps."""
+    previous_context = ""
+    if step_results:
+        previous_context = "Previous results:\n"
+        for idx, result in sorted(step_results.items()):
+            previous_context += f"- Step {idx + 1}: {result[:200]}...\n"
+    return previous_context
+
+
+def _format_plan_context(plan: Plan) -> str:
+    """Render the goal and every step of a plan."""
+    steps = "\n".join(
+        f"{step.step_number}. [{step.action}] {step.description} ({step.input_data})"
+        for step in plan.steps
+    )
+    return get_prompt("executor_plan_template").format(goal=plan.goal, steps=steps)
+
+
+def _executor_messages(execution_prompt: str, plan: Plan | None) -> list[BaseMessage]:
+    """Lay out an executor prompt from its most to its least stable part.
+
+    The system prompt and the plan are identical for every call made for a
+    plan, so they form a prefix that provider prompt caches can reuse; only
+    the last message changes from step to step.
+    """
+    messages: list[BaseMessage] = [SystemMessage(content=get_prompt("executor"))]
+    if plan is not None:
+        messages.append(HumanMessage(content=_format_plan_context(plan)))
+    messages.append(HumanMessage(content=execution_prompt))
+    return messages
+
+
+def build_executor_messages(
+    step: PlanStep, step_results: dict[int, str], plan: Plan | None = None
+) -> list[BaseMessage]:
+    """Build the executor prompt for a plan step.
+
+    Args:
+        step: Plan step to execute
+        step_results: Results of previously completed steps
+        plan: Plan the step belongs to, sent ahead of the step as shared
+              context
+
+    Returns:
+        Messages to send to the executor LLM
+    """
+    previous_context = _format_previous_context(step_results)
+
+    execution_prompt = get_prompt("executor_template").format(
+        previous_context=previous_context,
+        step_number=step.step_number,
+        action=step.action,
+        description=step.description,
+        input_data=step.input_data,
+        expected_output=step.expected_output,
+    )
+    return _executor_messages(execution_prompt, plan)
+
+
+def build_batch_executor_messages(
+    steps: list[PlanStep], step_results: dict[int, str], plan: Plan | None = None
+) -> list[BaseMessage]:
+    """Build a single executor prompt covering several independent plan steps.
+
+    Args:
+        steps: Plan steps to execute together
+        step_results: Results of previously completed steps
+        plan: Plan the steps belong to, sent ahead of them as shared context
+
+    Returns:
+        Messages to send to the executor LLM
+    """
+    rendered_steps = "\n\n".join(
+        f"Step {step.step_number}: {step.action}\n"
+        f"Description: {step.description}\n"
+        f"Input: {step.input_data}\n"
+        f"Expected: {step.expected_output}"
+        for step in steps
+    )
+
+    execution_prompt = get_prompt("executor_batch_template").format(
+        previous_context=_format_previous_context(step_results),
+        steps=rendered_steps,
+    )
+    return _executor_messages(execution_prompt, plan)
+
+
+def memoized_response(steps: list[PlanStep], tool_names: set[str]) -> AIMessage | None:
+    """Issue the tool calls for read-only steps the session memo can answer.
+
+    Args:
+        steps: Steps about to be executed
+        tool_names: Names of the tools bound to the executor
+
+    Returns:
+        An AI message calling each step's tool on its input path, or None
+        unless every step is a memoized read
+    """
+    memo = get_memo()
+    if memo is None:
+        return None
+    tool_calls = []
+    for step in steps:
+        path = step.input_data.strip()
+        if (
+            step.action not in MEMOIZABLE_TOOLS
+            or step.action not in tool_names
+            or not memo.contains(step.action, resolve_path(path))
+        ):
+            return None
+        tool_calls.append(
+            {"name": step.action, "args": {"path": path}, "id": f"memo_{step.step_number}"}
+        )
+    return AIMessage(content="", tool_calls=tool_calls)
+
+
+def select_fusable_steps(steps: list[PlanStep], start: int, max_steps: int) -> list[PlanStep]:
+    """Select the window of consecutive independent steps starting at ``start``.
+
+    Args:
+        steps: All plan steps
+        start: Index of the current step
+        max_steps: Maximum window size
+
+    Returns:
+        Steps to execute together (at least the current step)
+    """
+    window = [steps[start]]
+    if steps[start].action not in FUSABLE_ACTIONS:
+        return window
+
+    for step in steps[start + 1 : start + max_steps]:
+        if step.action not in FUSABLE_ACTIONS:
+            break
+        window.append(step)
+    return window
+
+
+def create_executor_node(
+    llm: BaseChatModel,
+    tools: list,
+    prefetcher: StepPrefetcher | None = None,
+    fuse_steps: int = 1,
+    fallback_llm: BaseChatModel | None = None,
+):
     """Create an executor node that performs plan steps.
 
     Args:
         llm: LangChain ChatModel
         tools: List of tools to bind
+        prefetcher: Optional prefetcher holding speculatively started responses
+        fuse_steps: Maximum number of consecutive independent steps to pack
+                    into one LLM call
+        fallback_llm: Optional stronger model to retry with when the tool
+                      calls produced by ``llm`` fail to parse
 
     Returns:
         Executor node function
     """
     llm_with_tools = llm.bind_tools(tools)
+    tool_names = {getattr(tool, "name", "") for tool in tools}
+    fallback_with_tools = fallback_llm.bind_tools(tools) if fallback_llm is not None else None
 
     def executor_node(state: PlanningAgentState) -> dict:
         """Execute the current step of the plan.
@@ -44,36 +212,54 @@ def create_executor_node(llm: BaseChatModel, tools: list):
 
         current_step = plan.steps[current_idx]
 
-        logger.info(
-            "Executing step",
-            step=current_step.step_number,
-            total=plan.total_steps,
-            action=current_step.action,
-            description=current_step.description[:50],
-        )
+        window = [current_step]
+        if fuse_steps > 1:
+            window = select_fusable_steps(plan.steps, current_idx, fuse_steps)
 
-        # Build context from previous results
-        previous_context = ""
-        if state["step_results"]:
-            previous_context = "Previous results:\n"
-            for idx, result in sorted(state["step_results"].items()):
-                previous_context += f"- Step {idx + 1}: {result[:200]}...\n"
-
-        execution_prompt = EXECUTOR_TEMPLATE.format(
-            previous_context=previous_context,
-            step_number=current_step.step_number,
-            action=current_step.action,
-            description=current_step.description,
-            input_data=current_step.input_data,
-            expected_output=current_step.expected_output,
-        )
+        if len(window) > 1:
+            logger.info(
+                "Executing fused steps",
+                steps=[step.step_number for step in window],
+                total=plan.total_steps,
+            )
+            messages = build_batch_executor_messages(window, state["step_results"], plan)
+            prefetch_key = build_batch_executor_messages(window, state["step_results"])
+        else:
+            logger.info(
+                "Executing step",
+                step=current_step.step_number,
+                total=plan.total_steps,
+                action=current_step.action,
+                description=preview(current_step.description, 50),
+            )
+            messages = build_executor_messages(current_step, state["step_results"], plan)
+            prefetch_key = build_executor_messages(current_step, state["step_results"])
 
-        messages = [
-            SystemMessage(content=EXECUTOR_SYSTEM_PROMPT),
-            HumanMessage(content=execution_prompt),
-        ]
+        response = memoized_response(window, tool_names)
+        if response is not None:
+            logger.debug("Using memoized tool results", step=current_step.step_number)
+        else:
+            # Steps are prefetched while the plan is still streaming, so
+            # their prompts are keyed without it
+            prefetch_id = state.get("prefetch_id")
+            response = prefetcher.pop(prefetch_id, prefetch_key) if prefetcher else None
+            if response is not None:
+                logger.debug("Using prefetched step response", step=current_step.step_number)
+            else:
+                response = llm_with_tools.invoke(messages)
 
-        response = llm_with_tools.invoke(messages)
+        if (
+            fallback_with_tools is not None
+            and isinstance(response, AIMessage)
+            and response.invalid_tool_calls
+        ):
+            logger.warning(
+                "Invalid tool call, retrying with fallback model",
+                step=current_step.step_number,
+                invalid=len(response.invalid_tool_calls),
+            )
+            record_retry("executor_fallback")
+            response = fallback_with_tools.invoke(messages)
 
         # Log tool calls if any
         if isinstance(response, AIMessage) and response.tool_calls:
@@ -81,11 +267,11 @@ def create_executor_node(llm: BaseChatModel, tools: list):
                 logger.info(
                     "Tool called",
                     tool=tool_call["name"],
-                    args=str(tool_call["args"])[:100],
+                    args=preview(tool_call["args"]),
                 )
         else:
             logger.debug("Step completed without tool call")
 
-        return {"messages": [response]}
+        return {"messages": [response], "active_steps": len(window)}
 
     return executor_node
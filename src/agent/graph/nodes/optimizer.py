@@ -0,0 +1,124 @@
+"""Plan optimizer node that removes redundant steps before execution."""
+
+import os
+import re
+from collections.abc import Callable
+from typing import Any
+
+from ...logging import get_logger
+from ...models.plan import Plan, PlanStep
+from ..state import PlanningAgentState
+
+logger = get_logger(__name__)
+
+# Actions whose result only depends on the workspace, not on earlier steps
+READ_ACTIONS = frozenset({"read_file", "list_directory"})
+
+# Steps that only re-check the outcome of the step before them
+_VERIFY_WORDS = re.compile(r"\b(verif\w*|confirm\w*|check\w*|ensure\w*)", re.IGNORECASE)
+
+
+def _target(step: PlanStep) -> str:
+    """Normalize a step's path so equivalent spellings compare equal."""
+    path = step.input_data.strip().strip("'\"`")
+    if step.action == "list_directory" and path in ("", "./"):
+        return "."
+    return os.path.normpath(path) if path else path
+
+
+def _is_verification(step: PlanStep) -> bool:
+    return bool(_VERIFY_WORDS.search(f"{step.description} {step.expected_output}"))
+
+
+def optimize_plan(plan: Plan) -> tuple[Plan, list[str]]:
+    """Remove steps whose result is already known from earlier steps.
+
+    Drops:
+    - A read_file or list_directory repeating an earlier identical read,
+      with no write in between that could change its result
+    - A verification read or listing right after a write to the same file
+      or its directory, whose success the write result already reports
+
+    Kept steps are renumbered from 1.
+
+    Args:
+        plan: Plan to optimize
+
+    Returns:
+        The optimized plan (``plan`` itself if unchanged) and a reason for
+        every removed step
+    """
+    kept: list[PlanStep] = []
+    removed: list[str] = []
+    seen_reads: set[tuple[str, str]] = set()
+
+    for step in plan.steps:
+        target = _target(step)
+        previous = kept[-1] if kept else None
+
+        if step.action in READ_ACTIONS:
+            key = (step.action, target)
+            if key in seen_reads:
+                removed.append(f"step {step.step_number}: repeats {step.action} {target}")
+                continue
+            if (
+                previous is not None
+                and previous.action == "write_file"
+                and _is_verification(step)
+                and (
+                    target == _target(previous)
+                    or (
+                        step.action == "list_directory"
+                        and target == (os.path.dirname(_target(previous)) or ".")
+                    )
+                )
+            ):
+                removed.append(f"step {step.step_number}: verifies the write in the step before")
+                continue
+            seen_reads.add(key)
+        elif step.action == "write_file":
+            # A write changes the file and its directory listing
+            directory = os.path.dirname(target) or "."
+            seen_reads -= {("read_file", target), ("list_directory", directory)}
+
+        kept.append(step)
+
+    if not removed:
+        return plan, []
+    steps = [step.model_copy(update={"step_number": i + 1}) for i, step in enumerate(kept)]
+    return plan.model_copy(update={"steps": steps}), removed
+
+
+def create_optimizer_node() -> Callable[[PlanningAgentState], dict[str, Any]]:
+    """Create a node that removes redundant steps from new plans.
+
+    Returns:
+        Optimizer node function
+    """
+
+    def optimizer_node(state: PlanningAgentState) -> dict[str, Any]:
+        """Optimize the plan the planner or replanner just produced.
+
+        Args:
+            state: Current planning agent state
+
+        Returns:
+            Updated plan, or no update if nothing was removed
+        """
+        plan = state.get("plan")
+        if plan is None:
+            return {}
+
+        optimized, removed = optimize_plan(plan)
+        if not removed:
+            return {}
+
+        logger.info(
+            "Plan optimized",
+            removed=len(removed),
+            total_steps=optimized.total_steps,
+            reasons=removed,
+        )
+        return {"plan": optimized}
+
+    return optimizer_node
@@ -1,23 +1,191 @@
 """Planner node for generating execution plans."""
 
+from collections.abc import Callable, Collection
+from typing import Any
+
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.utils.json import parse_partial_json
+from pydantic import ValidationError
 
-from ...logging import get_logger
-from ...models.plan import Plan
-from ...prompts import get_prompt
+from ...logging import debug_enabled, get_logger, preview
+from ...metrics import record_retry
+from ...models.plan import Plan, PlanStep
+from ...models.repair import VALID_ACTIONS, force_valid, repair_plan
+from ...prompts import get_prompt, prompt_attributes
+from ...tools.file import get_workspace
+from ...tools.manifest import DEFAULT_BUDGET, workspace_context
 from ..state import PlanningAgentState
 
 logger = get_logger(__name__)
 
-PLANNER_SYSTEM_PROMPT = get_prompt("planner")
+# PLANNER_SYSTEM_PROMPT, loaded on first access
+__getattr__ = prompt_attributes(__name__, {"PLANNER_SYSTEM_PROMPT": "planner"})
+
+MAX_REPAIR_CALLS = 1  # LLM calls spent on plan problems local repair cannot fix
+
+
+def _plan_output(output: Any) -> Any:
+    """Return the plan from structured output, falling back to the raw tool call.
+
+    ``with_structured_output(Plan, include_raw=True)`` gives the raw message
+    when the arguments do not validate as a Plan; the arguments are still
+    worth repairing.
+    """
+    if not (isinstance(output, dict) and "raw" in output):
+        return output
+    if output.get("parsed") is not None:
+        return output["parsed"]
+    raw = output["raw"]
+    for tool_call in getattr(raw, "tool_calls", None) or []:
+        return tool_call["args"]
+    for tool_call in getattr(raw, "invalid_tool_calls", None) or []:
+        return tool_call.get("args")
+    return getattr(raw, "content", None)
+
+
+def resolve_plan(
+    llm: BaseChatModel,
+    messages: list[BaseMessage],
+    output: Any,
+    goal: str,
+    actions: Collection[str] = VALID_ACTIONS,
+    allow_empty: bool = False,
+) -> Plan:
+    """Validate LLM plan output, repairing it locally where possible.
+
+    Only problems local repair cannot fix (unknown actions, too many steps,
+    no steps, output that is not a plan) cost another LLM call, which is
+    shown the repaired plan and asked to fix just those problems. If they
+    remain, the unrecognized parts are dropped.
+
+    Args:
+        llm: LangChain ChatModel, used for repair calls
+        messages: Prompt messages that produced the output
+        output: Plan, plan dict, JSON text or include_raw structured output
+        goal: The user's request, used when the plan has no goal
+        actions: Actions steps may use
+        allow_empty: Accept a plan without steps
+
+    Returns:
+        A valid plan
+
+    Raises:
+        ValueError: If the LLM produced nothing usable as a plan
+    """
+    repair = repair_plan(_plan_output(output), goal, actions, allow_empty=allow_empty)
+    for _ in range(MAX_REPAIR_CALLS):
+        if repair.fixes:
+            logger.info("Plan repaired locally", fixes=repair.fixes)
+        if repair.ok:
+            break
+        logger.warning("Asking LLM to repair plan", problems=repair.problems)
+        record_retry("plan_repair")
+        plan_json = repair.plan.model_dump_json(indent=2) if repair.plan else "(none)"
+        prompt = get_prompt("plan_repair_template").format(
+            problems="\n".join(f"- {problem}" for problem in repair.problems), plan=plan_json
+        )
+        repair_llm = llm.with_structured_output(Plan, include_raw=True)
+        output = repair_llm.invoke([*messages, HumanMessage(content=prompt)])
+        repair = repair_plan(_plan_output(output), goal, actions, allow_empty=allow_empty)
+    if repair.ok and repair.plan is not None:
+        return repair.plan
+
+    plan = force_valid(repair, actions)
+    if plan is None or not (plan.steps or allow_empty):
+        raise ValueError(f"LLM did not produce a usable plan: {'; '.join(repair.problems)}")
+    logger.warning("Dropped unrepairable plan parts", problems=repair.problems)
+    return plan
+
+
+def _stream_plan(
+    llm: BaseChatModel,
+    messages: list[BaseMessage],
+    on_step: Callable[[int, PlanStep], None] | None,
+    goal: str = "",
+    actions: Collection[str] = VALID_ACTIONS,
+) -> Plan:
+    """Stream a plan from the LLM, reporting each step once it is complete.
 
+    The plan is requested as a forced ``Plan`` tool call and its JSON arguments
+    are parsed incrementally. A step is complete as soon as the next step (or
+    the end of the arguments) has been received. Models that do not stream
+    tool call chunks (a stream that falls back to ``invoke``, for instance)
+    deliver complete tool calls instead, which are used as they are.
 
-def create_planner_node(llm: BaseChatModel):
+    Args:
+        llm: LangChain ChatModel
+        messages: Planner prompt messages
+        on_step: Callback receiving (step index, step) for each completed step
+        goal: The user's request, used when repairing the plan
+        actions: Actions steps may use
+
+    Returns:
+        The complete, validated plan
+    """
+    plan_llm = llm.bind_tools([Plan], tool_choice=Plan.__name__)
+
+    buffer = ""
+    complete_args: Any = None  # Arguments of a tool call that arrived whole
+    emitted = 0
+
+    def emit(index: int, raw_step: object) -> None:
+        if on_step is None:
+            return
+        try:
+            step = PlanStep.model_validate(raw_step)
+        except ValidationError:
+            logger.debug("Skipping unparseable streamed step", index=index)
+            return
+        on_step(index, step)
+
+    for chunk in plan_llm.stream(messages):
+        tool_chunks = getattr(chunk, "tool_call_chunks", None) or []
+        for tool_chunk in tool_chunks:
+            buffer += tool_chunk.get("args") or ""
+        if not tool_chunks:
+            for tool_call in getattr(chunk, "tool_calls", None) or []:
+                complete_args = tool_call["args"]
+                break
+        if not buffer:
+            continue
+
+        partial = parse_partial_json(buffer)
+        steps = partial.get("steps") if isinstance(partial, dict) else None
+        if not isinstance(steps, list):
+            continue
+
+        # Every step except the last one received is already closed
+        while emitted < len(steps) - 1:
+            emit(emitted, steps[emitted])
+            emitted += 1
+
+    output = buffer if buffer or complete_args is None else complete_args
+    plan = resolve_plan(llm, messages, output, goal, actions)
+    for index in range(emitted, plan.total_steps):
+        emit(index, plan.steps[index].model_dump())
+
+    return plan
+
+
+def create_planner_node(
+    llm: BaseChatModel,
+    stream: bool = False,
+    on_step: Callable[[int, PlanStep], None] | None = None,
+    manifest_budget: int = DEFAULT_BUDGET,
+    actions: Collection[str] = VALID_ACTIONS,
+):
     """Create a planner node that generates structured plans.
 
     Args:
         llm: LangChain ChatModel
+        stream: Stream the plan and report steps before the plan is complete
+        on_step: Callback receiving (step index, step) as steps are parsed in
+                 streaming mode
+        manifest_budget: Characters of workspace manifest to include in the
+                         prompt; 0 leaves it out
+        actions: Actions plan steps may use; other actions are repaired or
+                 sent back to the LLM
 
     Returns:
         Planner node function
@@ -43,31 +211,43 @@ def create_planner_node(llm: BaseChatModel):
             logger.warning("No user request found in messages")
             return {}
 
-        logger.info("Planning started", request=user_request[:100])
-
-        # Generate plan using structured output
-        planner_llm = llm.with_structured_output(Plan)
+        logger.info("Planning started", request=preview(user_request), stream=stream)
 
-        messages = [
-            SystemMessage(content=PLANNER_SYSTEM_PROMPT),
-            HumanMessage(content=f"Create a plan for: {user_request}"),
-        ]
+        session_context = state.get("session_context")
+        if session_context:
+            request = get_prompt("planner_delta_template").format(
+                session_context=session_context, request=user_request
+            )
+        else:
+            request = f"Create a plan for: {user_request}"
+        messages: list[BaseMessage] = [SystemMessage(content=get_prompt("planner"))]
+        manifest = workspace_context(get_workspace(), manifest_budget)
+        if manifest:
+            messages.append(HumanMessage(content=manifest))
+        messages.append(HumanMessage(content=request))
 
-        plan = planner_llm.invoke(messages)
+        if stream:
+            plan = _stream_plan(llm, messages, on_step, str(user_request), actions)
+        else:
+            # Generate plan using structured output, keeping the raw tool call for repair
+            planner_llm = llm.with_structured_output(Plan, include_raw=True)
+            output = planner_llm.invoke(messages)
+            plan = resolve_plan(llm, messages, output, str(user_request), actions)
 
         logger.info(
             "Plan created",
-            goal=plan.goal[:50],
-            reasoning=plan.reasoning[:100],
+            goal=preview(plan.goal, 50),
+            reasoning=preview(plan.reasoning),
             total_steps=plan.total_steps,
         )
-        for step in plan.steps:
-            logger.debug(
-                "Plan step",
-                step=step.step_number,
-                action=step.action,
-                description=step.description[:50],
-            )
+        if debug_enabled(__name__):
+            for step in plan.steps:
+                logger.debug(
+                    "Plan step",
+                    step=step.step_number,
+                    action=step.action,
+                    description=preview(step.description, 50),
+                )
 
         return {
             "plan": plan,
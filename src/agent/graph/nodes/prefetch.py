@@ -0,0 +1,121 @@
+"""Speculative execution of plan steps while the planner is still streaming."""
+
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+
+from ...logging import get_logger
+from ...metrics import record_cache
+
+logger = get_logger(__name__)
+
+MAX_WORKERS = 8  # Speculative calls running at once, across all prefetchers
+MAX_PENDING = 64  # Prefetches kept per prefetcher for runs that never pick theirs up
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Return the thread pool shared by all prefetchers."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="prefetch")
+        return _pool
+
+
+def _messages_key(messages: list[BaseMessage]) -> tuple[tuple[str, str], ...]:
+    """Build a hashable key identifying an executor prompt."""
+    return tuple((msg.type, str(msg.content)) for msg in messages)
+
+
+class StepPrefetcher:
+    """Starts executor LLM calls early and hands the responses to the executor.
+
+    The planner submits the executor prompt for a step as soon as that step is
+    parsed from the streamed plan. When the executor later builds the exact same
+    prompt it picks up the in-flight response instead of issuing a new call.
+
+    A prefetcher is shared by every run of a graph, so each prefetch is kept
+    under the ID of the run that submitted it, one per run.
+    """
+
+    def __init__(self, llm_with_tools: Runnable[Any, Any], max_workers: int = 2):
+        """Initialize the prefetcher.
+
+        Args:
+            llm_with_tools: LLM with tools bound, as used by the executor
+            max_workers: Maximum number of concurrent speculative calls
+        """
+        self._llm = llm_with_tools
+        # Calls run on the shared pool; this caps how many are this graph's
+        self._slots = threading.BoundedSemaphore(max_workers)
+        # run ID -> (prompt key, response)
+        self._pending: dict[str, tuple[tuple[tuple[str, str], ...], Future[Any]]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, run_id: str, messages: list[BaseMessage]) -> None:
+        """Start the LLM call for an executor prompt in the background.
+
+        Replaces the run's earlier prefetch, if any.
+
+        Args:
+            run_id: ID of the run the prompt belongs to
+            messages: Executor prompt messages
+        """
+        key = _messages_key(messages)
+        with self._lock:
+            previous = self._pending.pop(run_id, None)
+            if previous is not None and previous[0] == key:
+                self._pending[run_id] = previous
+                return
+            ctx = contextvars.copy_context()
+            self._pending[run_id] = (key, _get_pool().submit(ctx.run, self._invoke, messages))
+            dropped = [previous[1]] if previous is not None else []
+            while len(self._pending) > MAX_PENDING:
+                dropped.append(self._pending.pop(next(iter(self._pending)))[1])
+            pending = len(self._pending)
+        for future in dropped:
+            future.cancel()
+        logger.debug("Step prefetch started", pending=pending)
+
+    def _invoke(self, messages: list[BaseMessage]) -> Any:
+        with self._slots:
+            return self._llm.invoke(messages)
+
+    def pop(self, run_id: str | None, messages: list[BaseMessage]) -> Any | None:
+        """Return the run's prefetched response if it was for this prompt.
+
+        Only calls for which the run had a prefetch count as prefetch cache
+        hits or misses; the prefetch is used up either way.
+
+        Args:
+            run_id: ID of the run asking
+            messages: Executor prompt messages
+
+        Returns:
+            The LLM response, or None if the run prefetched nothing, prefetched
+            a different prompt or the speculative call failed
+        """
+        with self._lock:
+            entry = self._pending.pop(run_id, None) if run_id is not None else None
+        if entry is None:
+            return None
+        key, future = entry
+        if key != _messages_key(messages):
+            future.cancel()
+            record_cache("prefetch", hit=False)
+            return None
+        try:
+            response = future.result()
+        except Exception as e:
+            logger.warning("Step prefetch failed", error=str(e))
+            record_cache("prefetch", hit=False)
+            return None
+        record_cache("prefetch", hit=True)
+        return response
@@ -1,31 +1,46 @@
 """Replanner node for adjusting plans based on execution results."""
 
-from typing import cast
+from collections.abc import Collection
 
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 
-from ...logging import get_logger
+from ...logging import get_logger, preview
+from ...metrics import record_replan
 from ...models.plan import Plan
-from ...prompts import get_prompt
+from ...models.repair import VALID_ACTIONS
+from ...prompts import get_prompt, prompt_attributes
+from ...tools.file import get_workspace
+from ...tools.manifest import DEFAULT_BUDGET, workspace_context
 from ..state import PlanningAgentState
+from .planner import resolve_plan
 
 logger = get_logger(__name__)
 
-REPLANNER_SYSTEM_PROMPT = get_prompt("replanner")
-REPLANNER_TEMPLATE = get_prompt("replanner_template")
+# REPLANNER_* prompt constants, loaded on first access
+__getattr__ = prompt_attributes(
+    __name__,
+    {"REPLANNER_SYSTEM_PROMPT": "replanner", "REPLANNER_TEMPLATE": "replanner_template"},
+)
 
 
-def create_replanner_node(llm: BaseChatModel):
+def create_replanner_node(
+    llm: BaseChatModel,
+    manifest_budget: int = DEFAULT_BUDGET,
+    actions: Collection[str] = VALID_ACTIONS,
+):
     """Create a replanner node that adjusts plans.
 
     Args:
         llm: LangChain ChatModel
+        manifest_budget: Characters of workspace manifest to include in the
+                         prompt; 0 leaves it out
+        actions: Actions plan steps may use
 
     Returns:
         Replanner node function
     """
-    replanner_llm = llm.with_structured_output(Plan)
+    replanner_llm = llm.with_structured_output(Plan, include_raw=True)
 
     def replanner_node(state: PlanningAgentState) -> dict:
         """Generate a new plan based on execution progress.
@@ -46,6 +61,7 @@ def create_replanner_node(llm: BaseChatModel):
             replan_count=replan_count,
             completed_steps=len(state["step_results"]),
         )
+        record_replan()
 
         # Summarize results
         results_summary = "\n".join(
@@ -53,23 +69,28 @@ def create_replanner_node(llm: BaseChatModel):
             for idx, result in sorted(state["step_results"].items())
         )
 
-        replan_prompt = REPLANNER_TEMPLATE.format(
+        replan_prompt = get_prompt("replanner_template").format(
             goal=plan.goal,
             results_summary=results_summary,
             current_step=state["current_step_index"],
             total_steps=plan.total_steps,
         )
 
-        messages = [
-            SystemMessage(content=REPLANNER_SYSTEM_PROMPT),
-            HumanMessage(content=replan_prompt),
-        ]
+        # The manifest reflects the files the completed steps wrote
+        messages: list[BaseMessage] = [SystemMessage(content=get_prompt("replanner"))]
+        manifest = workspace_context(get_workspace(), manifest_budget)
+        if manifest:
+            messages.append(HumanMessage(content=manifest))
+        messages.append(HumanMessage(content=replan_prompt))
 
-        new_plan = cast(Plan, replanner_llm.invoke(messages))
+        # An empty replan means the goal needs no more steps
+        new_plan = resolve_plan(
+            llm, messages, replanner_llm.invoke(messages), plan.goal, actions, allow_empty=True
+        )
 
         logger.info(
             "New plan created",
-            goal=new_plan.goal[:50],
+            goal=preview(new_plan.goal, 50),
             new_steps=new_plan.total_steps,
         )
 
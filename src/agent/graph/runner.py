@@ -0,0 +1,178 @@
+"""Lean plan-and-execute runner that bypasses the LangGraph engine."""
+
+import asyncio
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import BaseTool
+from langgraph.errors import GraphRecursionError
+from langgraph.graph.message import add_messages
+
+from ..logging import get_logger
+from .workflow import create_planning_nodes, route_after_executor, route_after_planner
+
+logger = get_logger(__name__)
+
+DEFAULT_RECURSION_LIMIT = 25
+
+# Next node after each node, mirroring create_planning_agent_graph's edges
+_EXECUTOR_ROUTES = {
+    "tools": "tools",
+    "next_step": "executor",
+    "replanner": "replanner",
+    "end": None,
+}
+_PLANNER_ROUTES = {"executor": "optimizer", "end": None}
+
+
+class LeanPlanRunner:
+    """Runs the planning workflow as a plain loop over the node functions.
+
+    Uses the same planner, optimizer, executor, result processor and
+    replanner as ``create_planning_agent_graph`` and returns the same
+    ``PlanningAgentState``, but skips LangGraph's per-superstep channel
+    bookkeeping, checkpoint plumbing and callback dispatch. Suited to straight
+    sequential plans where the graph's features (interrupts, checkpointing,
+    branching) are unused.
+
+    Provides ``invoke``/``stream``/``astream`` with the 'updates' and
+    'values' stream modes; token streaming ('messages') is not supported.
+    Callbacks in ``config`` see each node as a chain run carrying the same
+    ``langgraph_node`` metadata the graph would set.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        tools: list[BaseTool],
+        recursion_limit: int = DEFAULT_RECURSION_LIMIT,
+        **node_options: Any,
+    ):
+        """Initialize the runner.
+
+        Args:
+            llm: LangChain ChatModel
+            tools: List of tools to bind
+            recursion_limit: Maximum number of node executions per run,
+                             matching LangGraph's superstep limit
+            **node_options: Extra arguments for ``create_planning_nodes``
+        """
+        self.nodes = create_planning_nodes(llm, tools, **node_options)
+        self.recursion_limit = recursion_limit
+
+    def _next_node(self, node: str, state: dict[str, Any]) -> str | None:
+        if node in ("planner", "replanner"):
+            return _PLANNER_ROUTES[route_after_planner(state)]  # type: ignore[arg-type]
+        if node == "executor":
+            return _EXECUTOR_ROUTES[route_after_executor(state)]  # type: ignore[arg-type]
+        if node == "tools":
+            return "process_result"
+        return "executor"
+
+    def _call_node(
+        self, node: str, state: dict[str, Any], config: RunnableConfig | None
+    ) -> dict[str, Any]:
+        """Run one node, as a traced runnable only when callbacks are configured."""
+        fn = self.nodes[node]
+        if not config or not config.get("callbacks"):
+            return fn(state)  # type: ignore[no-any-return]
+        node_config: RunnableConfig = {
+            **config,
+            "run_name": node,
+            "metadata": {**config.get("metadata", {}), "langgraph_node": node},
+        }
+        return RunnableLambda(fn, name=node).invoke(state, node_config)  # type: ignore[no-any-return]
+
+    def _run(
+        self, state: dict[str, Any], config: RunnableConfig | None = None
+    ) -> Iterator[tuple[str, dict[str, Any], dict[str, Any]]]:
+        """Execute the workflow, yielding (node, update, state) after each node."""
+        state = dict(state)
+        node: str | None = "planner"
+        steps = 0
+        while node is not None:
+            if steps >= self.recursion_limit:
+                raise GraphRecursionError(
+                    f"Recursion limit of {self.recursion_limit} reached without hitting a stop "
+                    "condition."
+                )
+            steps += 1
+
+            update = self._call_node(node, state, config)
+
+            for key, value in (update or {}).items():
+                if key == "messages":
+                    state["messages"] = add_messages(state.get("messages", []), value)
+                else:
+                    state[key] = value
+
+            yield node, update, state
+            node = self._next_node(node, state)
+
+    def invoke(self, input: dict[str, Any], config: RunnableConfig | None = None) -> dict[str, Any]:
+        """Run the workflow to completion.
+
+        Args:
+            input: Initial PlanningAgentState
+            config: Runnable config; only callbacks and metadata are used
+
+        Returns:
+            Final state
+        """
+        final_state = input
+        for _, _, state in self._run(input, config):
+            final_state = state
+        return final_state
+
+    def stream(
+        self,
+        input: dict[str, Any],
+        config: RunnableConfig | None = None,
+        stream_mode: Any = "updates",
+    ) -> Iterator[Any]:
+        """Run the workflow, yielding output like ``CompiledStateGraph.stream``.
+
+        Args:
+            input: Initial PlanningAgentState
+            config: Runnable config; only callbacks and metadata are used
+            stream_mode: 'updates', 'values', or a list of modes
+
+        Yields:
+            Stream items; ``(mode, payload)`` tuples when a list is given
+        """
+        modes = [stream_mode] if isinstance(stream_mode, str) else list(stream_mode)
+        multiple = not isinstance(stream_mode, str)
+
+        def emit(mode: str, payload: Any) -> Any:
+            return (mode, payload) if multiple else payload
+
+        if "values" in modes:
+            yield emit("values", dict(input))
+        for node, update, state in self._run(input, config):
+            if "updates" in modes:
+                yield emit("updates", {node: update})
+            if "values" in modes:
+                yield emit("values", dict(state))
+
+    async def astream(
+        self,
+        input: dict[str, Any],
+        config: RunnableConfig | None = None,
+        stream_mode: Any = "updates",
+    ) -> AsyncIterator[Any]:
+        """Async variant of ``stream``; nodes run in a worker thread."""
+        iterator = self.stream(input, config, stream_mode)
+        done = object()
+        while True:
+            item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                return
+            yield item
+
+    async def ainvoke(
+        self, input: dict[str, Any], config: RunnableConfig | None = None
+    ) -> dict[str, Any]:
+        """Async variant of ``invoke``; nodes run in a worker thread."""
+        return await asyncio.to_thread(self.invoke, input, config)
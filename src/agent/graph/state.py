@@ -23,3 +23,6 @@ class PlanningAgentState(TypedDict):
     current_step_index: int
     step_results: dict[int, str]
     replans_count: int
+    active_steps: int  # Plan steps covered by the last executor response
+    session_context: str  # Earlier turns of a persistent session, for the planner
+    prefetch_id: str  # Key of the step response prefetched while planning
@@ -1,26 +1,44 @@
 """LangGraph workflow definitions."""
 
+import os
+import uuid
+from collections.abc import Callable
+from contextvars import ContextVar
 from typing import Any
 
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import AIMessage, SystemMessage, ToolCall, ToolMessage
 from langchain_core.runnables import Runnable
 from langchain_core.tools import BaseTool
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
-from langgraph.prebuilt import ToolNode, tools_condition
-
-from ..logging import get_logger
-from ..prompts import get_prompt
-from .nodes import create_executor_node, create_planner_node, create_replanner_node
+from langgraph.prebuilt import tools_condition
+
+from ..logging import get_logger, preview
+from ..models.plan import PlanStep
+from ..models.repair import plan_actions
+from ..prompts import get_prompt, prompt_attributes
+from ..tools.engine import ToolEngine, ToolLimits
+from .nodes import (
+    create_executor_node,
+    create_optimizer_node,
+    create_planner_node,
+    create_replanner_node,
+)
+from .nodes.executor import build_executor_messages
+from .nodes.prefetch import StepPrefetcher
 from .state import AgentState, PlanningAgentState
 
 logger = get_logger(__name__)
 
-SYSTEM_PROMPT = get_prompt("system")
+# SYSTEM_PROMPT, loaded on first access
+__getattr__ = prompt_attributes(__name__, {"SYSTEM_PROMPT": "system"})
 
 MAX_REPLANS = 3
 
+# Prefetch ID of the run whose plan is streaming in the current context
+_prefetch_id: ContextVar[str] = ContextVar("prefetch_id", default="")
+
 
 def create_agent_node(llm_with_tools: Runnable[Any, Any]) -> Any:
     """Create the agent node function.
@@ -33,19 +51,24 @@ def create_agent_node(llm_with_tools: Runnable[Any, Any]) -> Any:
     """
 
     def agent_node(state: AgentState) -> dict[str, Any]:
-        messages = [SystemMessage(content=SYSTEM_PROMPT)] + state["messages"]
+        messages = [SystemMessage(content=get_prompt("system"))] + state["messages"]
         response = llm_with_tools.invoke(messages)
         return {"messages": [response]}
 
     return agent_node
 
 
-def create_agent_graph(llm: BaseChatModel, tools: list[BaseTool]) -> CompiledStateGraph[Any]:
+def create_agent_graph(
+    llm: BaseChatModel,
+    tools: list[BaseTool],
+    tool_limits: dict[str, ToolLimits] | None = None,
+) -> CompiledStateGraph[Any]:
     """Create and compile the simple agent graph.
 
     Args:
         llm: LangChain ChatModel
         tools: List of tools to bind
+        tool_limits: Per-tool timeouts, concurrency caps and output limits
 
     Returns:
         Compiled StateGraph
@@ -54,7 +77,7 @@ def create_agent_graph(llm: BaseChatModel, tools: list[BaseTool]) -> CompiledSta
 
     workflow = StateGraph(AgentState)
     workflow.add_node("agent", create_agent_node(llm_with_tools))
-    workflow.add_node("tools", ToolNode(tools))
+    workflow.add_node("tools", ToolEngine(tools, tool_limits).as_node())
 
     workflow.add_edge(START, "agent")
     workflow.add_conditional_edges("agent", tools_condition)
@@ -63,7 +86,7 @@ def create_agent_graph(llm: BaseChatModel, tools: list[BaseTool]) -> CompiledSta
     return workflow.compile()
 
 
-def _route_after_planner(state: PlanningAgentState) -> str:
+def route_after_planner(state: PlanningAgentState) -> str:
     """Route after planner node.
 
     Args:
@@ -78,7 +101,7 @@ def _route_after_planner(state: PlanningAgentState) -> str:
     return "end"
 
 
-def _route_after_executor(state: PlanningAgentState) -> str:
+def route_after_executor(state: PlanningAgentState) -> str:
     """Route after executor node.
 
     Args:
@@ -108,6 +131,73 @@ def _route_after_executor(state: PlanningAgentState) -> str:
     return "end"
 
 
+def _trailing_tool_messages(messages: list[Any]) -> tuple[AIMessage | None, list[ToolMessage]]:
+    """Split off the tool messages produced for the last AI message.
+
+    Args:
+        messages: Conversation messages
+
+    Returns:
+        The AI message that issued the tool calls and its tool results
+    """
+    tool_messages: list[ToolMessage] = []
+    for msg in reversed(messages):
+        if isinstance(msg, ToolMessage):
+            tool_messages.append(msg)
+            continue
+        if isinstance(msg, AIMessage):
+            return msg, list(reversed(tool_messages))
+        break
+    return None, list(reversed(tool_messages))
+
+
+def _step_key(action: str, path: Any) -> tuple[str, str] | None:
+    if not isinstance(path, str) or not path.strip():
+        return None
+    return action, os.path.normpath(path.strip())
+
+
+def _match_tool_calls(window: list[PlanStep | None], tool_calls: list[ToolCall]) -> list[int]:
+    """Assign each tool call of a fused execution to a step of its window.
+
+    A call belongs to the step with its action and path. When that match is
+    ambiguous (no such step, or several), the call takes the step at its own
+    position, or else the first step still without a call. Calls left over
+    once every step has one repeat a step's work and are added to it.
+
+    Args:
+        window: The fused steps, None where the step is not known
+        tool_calls: Calls of the executor's response, in order
+
+    Returns:
+        The window position of the step each call belongs to
+    """
+    keys = [_step_key(step.action, step.input_data) if step else None for step in window]
+    matches = [
+        [pos for pos, key in enumerate(keys) if key is not None and key == call_key]
+        for call_key in (_step_key(call["name"], call["args"].get("path")) for call in tool_calls)
+    ]
+    assigned: list[int | None] = [None] * len(tool_calls)
+    taken: set[int] = set()
+    for index, found in enumerate(matches):
+        if len(found) == 1 and found[0] not in taken:
+            assigned[index] = found[0]
+            taken.add(found[0])
+    for index, found in enumerate(matches):
+        if assigned[index] is not None:
+            continue
+        candidates = [pos for pos in found or range(len(window)) if pos not in taken]
+        if index in candidates:
+            position = index
+        elif candidates:
+            position = candidates[0]
+        else:
+            position = found[0] if found else len(window) - 1
+        assigned[index] = position
+        taken.add(position)
+    return [position for position in assigned if position is not None]
+
+
 def _create_result_processor():
     """Create a node to process tool results and advance step.
 
@@ -118,6 +208,10 @@ def _create_result_processor():
     def process_result(state: PlanningAgentState) -> dict:
         """Process tool execution result and advance to next step.
 
+        For fused executions every tool call is attributed to its own step,
+        see ``_match_tool_calls``; the index advances past the steps at the
+        start of the window that got a result.
+
         Args:
             state: Current planning agent state
 
@@ -125,59 +219,202 @@ def _create_result_processor():
             Updated state with new step_results and incremented step index
         """
         current_idx = state["current_step_index"]
-        last_msg = state["messages"][-1]
-
-        result_content = str(last_msg.content)
-        logger.info(
-            "Step result processed",
-            step=current_idx + 1,
-            result_preview=result_content[:100],
-        )
-
+        active_steps = state.get("active_steps") or 1
         new_results = dict(state.get("step_results", {}))
-        new_results[current_idx] = result_content
 
+        ai_msg, tool_messages = _trailing_tool_messages(state["messages"])
+        if active_steps == 1 or ai_msg is None:
+            last_msg = state["messages"][-1]
+            result_content = str(last_msg.content)
+            logger.info(
+                "Step result processed",
+                step=current_idx + 1,
+                result_preview=preview(result_content),
+            )
+            new_results[current_idx] = result_content
+            return {
+                "step_results": new_results,
+                "current_step_index": current_idx + 1,
+            }
+
+        results_by_id = {msg.tool_call_id: str(msg.content) for msg in tool_messages}
+        plan = state.get("plan")
+        steps: list[PlanStep | None] = [None] * active_steps
+        if plan is not None:
+            steps = [*plan.steps[current_idx : current_idx + active_steps]]
+            steps += [None] * (active_steps - len(steps))
+        by_step: dict[int, list[str]] = {}
+        for tool_call, position in zip(
+            ai_msg.tool_calls, _match_tool_calls(steps, ai_msg.tool_calls), strict=True
+        ):
+            by_step.setdefault(position, []).append(results_by_id.get(tool_call["id"] or "", ""))
+        for position, results in sorted(by_step.items()):
+            result_content = "\n".join(results)
+            new_results[current_idx + position] = result_content
+            logger.info(
+                "Step result processed",
+                step=current_idx + position + 1,
+                result_preview=preview(result_content),
+            )
+
+        completed = 0
+        while completed in by_step:
+            completed += 1
         return {
             "step_results": new_results,
-            "current_step_index": current_idx + 1,
+            "current_step_index": current_idx + completed,
         }
 
     return process_result
 
 
+def _with_prefetch_id(
+    planner_node: Callable[[PlanningAgentState], dict[str, Any]],
+) -> Callable[[PlanningAgentState], dict[str, Any]]:
+    """Give each planner call a new prefetch ID, returned in the state.
+
+    The prefetcher is shared by every run of the graph; the executor uses the
+    ID to pick up only the response its own run prefetched.
+    """
+
+    def planner_with_prefetch(state: PlanningAgentState) -> dict[str, Any]:
+        prefetch_id = uuid.uuid4().hex
+        reset = _prefetch_id.set(prefetch_id)
+        try:
+            update = planner_node(state)
+        finally:
+            _prefetch_id.reset(reset)
+        return {**update, "prefetch_id": prefetch_id} if update else update
+
+    return planner_with_prefetch
+
+
+def create_planning_nodes(
+    llm: BaseChatModel,
+    tools: list[BaseTool],
+    stream_plan: bool = False,
+    fuse_steps: int = 1,
+    executor_llm: BaseChatModel | None = None,
+    replanner_llm: BaseChatModel | None = None,
+    executor_fallback_llm: BaseChatModel | None = None,
+    tool_limits: dict[str, ToolLimits] | None = None,
+) -> dict[str, Any]:
+    """Create the plan-and-execute node functions.
+
+    Shared by the LangGraph workflow and the lean runner so both engines
+    run identical planner, executor, tool and replanner logic.
+
+    Args:
+        llm: LangChain ChatModel used by the planner, and by the other nodes
+             unless they are given their own model
+        tools: List of tools to bind
+        stream_plan: Stream the plan and start executing step 1 while the
+                     remaining steps are still being generated
+        fuse_steps: Maximum number of consecutive independent steps the
+                    executor may run in a single LLM call
+        executor_llm: Optional model for the executor node
+        replanner_llm: Optional model for the replanner node
+        executor_fallback_llm: Optional model the executor retries with when
+                               its tool calls fail to parse
+        tool_limits: Per-tool timeouts, concurrency caps and output limits
+
+    Returns:
+        Node functions keyed by node name
+    """
+    executor_llm = executor_llm or llm
+    replanner_llm = replanner_llm or llm
+    actions = plan_actions([tool.name for tool in tools])
+
+    prefetcher: StepPrefetcher | None = None
+    on_step = None
+    if stream_plan:
+        prefetcher = StepPrefetcher(executor_llm.bind_tools(tools))
+
+        def on_step(index: int, step: Any) -> None:
+            # Only the first step has no dependency on earlier results
+            if index == 0:
+                prefetcher.submit(_prefetch_id.get(), build_executor_messages(step, {}))
+
+    planner = create_planner_node(llm, stream=stream_plan, on_step=on_step, actions=actions)
+    return {
+        "planner": _with_prefetch_id(planner) if prefetcher is not None else planner,
+        "optimizer": create_optimizer_node(),
+        "executor": create_executor_node(
+            executor_llm,
+            tools,
+            prefetcher=prefetcher,
+            fuse_steps=fuse_steps,
+            fallback_llm=executor_fallback_llm,
+        ),
+        "tools": ToolEngine(tools, tool_limits).as_node(),
+        "process_result": _create_result_processor(),
+        "replanner": create_replanner_node(replanner_llm, actions=actions),
+    }
+
+
 def create_planning_agent_graph(
-    llm: BaseChatModel, tools: list[BaseTool]
+    llm: BaseChatModel,
+    tools: list[BaseTool],
+    stream_plan: bool = False,
+    fuse_steps: int = 1,
+    executor_llm: BaseChatModel | None = None,
+    replanner_llm: BaseChatModel | None = None,
+    executor_fallback_llm: BaseChatModel | None = None,
+    tool_limits: dict[str, ToolLimits] | None = None,
 ) -> CompiledStateGraph[Any]:
     """Create and compile the plan-and-execute agent graph (Phase 2).
 
     Args:
-        llm: LangChain ChatModel
+        llm: LangChain ChatModel used by the planner, and by the other nodes
+             unless they are given their own model
         tools: List of tools to bind
+        stream_plan: Stream the plan and start executing step 1 while the
+                     remaining steps are still being generated
+        fuse_steps: Maximum number of consecutive independent steps the
+                    executor may run in a single LLM call
+        executor_llm: Optional model for the executor node
+        replanner_llm: Optional model for the replanner node
+        executor_fallback_llm: Optional model the executor retries with when
+                               its tool calls fail to parse
+        tool_limits: Per-tool timeouts, concurrency caps and output limits
 
     Returns:
         Compiled StateGraph
     """
+    nodes = create_planning_nodes(
+        llm,
+        tools,
+        stream_plan=stream_plan,
+        fuse_steps=fuse_steps,
+        executor_llm=executor_llm,
+        replanner_llm=replanner_llm,
+        executor_fallback_llm=executor_fallback_llm,
+        tool_limits=tool_limits,
+    )
+
     workflow = StateGraph(PlanningAgentState)
 
     # Add nodes
-    workflow.add_node("planner", create_planner_node(llm))
-    workflow.add_node("executor", create_executor_node(llm, tools))
-    workflow.add_node("tools", ToolNode(tools))
-    workflow.add_node("process_result", _create_result_processor())
-    workflow.add_node("replanner", create_replanner_node(llm))
+    workflow.add_node("planner", nodes["planner"])
+    workflow.add_node("optimizer", nodes["optimizer"])
+    workflow.add_node("executor", nodes["executor"])
+    workflow.add_node("tools", nodes["tools"])
+    workflow.add_node("process_result", nodes["process_result"])
+    workflow.add_node("replanner", nodes["replanner"])
 
     # Add edges
     workflow.add_edge(START, "planner")
 
     workflow.add_conditional_edges(
         "planner",
-        _route_after_planner,
-        {"executor": "executor", "end": END},
+        route_after_planner,
+        {"executor": "optimizer", "end": END},
     )
+    workflow.add_edge("optimizer", "executor")
 
     workflow.add_conditional_edges(
         "executor",
-        _route_after_executor,
+        route_after_executor,
         {
             "tools": "tools",
             "next_step": "executor",
@@ -191,8 +428,8 @@ def create_planning_agent_graph(
 
     workflow.add_conditional_edges(
         "replanner",
-        _route_after_planner,
-        {"executor": "executor", "end": END},
+        route_after_planner,
+        {"executor": "optimizer", "end": END},
     )
 
     return workflow.compile()
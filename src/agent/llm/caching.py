@@ -0,0 +1,108 @@
+"""Provider prompt caching for models that need it requested explicitly.
+
+Anthropic only caches a prompt prefix up to a content block marked with
+``cache_control``. OpenAI caches long prefixes automatically and needs no
+wrapper; both report the cached part of the input in ``usage_metadata``
+(``input_token_details.cache_read``), which the metrics count as cached
+tokens.
+"""
+
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from .router import invoke_nested, stream_nested
+
+
+def _with_cache_control(message: BaseMessage, cache_control: dict[str, str]) -> BaseMessage:
+    """Return a copy of a message whose last content block is a cache breakpoint."""
+    content = message.content
+    if isinstance(content, str):
+        if not content:
+            return message
+        blocks: list[Any] = [{"type": "text", "text": content}]
+    else:
+        blocks = list(content)
+        if not blocks or not isinstance(blocks[-1], dict):
+            return message
+    blocks[-1] = {**blocks[-1], "cache_control": cache_control}
+    return message.model_copy(update={"content": blocks})
+
+
+def mark_cache_breakpoints(
+    messages: list[BaseMessage], cache_control: dict[str, str]
+) -> list[BaseMessage]:
+    """Mark the stable prefix of a prompt as cacheable.
+
+    Breakpoints go on the system prompt, which also covers the tool schemas
+    sent before it, and on the message before the last one when it is a
+    user or system message. Callers put content shared by consecutive calls
+    (the goal and plan for executor steps) there and the per-call content in
+    the last message.
+
+    Args:
+        messages: Prompt messages
+        cache_control: Value of each breakpoint's ``cache_control`` field
+
+    Returns:
+        New message list; the input messages are not modified
+    """
+    marked = list(messages)
+    for i, message in enumerate(marked):
+        is_prefix_end = i == len(marked) - 2 and isinstance(message, HumanMessage)
+        if isinstance(message, SystemMessage) or is_prefix_end:
+            marked[i] = _with_cache_control(message, cache_control)
+    return marked
+
+
+class PromptCachingChatModel(BaseChatModel):
+    """Chat model that marks the stable prefix of every prompt for caching."""
+
+    model: Any
+    cache_control: dict[str, str] = Field(default_factory=lambda: {"type": "ephemeral"})
+
+    @property
+    def _llm_type(self) -> str:
+        return "prompt-caching"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"cache_control": self.cache_control}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "PromptCachingChatModel":
+        """Bind tools to the wrapped model, keeping the caching settings."""
+        return self.model_copy(update={"model": self.model.bind_tools(tools, **kwargs)})
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if stop is not None:
+            kwargs["stop"] = stop
+
+        prompt = mark_cache_breakpoints(messages, self.cache_control)
+        message = invoke_nested(self.model, prompt, run_manager, **kwargs)
+        if not isinstance(message, AIMessage):
+            message = AIMessage(content=message.content)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if stop is not None:
+            kwargs["stop"] = stop
+
+        prompt = mark_cache_breakpoints(messages, self.cache_control)
+        yield from stream_nested(self.model, prompt, run_manager, **kwargs)
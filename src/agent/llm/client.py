@@ -1,20 +1,184 @@
 """LLM client configuration."""
 
-from langchain_anthropic import ChatAnthropic
+import functools
+import importlib.metadata
+import inspect
+import threading
+from typing import Any
+
 from langchain_core.language_models import BaseChatModel
-from langchain_openai import ChatOpenAI
 
+from ..logging import get_logger
+from .caching import PromptCachingChatModel
+from .pool import get_async_client, get_sync_client, prewarm
+from .router import RouterChatModel
+
+OPENAI_DEFAULT_URL = "https://api.openai.com/v1"
+ANTHROPIC_DEFAULT_URL = "https://api.anthropic.com"
+
+# langchain-anthropic major versions whose private client attributes are known
+_ANTHROPIC_POOL_MAJORS = (1,)
+_ANTHROPIC_CLIENT_ATTRS = ("_client_params", "_client", "_async_client")
+
+logger = get_logger(__name__)
+
+# Process-wide registry so agents share model clients and their connection pools
+_registry: dict[tuple[Any, ...], BaseChatModel] = {}
+_registry_lock = threading.RLock()
+
+
+def _anthropic_pool_supported(llm: Any) -> bool:
+    """Check that ChatAnthropic still builds its SDK clients as expected.
+
+    The shared pool relies on private, lazily cached attributes, so it is
+    only used with langchain-anthropic versions known to have them.
+    """
+    try:
+        version = importlib.metadata.version("langchain-anthropic")
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    major = version.split(".", 1)[0]
+    return (
+        major.isdigit()
+        and int(major) in _ANTHROPIC_POOL_MAJORS
+        and all(
+            isinstance(inspect.getattr_static(type(llm), name, None), functools.cached_property)
+            for name in _ANTHROPIC_CLIENT_ATTRS
+        )
+    )
+
+
+def _use_shared_anthropic_pool(llm: Any) -> None:
+    """Point a ChatAnthropic instance at the shared HTTP clients.
+
+    ChatAnthropic has no http_client option, so the SDK clients it would
+    lazily build are created up front with the pooled transports instead.
+    Unknown langchain-anthropic versions keep their default clients.
+    """
+    if not _anthropic_pool_supported(llm):
+        logger.warning("Shared HTTP pool not supported by this langchain-anthropic version")
+        return
+
+    import anthropic
+
+    params = llm._client_params
+    llm.__dict__["_client"] = anthropic.Client(**params, http_client=get_sync_client())
+    llm.__dict__["_async_client"] = anthropic.AsyncClient(**params, http_client=get_async_client())
+
+
+def _create_provider_llm(
+    model: str, base_url: str | None = None, prompt_cache: bool = False
+) -> BaseChatModel:
+    """Create the provider ChatModel for a single model name.
+
+    Provider SDKs are imported here, on first use, so that processes only
+    pay the import cost of the providers they actually call.
+    """
+    if prompt_cache and model.startswith("claude"):
+        with _registry_lock:
+            key = ("prompt_cache", model, base_url)
+            if key not in _registry:
+                _registry[key] = PromptCachingChatModel(model=_create_provider_llm(model, base_url))
+            return _registry[key]
 
-def create_llm(model: str = "gpt-4o-mini") -> BaseChatModel:
+    with _registry_lock:
+        key = ("provider", model, base_url)
+        if key not in _registry:
+            llm: BaseChatModel
+            if model.startswith("claude"):
+                from langchain_anthropic import ChatAnthropic
+
+                if base_url:
+                    llm = ChatAnthropic(model=model, temperature=0, base_url=base_url)  # type: ignore[call-arg]
+                else:
+                    # base_url=None would replace the ANTHROPIC_API_URL default
+                    llm = ChatAnthropic(model=model, temperature=0)  # type: ignore[call-arg]
+                _use_shared_anthropic_pool(llm)
+            else:
+                from langchain_openai import ChatOpenAI
+
+                llm = ChatOpenAI(
+                    model=model,
+                    temperature=0,
+                    http_client=get_sync_client(),
+                    http_async_client=get_async_client(),
+                    base_url=base_url,
+                )
+            _registry[key] = llm
+        return _registry[key]
+
+
+def create_llm(
+    model: str = "gpt-4o-mini",
+    fallbacks: list[str] | None = None,
+    timeout: float | None = None,
+    hedge: bool = True,
+    base_url: str | None = None,
+    prompt_cache: bool = False,
+) -> BaseChatModel:
     """Create a LangChain ChatModel instance.
 
+    Instances are kept in a process-wide registry: calls with the same
+    arguments return the same model, backed by the shared connection pools
+    from ``llm.pool``.
+
     Args:
         model: Model name to use. Supports OpenAI models (gpt-*) and
                Anthropic models (claude-*).
+        fallbacks: Optional models to hedge and fail over to, in order of
+                   preference. When given, a RouterChatModel is returned.
+        timeout: Overall timeout in seconds for a routed request
+        hedge: Send a duplicate request to the next model when the current
+               one is slower than its p95 latency
+        base_url: API base URL overriding the provider default, e.g. a
+                  local OpenAI-compatible server
+        prompt_cache: Ask the provider to cache the stable prefix of every
+                      prompt. Anthropic models get cache breakpoints on
+                      their system prompt and on the message before the
+                      last; OpenAI models cache long prefixes on their own.
 
     Returns:
         Configured ChatModel instance
     """
-    if model.startswith("claude"):
-        return ChatAnthropic(model=model, temperature=0)  # type: ignore[call-arg]
-    return ChatOpenAI(model=model, temperature=0)
+    if not fallbacks and timeout is None:
+        return _create_provider_llm(model, base_url, prompt_cache)
+
+    names = [model, *(fallbacks or [])]
+    with _registry_lock:
+        key = ("router", tuple(names), timeout, hedge, base_url, prompt_cache)
+        if key not in _registry:
+            _registry[key] = RouterChatModel(
+                routes=[_create_provider_llm(name, base_url, prompt_cache) for name in names],
+                route_names=names,
+                timeout=timeout,
+                hedge=hedge,
+            )
+        return _registry[key]
+
+
+def clear_llm_registry() -> None:
+    """Drop all registered model instances."""
+    with _registry_lock:
+        _registry.clear()
+
+
+def _endpoint_url(llm: Any) -> str:
+    """Return the API base URL a provider model connects to."""
+    if hasattr(llm, "anthropic_api_url"):
+        return str(llm.anthropic_api_url or ANTHROPIC_DEFAULT_URL)
+    return str(getattr(llm, "openai_api_base", None) or OPENAI_DEFAULT_URL)
+
+
+def prewarm_llms(models: list[str]) -> int:
+    """Create the given models and open pooled connections to their providers.
+
+    Intended to be called once at startup so the first request does not pay
+    for client construction and TLS handshakes.
+
+    Args:
+        models: Model names to prepare
+
+    Returns:
+        Number of provider endpoints that were reached
+    """
+    return prewarm([_endpoint_url(_create_provider_llm(name)) for name in models])
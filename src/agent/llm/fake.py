@@ -0,0 +1,181 @@
+"""Deterministic chat model for tests and benchmarks."""
+
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+Responder = Callable[[list[BaseMessage], dict[str, Any]], AIMessage]
+
+# Step headers in single-step and fused executor prompts (not the previous-results list)
+_STEP_HEADER = re.compile(r"^(?:Current )?Step (\d+):", re.MULTILINE)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that answers from a script instead of a provider.
+
+    Responses come from ``responder`` when one is set (called with the prompt
+    messages and the bound call kwargs such as ``tools``), otherwise from
+    ``responses`` in order. Supports ``bind_tools`` and, through it,
+    ``with_structured_output``; scripted structured output is simply an
+    AIMessage with a tool call named after the schema.
+    """
+
+    responses: list[AIMessage] = []
+    responder: Responder | None = None
+    latency: float = 0.0
+    stream_tokens: bool = True
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def call_count(self) -> int:
+        """Number of responses produced so far."""
+        return self._calls
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        """Bind tools; they are passed to the responder as ``tools``."""
+        return self.bind(tools=list(tools), **kwargs)
+
+    def _next_response(self, messages: list[BaseMessage], kwargs: dict[str, Any]) -> AIMessage:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            index = self._calls
+            self._calls += 1
+        if self.responder is not None:
+            return self.responder(messages, kwargs)
+        if index >= len(self.responses):
+            raise IndexError(f"Script exhausted after {len(self.responses)} responses")
+        return self.responses[index]
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._next_response(messages, kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._next_response(messages, kwargs)
+        if message.tool_calls or not self.stream_tokens:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content=message.content,
+                    tool_calls=message.tool_calls,
+                    usage_metadata=message.usage_metadata,
+                )
+            )
+            return
+
+        words = str(message.content).split(" ")
+        for i, word in enumerate(words):
+            text = word if i == len(words) - 1 else word + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+
+def _bound_tool_names(kwargs: dict[str, Any]) -> list[str]:
+    """Return the names of tools bound to a call."""
+    names: list[str] = []
+    for bound in kwargs.get("tools") or []:
+        name = getattr(bound, "__name__", None) or getattr(bound, "name", None)
+        if name is not None:
+            names.append(str(name))
+    return names
+
+
+def plan_responder(
+    n_steps: int, tool_name: str = "echo", arg_name: str = "text", action: str | None = None
+) -> Responder:
+    """Script a planning run: one plan of ``n_steps``, then one tool call per step.
+
+    Planner and replanner calls (bound to the ``Plan`` schema) receive the
+    plan; executor calls receive a call to ``tool_name`` for every step
+    listed in the prompt, so fused prompts get one call per step.
+
+    Args:
+        n_steps: Number of plan steps
+        tool_name: Tool the executor calls
+        arg_name: Name of the tool's single string argument
+        action: Plan step action (defaults to ``tool_name``)
+
+    Returns:
+        Responder for ScriptedChatModel
+    """
+    steps = [
+        {
+            "step_number": i + 1,
+            "action": action or tool_name,
+            "description": f"Process item {i + 1}",
+            "input_data": f"item {i + 1}",
+            "expected_output": "Processed item",
+        }
+        for i in range(n_steps)
+    ]
+    plan = {"goal": "Process items", "reasoning": "One step per item", "steps": steps}
+
+    def respond(messages: list[BaseMessage], kwargs: dict[str, Any]) -> AIMessage:
+        if "Plan" in _bound_tool_names(kwargs):
+            return AIMessage(content="", tool_calls=[{"name": "Plan", "args": plan, "id": "plan"}])
+        numbers = _STEP_HEADER.findall(str(messages[-1].content))
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {"name": tool_name, "args": {arg_name: f"item {n}"}, "id": f"call_{n}"}
+                for n in numbers
+            ],
+        )
+
+    return respond
+
+
+def tool_loop_responder(
+    n_rounds: int, tool_name: str = "echo", arg_name: str = "text"
+) -> Responder:
+    """Script a simple agent loop: ``n_rounds`` tool calls, then a final answer.
+
+    Args:
+        n_rounds: Number of tool-calling rounds before answering
+        tool_name: Tool to call
+        arg_name: Name of the tool's single string argument
+
+    Returns:
+        Responder for ScriptedChatModel
+    """
+
+    def respond(messages: list[BaseMessage], kwargs: dict[str, Any]) -> AIMessage:
+        done = sum(1 for msg in messages if msg.type == "tool")
+        if done >= n_rounds:
+            return AIMessage(content=f"Finished after {done} tool calls")
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {"name": tool_name, "args": {arg_name: f"round {done + 1}"}, "id": f"call_{done}"}
+            ],
+        )
+
+    return respond
@@ -0,0 +1,215 @@
+"""Process-wide HTTP connection pools shared by LLM provider clients."""
+
+import asyncio
+import importlib.util
+import threading
+import weakref
+from dataclasses import dataclass, replace
+from typing import Any
+
+import httpx
+
+from ..cancellation import current_token
+from ..logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Connection pool settings for provider HTTP clients."""
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    timeout: float = 120.0
+    connect_timeout: float = 10.0
+
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _apply_deadline(request: httpx.Request) -> None:
+    """Bound a request by the cancellation token of the run sending it.
+
+    Raises RunCancelled instead of sending once the token has fired, and
+    caps every timeout at the time left before the deadline.
+    """
+    token = current_token()
+    if token is None:
+        return
+    token.raise_if_cancelled()
+    remaining = token.remaining()
+    if remaining is None:
+        return
+    timeout = request.extensions.get("timeout") or {}
+    request.extensions["timeout"] = {
+        name: remaining if timeout.get(name) is None else min(timeout[name], remaining)
+        for name in ("connect", "read", "write", "pool")
+    }
+
+
+async def _apply_deadline_async(request: httpx.Request) -> None:
+    _apply_deadline(request)
+
+
+def _transport_kwargs(config: PoolConfig) -> dict[str, Any]:
+    """Build the httpx connection pool arguments for a pool configuration."""
+    http2 = config.http2
+    if http2 and not _http2_available():
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        "http2": http2,
+    }
+
+
+def _timeout(config: PoolConfig) -> httpx.Timeout:
+    return httpx.Timeout(config.timeout, connect=config.connect_timeout)
+
+
+class _LoopTransport(httpx.AsyncBaseTransport):
+    """Async transport with a separate connection pool per event loop.
+
+    Async connections belong to the loop that opened them, while a model
+    keeps its client for life and may be called from successive
+    ``asyncio.run`` calls or from several threads' loops. Each loop gets its
+    own pool; pools of closed loops are dropped.
+    """
+
+    def __init__(self, config: PoolConfig):
+        self._kwargs = _transport_kwargs(config)
+        self._transports: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _for_running_loop(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                for closed in [other for other in self._transports if other.is_closed()]:
+                    del self._transports[closed]
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(**self._kwargs)
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._for_running_loop().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+    def close_all(self) -> None:
+        """Close the pools of loops still running, without waiting for them."""
+        with self._lock:
+            transports = list(self._transports.items())
+            self._transports.clear()
+        for loop, transport in transports:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(transport.aclose(), loop)
+
+
+_lock = threading.Lock()
+_config = PoolConfig()
+_sync_client: httpx.Client | None = None
+_async_client: httpx.AsyncClient | None = None
+_async_transport: _LoopTransport | None = None
+
+
+def configure_pool(**overrides: object) -> PoolConfig:
+    """Update the shared pool settings.
+
+    The current clients are closed and replaced; clients created afterwards
+    use the new settings. Models created before keep the closed clients, so
+    call this at startup, or clear the model registry afterwards.
+
+    Args:
+        **overrides: PoolConfig fields to change
+
+    Returns:
+        The active pool configuration
+    """
+    global _config, _sync_client, _async_client, _async_transport
+    with _lock:
+        _config = replace(_config, **overrides)  # type: ignore[arg-type]
+        sync_client, async_transport = _sync_client, _async_transport
+        _sync_client = _async_client = _async_transport = None
+    if sync_client is not None:
+        sync_client.close()
+    if async_transport is not None:
+        async_transport.close_all()
+    return _config
+
+
+def get_pool_config() -> PoolConfig:
+    """Return the active pool configuration."""
+    return _config
+
+
+def get_sync_client() -> httpx.Client:
+    """Return the shared synchronous HTTP client, creating it on first use."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(
+                **_transport_kwargs(_config),
+                timeout=_timeout(_config),
+                event_hooks={"request": [_apply_deadline]},
+            )
+        return _sync_client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared asynchronous HTTP client, creating it on first use.
+
+    The client can be used from any event loop; each loop gets its own
+    connections.
+    """
+    global _async_client, _async_transport
+    with _lock:
+        if _async_client is None:
+            _async_transport = _LoopTransport(_config)
+            _async_client = httpx.AsyncClient(
+                transport=_async_transport,
+                timeout=_timeout(_config),
+                event_hooks={"request": [_apply_deadline_async]},
+            )
+        return _async_client
+
+
+def prewarm(urls: list[str]) -> int:
+    """Open keep-alive connections to provider endpoints ahead of the first call.
+
+    Any HTTP response (including 401/404) completes the TCP and TLS handshake
+    and leaves the connection in the shared pool.
+
+    Args:
+        urls: Endpoint URLs to connect to
+
+    Returns:
+        Number of endpoints that were reached
+    """
+    client = get_sync_client()
+    reached = 0
+    for url in dict.fromkeys(urls):
+        try:
+            client.head(url)
+        except httpx.HTTPError as e:
+            logger.warning("Connection prewarm failed", url=url, error=str(e))
+            continue
+        reached += 1
+    logger.info("Connections prewarmed", reached=reached, total=len(urls))
+    return reached
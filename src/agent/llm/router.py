@@ -0,0 +1,404 @@
+"""Router chat model with hedged requests and provider failover."""
+
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any
+
+from langchain_core.callbacks import CallbackManager, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, BaseMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import set_config_context
+from langgraph.constants import TAG_NOSTREAM
+from pydantic import Field
+
+from ..logging import get_logger
+from ..metrics import record_retry
+
+logger = get_logger(__name__)
+
+_pool_lock = threading.Lock()
+_pool: ThreadPoolExecutor | None = None
+
+
+def _nested_config(run_manager: CallbackManagerForLLMRun) -> RunnableConfig:
+    """Build the config reporting an inner call as a child of ``run_manager``'s run."""
+    manager = CallbackManager(handlers=[], parent_run_id=run_manager.run_id)
+    manager.set_handlers(run_manager.inheritable_handlers)
+    manager.add_tags(run_manager.inheritable_tags)
+    manager.add_metadata(run_manager.inheritable_metadata)
+    return {"callbacks": manager}
+
+
+def invoke_nested(
+    model: Runnable[Any, Any],
+    messages: list[BaseMessage],
+    run_manager: CallbackManagerForLLMRun | None,
+    **kwargs: Any,
+) -> BaseMessage:
+    """Invoke a model on behalf of another model call.
+
+    The inner call is reported to the same callbacks as a child of the outer
+    one, so handlers can tell wrapper calls from the calls they delegate to.
+    The config is also installed as the current context, because bound
+    models merge their config with it.
+    """
+    if run_manager is None:
+        return model.invoke(messages, **kwargs)  # type: ignore[no-any-return]
+    config = _nested_config(run_manager)
+    with set_config_context(config) as ctx:
+        return ctx.run(model.invoke, messages, config, **kwargs)  # type: ignore[no-any-return]
+
+
+def stream_nested(
+    model: Runnable[Any, Any],
+    messages: list[BaseMessage],
+    run_manager: CallbackManagerForLLMRun | None,
+    **kwargs: Any,
+) -> Iterator[ChatGenerationChunk]:
+    """Stream a model on behalf of another model's streamed call.
+
+    Like ``invoke_nested``, but the inner run is tagged ``nostream`` so
+    LangGraph's message stream reports each token once, from the outer run.
+    ``BaseChatModel.stream`` gives wrappers no run manager; the inner run is
+    then not reported at all, since it could not be told from the outer one.
+    """
+    if run_manager is None:
+        config: RunnableConfig = {"callbacks": []}
+    else:
+        config = _nested_config(run_manager)
+        config["tags"] = [TAG_NOSTREAM]
+    with set_config_context(config) as ctx:
+        chunks = ctx.run(model.stream, messages, config, **kwargs)
+        while True:
+            try:
+                chunk: BaseMessageChunk = ctx.run(next, chunks)
+            except StopIteration:
+                return
+            if not isinstance(chunk, AIMessageChunk):
+                chunk = AIMessageChunk(content=chunk.content)
+            yield ChatGenerationChunk(message=chunk)
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Return the shared thread pool used for routed requests."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-router")
+        return _pool
+
+
+class ProviderHealth:
+    """Latency history and circuit breaker state for one routed model.
+
+    The circuit opens after ``failure_threshold`` consecutive failures and
+    stays open for ``reset_timeout`` seconds. After that a single trial
+    request is let through (half-open); its outcome closes or re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        window: int = 100,
+    ):
+        """Initialize provider health tracking.
+
+        Args:
+            name: Model name, used in logs
+            failure_threshold: Consecutive failures before the circuit opens
+            reset_timeout: Seconds the circuit stays open
+            window: Number of recent latencies kept for percentiles
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._consecutive_failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the circuit is currently open."""
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow_request(self) -> bool:
+        """Check whether a request may be sent to this provider.
+
+        Returns:
+            True if the circuit is closed, or half-open with no trial running
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self, latency: float) -> None:
+        """Record a successful request and close the circuit."""
+        with self._lock:
+            self._latencies.append(latency)
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            if self._opened_at is not None:
+                logger.info("Circuit closed", model=self.name)
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit past the threshold."""
+        with self._lock:
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or (
+                self._consecutive_failures >= self.failure_threshold
+            ):
+                if self._opened_at is None:
+                    logger.warning(
+                        "Circuit opened", model=self.name, failures=self._consecutive_failures
+                    )
+                self._opened_at = time.monotonic()
+
+    def percentile(self, pct: float) -> float | None:
+        """Return a latency percentile over the recent window.
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds, or None if no samples were recorded
+        """
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        rank = max(0, math.ceil(pct / 100 * len(samples)) - 1)
+        return samples[rank]
+
+    @property
+    def sample_count(self) -> int:
+        """Number of latency samples recorded."""
+        with self._lock:
+            return len(self._latencies)
+
+
+class RouterChatModel(BaseChatModel):
+    """Chat model that routes each request across several models.
+
+    Requests go to the first model whose circuit is closed. If it has not
+    answered after the hedge delay (its p95 latency once enough samples
+    exist), a duplicate request is sent to the next model and whichever
+    answers first wins. A failed request fails over to the next model
+    immediately.
+    """
+
+    routes: list[Any] = Field(description="Models or runnables, in order of preference")
+    route_names: list[str] = Field(default_factory=list)
+    health: list[ProviderHealth] = Field(default_factory=list)
+    hedge: bool = True
+    hedge_delay: float | None = None
+    initial_hedge_delay: float = 5.0
+    min_hedge_delay: float = 0.25
+    min_samples: int = 20
+    timeout: float | None = None
+    failure_threshold: int = 3
+    reset_timeout: float = 30.0
+
+    def model_post_init(self, __context: Any) -> None:
+        """Fill in route names and health trackers that were not provided."""
+        if not self.route_names:
+            self.route_names = [
+                str(getattr(route, "model_name", None) or getattr(route, "model", i))
+                for i, route in enumerate(self.routes)
+            ]
+        if not self.health:
+            self.health = [
+                ProviderHealth(name, self.failure_threshold, self.reset_timeout)
+                for name in self.route_names
+            ]
+
+    @property
+    def _llm_type(self) -> str:
+        return "router"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"routes": self.route_names, "hedge": self.hedge}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "RouterChatModel":
+        """Bind tools to every routed model.
+
+        The returned router shares circuit and latency state with this one.
+
+        Args:
+            tools: Tools to bind
+            **kwargs: Extra arguments for each model's ``bind_tools``
+
+        Returns:
+            Router over the tool-bound models
+        """
+        return self.model_copy(
+            update={"routes": [route.bind_tools(tools, **kwargs) for route in self.routes]}
+        )
+
+    def _hedge_delay_for(self, index: int) -> float:
+        """Return how long to wait on a route before hedging."""
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        health = self.health[index]
+        p95 = health.percentile(95)
+        if p95 is None or health.sample_count < self.min_samples:
+            return self.initial_hedge_delay
+        return max(self.min_hedge_delay, p95)
+
+    def _call_route(
+        self,
+        index: int,
+        messages: list[BaseMessage],
+        run_manager: CallbackManagerForLLMRun | None,
+        **kwargs: Any,
+    ) -> BaseMessage:
+        """Invoke one route, recording its latency or failure."""
+        start = time.monotonic()
+        try:
+            result = invoke_nested(self.routes[index], messages, run_manager, **kwargs)
+        except Exception:
+            self.health[index].record_failure()
+            raise
+        self.health[index].record_success(time.monotonic() - start)
+        return result
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if stop is not None:
+            kwargs["stop"] = stop
+
+        pool = _get_pool()
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        candidates = list(range(len(self.routes)))
+        pending: dict[Future[BaseMessage], int] = {}
+        last_error: Exception | None = None
+
+        def launch() -> bool:
+            # Skip routes whose circuit is open
+            while candidates:
+                index = candidates.pop(0)
+                if self.health[index].allow_request():
+                    ctx = contextvars.copy_context()
+                    call = partial(self._call_route, index, messages, run_manager, **kwargs)
+                    future = pool.submit(ctx.run, call)
+                    pending[future] = index
+                    return True
+            return False
+
+        if not launch():
+            raise RuntimeError(f"All routed models are unavailable: {self.route_names}")
+
+        while pending:
+            wait_for = None
+            if candidates and self.hedge:
+                wait_for = min(self._hedge_delay_for(i) for i in pending.values())
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                wait_for = remaining if wait_for is None else min(wait_for, remaining)
+
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            if not done:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"No model answered within {self.timeout}s")
+                if launch():
+                    record_retry("router_hedge")
+                    logger.info(
+                        "Hedged request",
+                        slow=[self.route_names[i] for i in pending.values()][:-1],
+                        hedge=self.route_names[list(pending.values())[-1]],
+                    )
+                continue
+
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    message = future.result()
+                except Exception as e:
+                    logger.warning(
+                        "Routed model failed", model=self.route_names[index], error=str(e)
+                    )
+                    last_error = e
+                    continue
+                if not isinstance(message, AIMessage):
+                    message = AIMessage(content=message.content)
+                return ChatResult(generations=[ChatGeneration(message=message)])
+
+            # Fail over immediately when nothing is left in flight
+            if not pending and candidates and launch():
+                record_retry("router_failover")
+
+        if last_error is None:
+            raise RuntimeError(f"All routed models are unavailable: {self.route_names}")
+        raise last_error
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """Stream from the first available model, failing over until output arrives.
+
+        Streams are not hedged: once a model has produced a chunk, the
+        response cannot move to another model.
+        """
+        if stop is not None:
+            kwargs["stop"] = stop
+
+        last_error: Exception | None = None
+        for index, route in enumerate(self.routes):
+            if not self.health[index].allow_request():
+                continue
+            if last_error is not None:
+                record_retry("router_failover")
+            start = time.monotonic()
+            streamed = False
+            try:
+                for chunk in stream_nested(route, messages, run_manager, **kwargs):
+                    streamed = True
+                    yield chunk
+            except GeneratorExit:
+                # The consumer stopped reading; the model itself was fine
+                self.health[index].record_success(time.monotonic() - start)
+                raise
+            except Exception as e:
+                self.health[index].record_failure()
+                if streamed:
+                    raise
+                logger.warning("Routed model failed", model=self.route_names[index], error=str(e))
+                last_error = e
+                continue
+            self.health[index].record_success(time.monotonic() - start)
+            return
+
+        if last_error is None:
+            raise RuntimeError(f"All routed models are unavailable: {self.route_names}")
+        raise last_error
@@ -0,0 +1,442 @@
+"""Process-wide rate limiting and fair scheduling of LLM calls."""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from ..cancellation import current_token
+from ..logging import get_logger
+from .router import invoke_nested, stream_nested
+
+logger = get_logger(__name__)
+
+
+class Priority(IntEnum):
+    """Scheduling priority of an LLM call (lower runs first)."""
+
+    PLANNER = 0
+    REPLANNER = 1
+    AGENT = 2
+    EXECUTOR = 3
+
+
+# A planner call unblocks a whole run, so it outranks per-step calls
+ROLE_PRIORITIES = {
+    "planner": Priority.PLANNER,
+    "replanner": Priority.REPLANNER,
+    "agent": Priority.AGENT,
+    "executor": Priority.EXECUTOR,
+}
+
+
+def estimate_tokens(messages: Sequence[BaseMessage], output_tokens: int = 256) -> int:
+    """Roughly estimate the tokens a call will consume.
+
+    Args:
+        messages: Prompt messages
+        output_tokens: Expected completion size
+
+    Returns:
+        Estimated total tokens (about four characters per token)
+    """
+    chars = sum(len(str(msg.content)) for msg in messages)
+    return chars // 4 + 4 * len(messages) + output_tokens
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate.
+
+    Not thread-safe on its own; the scheduler guards it with its lock.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        """Initialize the bucket full.
+
+        Args:
+            rate_per_minute: Refill rate
+            capacity: Maximum burst size (defaults to one minute's worth)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be consumed (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._level >= amount:
+            return 0.0
+        return (amount - self._level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take ``amount`` from the bucket, possibly going into debt."""
+        self._refill()
+        self._level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Correct an earlier estimate (positive delta consumes more)."""
+        self._refill()
+        self._level = min(self.capacity, self._level - delta)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the provider signalled a rate limit."""
+        self._refill()
+        self._level = min(self._level, 0.0)
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    tenant: str = field(compare=False)
+    tokens: int = field(compare=False)
+    enqueued: float = field(compare=False)
+
+
+class LLMScheduler:
+    """Admission control for LLM calls shared by every session in the process.
+
+    Calls wait in per-tenant queues. The next call to run is the queued head
+    with the best effective priority, where priority improves by one class for
+    every full ``aging_seconds`` spent waiting so low-priority work can't
+    starve. Ties go to the tenant served least recently. A call is admitted once the
+    request and token buckets have capacity and the concurrency cap allows.
+    A call whose run is cancelled or hits its deadline while queued leaves
+    the queue and raises RunCancelled.
+
+    Admission is per model call, not per provider request: a RouterChatModel
+    that hedges sends a second request under the same slot, so with hedging
+    on, up to twice ``max_concurrency`` requests can reach providers.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_concurrency: int | None = None,
+        aging_seconds: float = 10.0,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            requests_per_minute: Request rate limit (None for unlimited)
+            tokens_per_minute: Estimated token rate limit (None for unlimited)
+            max_concurrency: Maximum calls in flight (None for unlimited)
+            aging_seconds: Waiting time that promotes a call by one priority class
+        """
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.aging_seconds = aging_seconds
+
+        self._cond = threading.Condition()
+        self._queues: dict[str, list[_Ticket]] = {}
+        self._tenant_order: deque[str] = deque()
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+
+        self._granted = 0
+        self._rate_limited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _effective_priority(self, ticket: _Ticket, now: float) -> int:
+        # Aging moves whole classes, so calls of equal class still tie and
+        # fall back to tenant order instead of strict arrival order
+        if self.aging_seconds <= 0:
+            return ticket.priority
+        return ticket.priority - int((now - ticket.enqueued) // self.aging_seconds)
+
+    def _next_ticket(self) -> _Ticket | None:
+        now = time.monotonic()
+        best: _Ticket | None = None
+        best_priority = 0
+        for tenant in self._tenant_order:
+            head = self._queues[tenant][0]
+            priority = self._effective_priority(head, now)
+            if best is None or priority < best_priority:
+                best, best_priority = head, priority
+        return best
+
+    def _capacity_wait(self, ticket: _Ticket) -> float:
+        wait_for = max(0.0, self._paused_until - time.monotonic())
+        if self._requests is not None:
+            wait_for = max(wait_for, self._requests.wait_time(1))
+        if self._tokens is not None:
+            wait_for = max(wait_for, self._tokens.wait_time(ticket.tokens))
+        return wait_for
+
+    def _withdraw(self, ticket: _Ticket) -> None:
+        queue = self._queues[ticket.tenant]
+        queue.remove(ticket)
+        heapq.heapify(queue)
+        if not queue:
+            del self._queues[ticket.tenant]
+            self._tenant_order.remove(ticket.tenant)
+
+    def _grant(self, ticket: _Ticket) -> None:
+        queue = self._queues[ticket.tenant]
+        heapq.heappop(queue)
+        self._tenant_order.remove(ticket.tenant)
+        if queue:
+            self._tenant_order.append(ticket.tenant)
+        else:
+            del self._queues[ticket.tenant]
+
+        if self._requests is not None:
+            self._requests.consume(1)
+        if self._tokens is not None:
+            self._tokens.consume(ticket.tokens)
+        self._in_flight += 1
+
+        waited = time.monotonic() - ticket.enqueued
+        self._granted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+    @contextmanager
+    def acquire(
+        self, priority: int = Priority.EXECUTOR, tenant: str = "default", tokens: int = 0
+    ) -> Iterator[None]:
+        """Wait for admission, then hold a slot for the duration of the block.
+
+        Args:
+            priority: Priority class of the call
+            tenant: Tenant (session) the call belongs to
+            tokens: Estimated tokens the call will consume
+
+        Raises:
+            RunCancelled: If the current run is stopped before the call is admitted
+        """
+        token = current_token()
+        with self._cond:
+            ticket = _Ticket(int(priority), next(self._seq), tenant, tokens, time.monotonic())
+            if tenant not in self._queues:
+                self._queues[tenant] = []
+                self._tenant_order.append(tenant)
+            heapq.heappush(self._queues[tenant], ticket)
+
+            while True:
+                if token is not None and token.cancelled:
+                    self._withdraw(ticket)
+                    self._cond.notify_all()
+                    token.raise_if_cancelled()
+                wait_for = 1.0
+                at_capacity = (
+                    self.max_concurrency is not None and self._in_flight >= self.max_concurrency
+                )
+                if not at_capacity and self._next_ticket() is ticket:
+                    wait_for = self._capacity_wait(ticket)
+                    if wait_for == 0:
+                        self._grant(ticket)
+                        self._cond.notify_all()
+                        break
+                if token is not None:
+                    # Cancelling does not notify, so check the token every second
+                    remaining = token.remaining()
+                    wait_for = min(wait_for, 1.0, 1.0 if remaining is None else remaining)
+                self._cond.wait(timeout=wait_for)
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def record_usage(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once a call's real usage is known.
+
+        Args:
+            estimated: Tokens reserved when the call was admitted
+            actual: Tokens the provider reported
+        """
+        if self._tokens is None:
+            return
+        with self._cond:
+            self._tokens.adjust(actual - estimated)
+
+    def record_rate_limited(self, retry_after: float = 1.0) -> None:
+        """Pause admissions after the provider returned a rate limit error.
+
+        Args:
+            retry_after: Seconds to hold new calls back
+        """
+        with self._cond:
+            self._rate_limited += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            if self._requests is not None:
+                self._requests.drain()
+        logger.warning("Provider rate limit hit", retry_after=retry_after)
+
+    def stats(self) -> dict[str, Any]:
+        """Return queue depth and admission metrics.
+
+        Returns:
+            Dictionary of current and cumulative scheduler metrics
+        """
+        with self._cond:
+            by_priority: dict[str, int] = {}
+            by_tenant: dict[str, int] = {}
+            for tenant, queue in self._queues.items():
+                by_tenant[tenant] = len(queue)
+                for ticket in queue:
+                    name = _priority_name(ticket.priority)
+                    by_priority[name] = by_priority.get(name, 0) + 1
+            return {
+                "queue_depth": sum(by_tenant.values()),
+                "queue_depth_by_priority": by_priority,
+                "queue_depth_by_tenant": by_tenant,
+                "in_flight": self._in_flight,
+                "granted": self._granted,
+                "rate_limited": self._rate_limited,
+                "wait_seconds_total": self._wait_total,
+                "wait_seconds_max": self._wait_max,
+            }
+
+
+def _priority_name(priority: int) -> str:
+    try:
+        return Priority(priority).name.lower()
+    except ValueError:
+        return str(priority)
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Return the back-off for a provider rate limit error, or None."""
+    if getattr(error, "status_code", None) != 429:
+        return None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 1.0))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class ScheduledChatModel(BaseChatModel):
+    """Chat model that admits every call through an LLMScheduler.
+
+    A wrapped RouterChatModel's hedged requests share the call's admission.
+    """
+
+    model: Any
+    scheduler: Any
+    priority: int = Priority.EXECUTOR
+    tenant: str = "default"
+
+    @property
+    def _llm_type(self) -> str:
+        return "scheduled"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"priority": self.priority, "tenant": self.tenant}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScheduledChatModel":
+        """Bind tools to the wrapped model, keeping the scheduling settings."""
+        return self.model_copy(update={"model": self.model.bind_tools(tools, **kwargs)})
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if stop is not None:
+            kwargs["stop"] = stop
+
+        estimated = estimate_tokens(messages)
+        with self.scheduler.acquire(self.priority, self.tenant, estimated):
+            try:
+                message = invoke_nested(self.model, messages, run_manager, **kwargs)
+            except Exception as e:
+                self._record_error(e)
+                raise
+
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            self.scheduler.record_usage(estimated, usage["total_tokens"])
+        if not isinstance(message, AIMessage):
+            message = AIMessage(content=message.content)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if stop is not None:
+            kwargs["stop"] = stop
+
+        estimated = estimate_tokens(messages)
+        used = 0
+        # The slot is held until the stream ends or its consumer stops reading
+        with self.scheduler.acquire(self.priority, self.tenant, estimated):
+            try:
+                for chunk in stream_nested(self.model, messages, run_manager, **kwargs):
+                    usage = getattr(chunk.message, "usage_metadata", None)
+                    if usage:
+                        used += usage["total_tokens"]
+                    yield chunk
+            except Exception as e:
+                self._record_error(e)
+                raise
+
+        if used:
+            self.scheduler.record_usage(estimated, used)
+
+    def _record_error(self, error: Exception) -> None:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            self.scheduler.record_rate_limited(retry_after)
+
+
+_scheduler: LLMScheduler | None = None
+
+
+def configure_scheduler(**kwargs: Any) -> LLMScheduler:
+    """Install the process-wide scheduler.
+
+    Args:
+        **kwargs: LLMScheduler arguments
+
+    Returns:
+        The new scheduler
+    """
+    global _scheduler
+    _scheduler = LLMScheduler(**kwargs)
+    return _scheduler
+
+
+def get_scheduler() -> LLMScheduler | None:
+    """Return the process-wide scheduler, or None if none is configured."""
+    return _scheduler
+
+
+def reset_scheduler() -> None:
+    """Remove the process-wide scheduler."""
+    global _scheduler
+    _scheduler = None
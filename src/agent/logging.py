@@ -1,33 +1,204 @@
-"""Logging configuration for the agent."""
+"""Logging configuration for the agent.
 
+Two output formats are available: a colored console format for development
+and one JSON object per line for production (``LOG_FORMAT=json``). With
+``queue=True``, the default for JSON, records are handed to a background
+thread for writing, so graph node threads never block on stdout.
+
+Disabled levels are dropped before any processor runs; wrap expensive
+fields in ``lazy`` or ``preview`` so they are only computed for events that
+are actually emitted.
+"""
+
+import atexit
 import logging
+import os
+import queue as queue_module
 import sys
+import threading
+from collections import defaultdict
+from collections.abc import Callable, MutableMapping
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
 
 import structlog
 
+LOG_FORMATS = ("console", "json")
+
+_handler: logging.Handler | None = None
+_listener: QueueListener | None = None
+
+
+class lazy:
+    """Log field computed only if the event is emitted.
+
+    Example:
+        logger.debug("Plan step", description=lazy(str.upper, step.description))
+    """
+
+    __slots__ = ("args", "func")
+
+    def __init__(self, func: Callable[..., Any], *args: Any):
+        """Initialize the field.
+
+        Args:
+            func: Function computing the value
+            *args: Arguments passed to func
+        """
+        self.func = func
+        self.args = args
+
+    def __call__(self) -> Any:
+        return self.func(*self.args)
+
+    def __repr__(self) -> str:
+        return repr(self())
+
+
+def _truncate(value: Any, limit: int) -> str:
+    return str(value)[:limit]
+
+
+def preview(value: Any, limit: int = 100) -> lazy:
+    """Lazily truncated string form of a value, for log fields.
+
+    Args:
+        value: Value to preview
+        limit: Maximum number of characters
+
+    Returns:
+        Lazy field
+    """
+    return lazy(_truncate, value, limit)
+
+
+def resolve_lazy_fields(
+    logger: Any, method_name: str, event_dict: MutableMapping[str, Any]
+) -> MutableMapping[str, Any]:
+    """Processor that evaluates ``lazy`` fields of emitted events."""
+    for key, value in event_dict.items():
+        if isinstance(value, lazy):
+            event_dict[key] = value()
+    return event_dict
+
+
+class EventSampler:
+    """Processor that keeps a fraction of high-volume events.
 
-def setup_logging(level: str = "INFO") -> None:
+    Sampling is deterministic: an event is kept whenever fewer than ``rate``
+    of its occurrences so far have been, so rate 0.1 keeps the 1st, 11th,
+    21st... and rate 0.4 keeps exactly 2 of every 5. Kept events carry a
+    ``sample_rate`` field so counts can be scaled back up. Warnings and
+    errors are never sampled.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        """Initialize the sampler.
+
+        Args:
+            rates: Fraction of events kept (0 to 1), keyed by event name
+        """
+        self.rates = rates
+        self._seen: dict[str, int] = defaultdict(int)
+        self._kept: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __call__(
+        self, logger: Any, method_name: str, event_dict: MutableMapping[str, Any]
+    ) -> MutableMapping[str, Any]:
+        event = event_dict.get("event")
+        if not isinstance(event, str):
+            return event_dict
+        rate = self.rates.get(event)
+        if rate is None or rate >= 1 or method_name in ("warning", "error", "critical"):
+            return event_dict
+        if rate <= 0:
+            raise structlog.DropEvent
+        with self._lock:
+            self._seen[event] += 1
+            # The tolerance keeps float error from adding a kept event
+            keep = self._kept[event] < rate * self._seen[event] - 1e-9
+            if keep:
+                self._kept[event] += 1
+        if not keep:
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str | None = None,
+    queue: bool | None = None,
+    sample_rates: dict[str, float] | None = None,
+) -> None:
     """Configure structured logging for the agent.
 
     Args:
         level: Log level (DEBUG, INFO, WARNING, ERROR)
+        fmt: 'console' or 'json' (defaults to the LOG_FORMAT environment
+             variable, then 'console')
+        queue: Write records from a background thread instead of the
+               logging thread (defaults to True for JSON output)
+        sample_rates: Fraction of events kept, keyed by event name
+
+    Raises:
+        ValueError: If fmt is not a known format
     """
-    # Configure standard logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, level.upper()),
-    )
+    fmt = fmt or os.environ.get("LOG_FORMAT", "console")
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format: {fmt!r} (use one of {LOG_FORMATS})")
+
+    if queue is None:
+        queue = fmt == "json"
+
+    # Configure standard logging, replacing the handler of a previous call
+    global _handler, _listener
+    root = logging.getLogger()
+    _stop_listener()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    handler: logging.Handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    if queue:
+        records: queue_module.SimpleQueue[logging.LogRecord] = queue_module.SimpleQueue()
+        _listener = QueueListener(records, handler)
+        _listener.start()
+        handler = QueueHandler(records)
+    _handler = handler
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, level.upper()))
 
     # Configure structlog
-    structlog.configure(
-        processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
+    processors: list[Any] = [structlog.stdlib.filter_by_level]
+    if sample_rates:
+        processors.append(EventSampler(sample_rates))
+    processors += [
+        resolve_lazy_fields,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+    ]
+    if fmt == "json":
+        processors += [
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(default=str),
+        ]
+    else:
+        processors += [
             structlog.processors.TimeStamper(fmt="%H:%M:%S"),
             structlog.dev.ConsoleRenderer(colors=True),
-        ],
+        ]
+
+    structlog.configure(
+        processors=processors,
         wrapper_class=structlog.stdlib.BoundLogger,
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
@@ -35,6 +206,20 @@ def setup_logging(level: str = "INFO") -> None:
     )
 
 
+atexit.register(_stop_listener)
+
+
+def debug_enabled(name: str) -> bool:
+    """Whether DEBUG events of a logger are emitted.
+
+    Use it to skip building debug-only data, e.g. loops that log per item.
+
+    Args:
+        name: Logger name (typically module name)
+    """
+    return logging.getLogger(name).isEnabledFor(logging.DEBUG)
+
+
 def get_logger(name: str) -> structlog.stdlib.BoundLogger:
     """Get a logger instance.
 
@@ -0,0 +1,497 @@
+"""In-process metrics for graph nodes, LLM calls and tool calls.
+
+Observations go to a process-wide registry, exposed as Prometheus text by
+``render_prometheus``, and to the collector of the current run (see
+``collect_run``), which ``CodeAgent.run_detailed`` returns as a per-run
+summary. ``MetricsCallbackHandler`` feeds both from LangChain callbacks.
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Labels, extra: tuple[str, str] | None = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _Histogram:
+    """Bucketed observations for one label set."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters and histograms keyed by name and labels."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._help: dict[str, tuple[str, str]] = {}
+        self._counters: dict[str, dict[Labels, float]] = defaultdict(dict)
+        self._histograms: dict[str, dict[Labels, _Histogram]] = defaultdict(dict)
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        """Register a metric's type ('counter' or 'histogram') and help text."""
+        with self._lock:
+            self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        """Increase a counter."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record a histogram observation."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms[name]
+            if key not in series:
+                series[key] = _Histogram(LATENCY_BUCKETS)
+            series[key].observe(value)
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        """Return a counter's current value (0 if never increased)."""
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0.0)
+
+    def histogram_count(self, name: str, **labels: str) -> int:
+        """Return the number of observations in a histogram series."""
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(_labels(labels))
+            return histogram.count if histogram else 0
+
+    def reset(self) -> None:
+        """Drop all recorded values, keeping metric descriptions."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+        with self._lock:
+            names = sorted(set(self._counters) | set(self._histograms))
+            for name in names:
+                kind, help_text = self._help.get(name, ("untyped", ""))
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+                for labels, value in sorted(self._counters.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+                for labels, histogram in sorted(self._histograms.get(name, {}).items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts, strict=True):
+                        cumulative += count
+                        le = _format_labels(labels, ("le", _format_value(bound)))
+                        lines.append(f"{name}_bucket{le} {cumulative}")
+                    le = _format_labels(labels, ("le", "+Inf"))
+                    lines.append(f"{name}_bucket{le} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum!r}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+REGISTRY = MetricsRegistry()
+
+for _name, _kind, _help in (
+    ("agent_runs_total", "counter", "Agent runs by mode and status"),
+    ("agent_routes_total", "counter", "Auto-mode routing decisions by mode and rule"),
+    ("agent_run_duration_seconds", "histogram", "Agent run wall time"),
+    ("agent_node_duration_seconds", "histogram", "Graph node wall time"),
+    ("agent_llm_calls_total", "counter", "LLM calls by model and status"),
+    ("agent_llm_duration_seconds", "histogram", "LLM call wall time"),
+    ("agent_llm_tokens_total", "counter", "LLM tokens by model and kind (input, output, cached)"),
+    ("agent_tool_calls_total", "counter", "Tool calls by tool and status"),
+    ("agent_tool_duration_seconds", "histogram", "Tool call wall time"),
+    ("agent_tool_wait_seconds", "histogram", "Time tool calls waited for a thread and slot"),
+    ("agent_tool_limits_total", "counter", "Tool calls cut short by tool and limit"),
+    ("agent_replans_total", "counter", "Replanner invocations"),
+    ("agent_retries_total", "counter", "Retried or duplicated LLM requests by kind"),
+    ("agent_cache_requests_total", "counter", "Cache lookups by cache and result (hit, miss)"),
+):
+    REGISTRY.describe(_name, _kind, _help)
+
+
+class RunMetrics:
+    """Metrics collected during a single agent run."""
+
+    def __init__(self) -> None:
+        """Initialize an empty collector."""
+        self._lock = threading.Lock()
+        self.node_seconds: dict[str, list[float]] = defaultdict(list)
+        self.llm_calls = 0
+        self.llm_errors = 0
+        self.llm_seconds = 0.0
+        self.tokens = {"input": 0, "output": 0, "cached": 0}
+        self.tool_calls = 0
+        self.tool_errors = 0
+        self.tool_seconds = 0.0
+        self.tool_limits: dict[str, int] = defaultdict(int)
+        self.replans = 0
+        self.retries: dict[str, int] = defaultdict(int)
+        self.cache: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+
+    def summary(self) -> dict[str, Any]:
+        """Summarize the run.
+
+        Returns:
+            Per-node timings, LLM and tool totals, token counts, tool calls
+            cut short by limits, replans, retries and cache hit rates
+        """
+        with self._lock:
+            input_tokens = self.tokens["input"]
+            return {
+                "nodes": {
+                    node: {"count": len(durations), "total_s": round(sum(durations), 4)}
+                    for node, durations in sorted(self.node_seconds.items())
+                },
+                "llm": {
+                    "calls": self.llm_calls,
+                    "errors": self.llm_errors,
+                    "total_s": round(self.llm_seconds, 4),
+                },
+                "tokens": dict(self.tokens),
+                "prompt_cache_hit_rate": (
+                    round(self.tokens["cached"] / input_tokens, 4) if input_tokens else None
+                ),
+                "tools": {
+                    "calls": self.tool_calls,
+                    "errors": self.tool_errors,
+                    "total_s": round(self.tool_seconds, 4),
+                },
+                "tool_limits": dict(self.tool_limits),
+                "replans": self.replans,
+                "retries": dict(self.retries),
+                "cache_hit_rates": {
+                    name: round(hits / (hits + misses), 4)
+                    for name, (hits, misses) in sorted(self.cache.items())
+                    if hits + misses
+                },
+            }
+
+
+_current_run: ContextVar[RunMetrics | None] = ContextVar("current_run_metrics", default=None)
+
+
+@contextmanager
+def collect_run() -> Iterator[RunMetrics]:
+    """Collect metrics recorded in this context into a new RunMetrics."""
+    run = RunMetrics()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        try:
+            _current_run.reset(token)
+        except ValueError:
+            # A streaming generator closed from another context
+            _current_run.set(None)
+
+
+def observe_node(node: str, seconds: float) -> None:
+    """Record one graph node execution."""
+    REGISTRY.observe("agent_node_duration_seconds", seconds, node=node)
+    run = _current_run.get()
+    if run is not None:
+        with run._lock:
+            run.node_seconds[node].append(seconds)
+
+
+def observe_llm_call(
+    model: str, seconds: float, usage: dict[str, int] | None = None, error: bool = False
+) -> None:
+    """Record one LLM call.
+
+    Args:
+        model: Model name
+        seconds: Call wall time
+        usage: Token counts with 'input', 'output' and 'cached' keys
+        error: Whether the call failed
+    """
+    REGISTRY.inc("agent_llm_calls_total", model=model, status="error" if error else "ok")
+    REGISTRY.observe("agent_llm_duration_seconds", seconds, model=model)
+    for kind, count in (usage or {}).items():
+        if count:
+            REGISTRY.inc("agent_llm_tokens_total", count, model=model, kind=kind)
+
+    run = _current_run.get()
+    if run is not None:
+        with run._lock:
+            run.llm_calls += 1
+            run.llm_errors += error
+            run.llm_seconds += seconds
+            for kind, count in (usage or {}).items():
+                run.tokens[kind] = run.tokens.get(kind, 0) + count
+
+
+def observe_tool_call(tool: str, seconds: float, error: bool = False) -> None:
+    """Record one tool call."""
+    REGISTRY.inc("agent_tool_calls_total", tool=tool, status="error" if error else "ok")
+    REGISTRY.observe("agent_tool_duration_seconds", seconds, tool=tool)
+    run = _current_run.get()
+    if run is not None:
+        with run._lock:
+            run.tool_calls += 1
+            run.tool_errors += error
+            run.tool_seconds += seconds
+
+
+def observe_tool_wait(tool: str, seconds: float) -> None:
+    """Record how long a tool call waited before it started running."""
+    REGISTRY.observe("agent_tool_wait_seconds", seconds, tool=tool)
+
+
+def record_tool_limit(tool: str, limit: str) -> None:
+    """Count a tool call cut short by an execution limit.
+
+    Args:
+        tool: Tool name
+        limit: 'timeout', 'queue_timeout' or 'truncated'
+    """
+    REGISTRY.inc("agent_tool_limits_total", tool=tool, limit=limit)
+    run = _current_run.get()
+    if run is not None:
+        with run._lock:
+            run.tool_limits[limit] += 1
+
+
+def record_replan() -> None:
+    """Count a replanner invocation."""
+    REGISTRY.inc("agent_replans_total")
+    run = _current_run.get()
+    if run is not None:
+        with run._lock:
+            run.replans += 1
+
+
+def record_retry(kind: str) -> None:
+    """Count a retried or duplicated LLM request.
+
+    Args:
+        kind: Why the request was repeated, e.g. 'llm', 'executor_fallback',
+              'router_failover' or 'router_hedge'
+    """
+    REGISTRY.inc("agent_retries_total", kind=kind)
+    run = _current_run.get()
+    if run is not None:
+        with run._lock:
+            run.retries[kind] += 1
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup.
+
+    Args:
+        cache: Cache name
+        hit: Whether the lookup was served from the cache
+    """
+    REGISTRY.inc("agent_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+    run = _current_run.get()
+    if run is not None:
+        with run._lock:
+            run.cache[cache][0 if hit else 1] += 1
+
+
+def record_route(mode: str, rule: str) -> None:
+    """Count an auto-mode routing decision.
+
+    Args:
+        mode: Mode the request was routed to
+        rule: Classifier rule that decided it
+    """
+    REGISTRY.inc("agent_routes_total", mode=mode, rule=rule)
+
+
+def observe_run(mode: str, seconds: float, status: str = "ok") -> None:
+    """Record one agent run.
+
+    Args:
+        mode: Agent mode
+        seconds: Run duration
+        status: 'ok', 'error', or why the run was stopped early
+    """
+    REGISTRY.inc("agent_runs_total", mode=mode, status=status)
+    REGISTRY.observe("agent_run_duration_seconds", seconds, mode=mode)
+
+
+def render_prometheus() -> str:
+    """Render the process-wide metrics in the Prometheus text format."""
+    return REGISTRY.render()
+
+
+def _usage(response: LLMResult) -> dict[str, int]:
+    """Extract input, output and cached-input token counts from an LLM result."""
+    usage = {"input": 0, "output": 0, "cached": 0}
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if not metadata:
+                continue
+            usage["input"] += metadata.get("input_tokens", 0)
+            usage["output"] += metadata.get("output_tokens", 0)
+            details = metadata.get("input_token_details") or {}
+            usage["cached"] += details.get("cache_read", 0)
+    return usage
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler that records node, LLM and tool metrics.
+
+    Graph nodes are recognised by LangGraph's ``langgraph_node`` metadata.
+    When a model wraps other models (router, scheduler) only the innermost
+    calls are recorded, so tokens are not counted twice.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the handler."""
+        self._nodes: dict[UUID, tuple[str, float]] = {}
+        self._llms: dict[UUID, tuple[str, float]] = {}
+        self._wrappers: set[UUID] = set()
+        self._tools: dict[UUID, tuple[str, float]] = {}
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Runnables inside a node inherit its metadata; only time the node itself
+        if node is not None and kwargs.get("name") == node:
+            self._nodes[run_id] = (node, time.perf_counter())
+
+    def _end_node(self, run_id: UUID) -> None:
+        started = self._nodes.pop(run_id, None)
+        if started is not None:
+            node, start = started
+            observe_node(node, time.perf_counter() - start)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_node(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_node(run_id)
+
+    def _start_llm(
+        self, run_id: UUID, parent_run_id: UUID | None, metadata: dict[str, Any] | None
+    ) -> None:
+        if parent_run_id in self._llms:
+            self._wrappers.add(parent_run_id)
+        model = (metadata or {}).get("ls_model_name") or "unknown"
+        self._llms[run_id] = (str(model), time.perf_counter())
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start_llm(run_id, parent_run_id, metadata)
+
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any],
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start_llm(run_id, parent_run_id, metadata)
+
+    def _end_llm(self, run_id: UUID, response: LLMResult | None) -> None:
+        started = self._llms.pop(run_id, None)
+        if started is None or run_id in self._wrappers:
+            self._wrappers.discard(run_id)
+            return
+        model, start = started
+        observe_llm_call(
+            model,
+            time.perf_counter() - start,
+            usage=_usage(response) if response is not None else None,
+            error=response is None,
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_llm(run_id, response)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_llm(run_id, None)
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        record_retry("llm")
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._tools[run_id] = (str(name), time.perf_counter())
+
+    def _end_tool(self, run_id: UUID, error: bool) -> None:
+        started = self._tools.pop(run_id, None)
+        if started is not None:
+            tool, start = started
+            observe_tool_call(tool, time.perf_counter() - start, error=error)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        # File tools report failures as "Error: ..." results rather than raising
+        content = str(getattr(output, "content", output))
+        failed = getattr(output, "status", "success") == "error" or content.startswith("Error")
+        self._end_tool(run_id, error=failed)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id, error=True)
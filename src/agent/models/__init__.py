@@ -1,5 +1,6 @@
 """Models package for agent data structures."""
 
 from .plan import Plan, PlanStep
+from .repair import PlanRepair, plan_actions, repair_plan
 
-__all__ = ["Plan", "PlanStep"]
+__all__ = ["Plan", "PlanRepair", "PlanStep", "plan_actions", "repair_plan"]
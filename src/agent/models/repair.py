@@ -0,0 +1,248 @@
+"""Local validation and repair of LLM-generated plans.
+
+Structured output from the planner is often almost right: an action spelled
+``read`` or ``ReadFile``, steps numbered from 0 or with gaps, a missing
+``expected_output``, JSON cut off after the last step. ``repair_plan`` fixes
+what it can without another LLM call and reports the rest, so the planner
+only asks the LLM again about problems that need it.
+"""
+
+import difflib
+import json
+import re
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.utils.json import parse_partial_json
+from pydantic import ValidationError
+
+from .plan import Plan, PlanStep
+
+VALID_ACTIONS = ("read_file", "write_file", "list_directory", "analyze")  # Built-in actions
+MAX_STEPS = 7
+
+ACTION_ALIASES = {
+    "read": "read_file",
+    "cat": "read_file",
+    "open": "read_file",
+    "open_file": "read_file",
+    "view_file": "read_file",
+    "load_file": "read_file",
+    "write": "write_file",
+    "create_file": "write_file",
+    "save_file": "write_file",
+    "edit_file": "write_file",
+    "update_file": "write_file",
+    "modify_file": "write_file",
+    "list": "list_directory",
+    "ls": "list_directory",
+    "list_dir": "list_directory",
+    "list_files": "list_directory",
+    "list_directories": "list_directory",
+    "analyse": "analyze",
+    "analysis": "analyze",
+    "think": "analyze",
+    "summarize": "analyze",
+    "review": "analyze",
+}
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z])(?=[A-Z])")
+
+
+@dataclass
+class PlanRepair:
+    """Outcome of validating and repairing a plan."""
+
+    plan: Plan | None
+    fixes: list[str] = field(default_factory=list)  # Changes made locally
+    problems: list[str] = field(default_factory=list)  # Issues that need the LLM
+
+    @property
+    def ok(self) -> bool:
+        """Whether the plan is valid as repaired."""
+        return self.plan is not None and not self.problems
+
+
+def plan_actions(tool_names: Collection[str] = ()) -> tuple[str, ...]:
+    """Return the actions a plan may use: the built-in ones and the agent's tools."""
+    return tuple(dict.fromkeys([*VALID_ACTIONS, *tool_names]))
+
+
+def normalize_action(action: Any, actions: Collection[str] = VALID_ACTIONS) -> str | None:
+    """Map an action name to one of ``actions``.
+
+    Accepts different casing and separators, common synonyms and small
+    misspellings.
+
+    Args:
+        action: Action as produced by the LLM
+        actions: Valid actions
+
+    Returns:
+        The valid action, or None if it cannot be recognized
+    """
+    if not isinstance(action, str):
+        return None
+    if action in actions:
+        return action
+    name = _CAMEL_BOUNDARY.sub("_", action.strip()).lower()
+    name = re.sub(r"[\s\-.]+", "_", name).strip("_")
+    aliases = {alias: target for alias, target in ACTION_ALIASES.items() if target in actions}
+    if name in actions:
+        return name
+    if name in aliases:
+        return aliases[name]
+    close = difflib.get_close_matches(name, [*actions, *aliases], n=1, cutoff=0.8)
+    if close:
+        return aliases.get(close[0], close[0])
+    return None
+
+
+def _load(raw: Any) -> tuple[dict[str, Any] | None, list[str]]:
+    """Turn LLM output into a plan dict, fixing fenced or truncated JSON."""
+    if isinstance(raw, Plan):
+        return raw.model_dump(), []
+    if isinstance(raw, dict):
+        return raw, []
+    if not isinstance(raw, str):
+        return None, []
+    text = _CODE_FENCE.sub("", raw.strip())
+    try:
+        data = json.loads(text)
+        fixes = ["removed code fence"] if text != raw.strip() else []
+    except json.JSONDecodeError:
+        try:
+            data = parse_partial_json(text)
+        except json.JSONDecodeError:
+            return None, []
+        fixes = ["completed truncated JSON"]
+    return (data, fixes) if isinstance(data, dict) else (None, [])
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def repair_plan(
+    raw: Any,
+    goal: str = "",
+    actions: Collection[str] = VALID_ACTIONS,
+    max_steps: int = MAX_STEPS,
+    allow_empty: bool = False,
+) -> PlanRepair:
+    """Validate a plan and repair what can be fixed locally.
+
+    Fixes: fenced or truncated JSON, a missing goal or reasoning, misspelled
+    or aliased actions, missing step fields, empty steps and step numbering.
+    Problems left for the LLM: output that is not a plan at all, plans
+    without steps (unless ``allow_empty``), actions that cannot be recognized
+    and plans longer than ``max_steps``.
+
+    Args:
+        raw: Plan, plan dict or JSON text
+        goal: The user's request, used when the plan has no goal
+        actions: Valid actions, see ``plan_actions``
+        max_steps: Maximum number of steps
+        allow_empty: Accept a plan without steps, as a replan of a goal
+                     that needs no more work
+
+    Returns:
+        The repaired plan (None if nothing usable was produced), the fixes
+        applied and the problems remaining
+    """
+    data, fixes = _load(raw)
+    if data is None:
+        return PlanRepair(None, problems=["output is not a JSON plan object"])
+
+    raw_steps = data.get("steps")
+    if raw_steps is None:
+        raw_steps = []
+        fixes.append("added missing steps list")
+    if not isinstance(raw_steps, list):
+        return PlanRepair(None, fixes, ["'steps' is not a list"])
+
+    problems: list[str] = []
+    steps: list[PlanStep] = []
+    for index, raw_step in enumerate(raw_steps, start=1):
+        if not isinstance(raw_step, dict):
+            fixes.append(f"dropped step {index}: not an object")
+            continue
+        action_text = _text(raw_step.get("action")).strip()
+        description = _text(raw_step.get("description")).strip()
+        if not action_text and not description:
+            fixes.append(f"dropped empty step {index}")
+            continue
+
+        action = normalize_action(action_text, actions)
+        if action is None:
+            problems.append(
+                f"step {len(steps) + 1}: unknown action {action_text!r}, "
+                f"use one of {', '.join(actions)}"
+            )
+            action = action_text
+        elif action != action_text:
+            fixes.append(f"step {len(steps) + 1}: action {action_text!r} -> {action!r}")
+
+        input_data = _text(raw_step.get("input_data")).strip()
+        if not description:
+            description = f"{action} {input_data}".strip()
+            fixes.append(f"step {len(steps) + 1}: added description")
+        steps.append(
+            PlanStep(
+                step_number=len(steps) + 1,
+                action=action,
+                description=description,
+                input_data=input_data,
+                expected_output=_text(raw_step.get("expected_output")).strip(),
+            )
+        )
+
+    numbers = [step.get("step_number") for step in raw_steps if isinstance(step, dict)]
+    if numbers != list(range(1, len(numbers) + 1)):
+        fixes.append("renumbered steps")
+    if raw_steps and not steps:
+        problems.append("plan has no usable steps")
+    elif not raw_steps and not allow_empty:
+        problems.append("plan has no steps")
+    if len(steps) > max_steps:
+        problems.append(f"plan has {len(steps)} steps, at most {max_steps} are allowed")
+
+    plan_goal = _text(data.get("goal")).strip()
+    if not plan_goal:
+        plan_goal = goal
+        fixes.append("filled in missing goal")
+    try:
+        plan = Plan(goal=plan_goal, reasoning=_text(data.get("reasoning")), steps=steps)
+    except ValidationError as e:
+        return PlanRepair(None, fixes, [*problems, str(e)])
+    return PlanRepair(plan, fixes, problems)
+
+
+def force_valid(
+    repair: PlanRepair, actions: Collection[str] = VALID_ACTIONS, max_steps: int = MAX_STEPS
+) -> Plan | None:
+    """Make a plan valid by dropping what could not be repaired.
+
+    The last resort once the LLM could not fix the problems either: steps
+    with unknown actions become 'analyze' steps and the plan is cut to
+    ``max_steps``, leaving the rest to the replanner.
+
+    Args:
+        repair: Result of ``repair_plan``
+        actions: Valid actions
+        max_steps: Maximum number of steps
+
+    Returns:
+        A valid plan, or None if there is no plan at all
+    """
+    if repair.plan is None:
+        return None
+    steps = [
+        step if step.action in actions else step.model_copy(update={"action": "analyze"})
+        for step in repair.plan.steps[:max_steps]
+    ]
+    return repair.plan.model_copy(update={"steps": steps})
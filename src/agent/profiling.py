@@ -0,0 +1,417 @@
+"""On-demand CPU and memory profiling of agent runs.
+
+Enable with ``CodeAgent(profile=...)`` or environment variables:
+
+    BSAI_PROFILE=cprofile|sampling   Profiler to use (unset or empty: off)
+    BSAI_PROFILE_DIR=profiles        Output directory
+    BSAI_PROFILE_EVERY=1             Profile every Nth run
+    BSAI_PROFILE_MEMORY=1            Also trace allocations with tracemalloc
+
+Each profiled run writes, under a common file prefix:
+
+- ``.pstats`` (cProfile) or ``.collapsed`` (sampling; one ``stack count``
+  line per stack, for flamegraph.pl or speedscope)
+- ``.memory.txt``: top allocation sites of the run (with memory tracing)
+- ``.summary.json``: wall time and net allocations per graph node and tool
+
+cProfile only sees the thread that started the run; the sampling profiler
+samples every thread and prefixes each stack with the node and tool that
+was active on that thread. cProfile profiles one run at a time in a process,
+so a run that overlaps another cProfile'd run is sampled instead.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from types import FrameType
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+
+@dataclass(frozen=True)
+class ProfileConfig:
+    """How and how often runs are profiled."""
+
+    mode: str = "cprofile"
+    output_dir: str = "profiles"
+    every: int = 1
+    memory: bool = True
+    interval: float = 0.005  # Sampling period in seconds
+    top: int = 25  # Allocation sites listed in the memory report
+
+    def __post_init__(self) -> None:
+        if self.mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {self.mode!r} (use one of {PROFILE_MODES})")
+        if self.every < 1:
+            raise ValueError("every must be at least 1")
+
+
+def profile_config_from_env() -> ProfileConfig | None:
+    """Build a ProfileConfig from BSAI_PROFILE* variables.
+
+    Returns:
+        The configuration, or None if profiling is not enabled
+    """
+    mode = os.environ.get("BSAI_PROFILE", "").strip().lower()
+    if not mode or mode in ("0", "false", "off"):
+        return None
+    if mode in ("1", "true", "on"):
+        mode = "cprofile"
+    return ProfileConfig(
+        mode=mode,
+        output_dir=os.environ.get("BSAI_PROFILE_DIR", "profiles"),
+        every=int(os.environ.get("BSAI_PROFILE_EVERY", "1")),
+        memory=os.environ.get("BSAI_PROFILE_MEMORY", "1") not in ("0", "false", "off"),
+    )
+
+
+class ActivityTracker(BaseCallbackHandler):
+    """Callback handler tracking the node and tool active on each thread.
+
+    Accumulates wall time and, while tracemalloc is tracing, the net memory
+    allocated per node and per tool.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the tracker."""
+        self._lock = threading.Lock()
+        self._active: dict[int, list[str]] = defaultdict(list)
+        self._open: dict[UUID, tuple[int, str, float, int]] = {}
+        self.seconds: dict[str, float] = defaultdict(float)
+        self.allocated: dict[str, int] = defaultdict(int)
+        self.calls: dict[str, int] = defaultdict(int)
+
+    def labels(self, thread_id: int) -> list[str]:
+        """Return the node/tool labels active on a thread, outermost first."""
+        with self._lock:
+            return list(self._active.get(thread_id, ()))
+
+    def _push(self, run_id: UUID, label: str) -> None:
+        thread_id = threading.get_ident()
+        memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        with self._lock:
+            self._active[thread_id].append(label)
+            self._open[run_id] = (thread_id, label, time.perf_counter(), memory)
+
+    def _pop(self, run_id: UUID) -> None:
+        with self._lock:
+            opened = self._open.pop(run_id, None)
+            if opened is None:
+                return
+            thread_id, label, start, memory = opened
+            stack = self._active[thread_id]
+            if label in stack:
+                stack.reverse()
+                stack.remove(label)
+                stack.reverse()
+            self.seconds[label] += time.perf_counter() - start
+            self.calls[label] += 1
+            if tracemalloc.is_tracing():
+                self.allocated[label] += tracemalloc.get_traced_memory()[0] - memory
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Runnables inside a node inherit its metadata; only track the node itself
+        if node is not None and kwargs.get("name") == node:
+            self._push(run_id, f"node:{node}")
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._pop(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._pop(run_id)
+
+    def on_tool_start(
+        self, serialized: dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._push(run_id, f"tool:{name}")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._pop(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._pop(run_id)
+
+    def summary(self) -> dict[str, Any]:
+        """Return wall time, calls and net allocations per node and tool."""
+        with self._lock:
+            by_kind: dict[str, dict[str, Any]] = {"nodes": {}, "tools": {}}
+            for label, seconds in sorted(self.seconds.items()):
+                kind, name = label.split(":", 1)
+                entry = {"calls": self.calls[label], "seconds": round(seconds, 6)}
+                if label in self.allocated:
+                    entry["allocated_kb"] = round(self.allocated[label] / 1024, 1)
+                by_kind["nodes" if kind == "node" else "tools"][name] = entry
+            return by_kind
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads at a fixed interval.
+
+    Stacks are stored collapsed (root first, ';'-separated), prefixed with
+    the thread's active node and tool labels when a tracker is given.
+    """
+
+    def __init__(self, interval: float = 0.005, tracker: ActivityTracker | None = None):
+        """Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+            tracker: Activity tracker used to label samples
+        """
+        self.interval = interval
+        self.tracker = tracker
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            frames: list[str] = []
+            current: FrameType | None = frame
+            while current is not None:
+                frames.append(_frame_label(current))
+                current = current.f_back
+            frames.reverse()
+            labels = self.tracker.labels(thread_id) if self.tracker else []
+            thread = names.get(thread_id, str(thread_id))
+            self.stacks[";".join([thread, *labels, *frames])] += 1
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        """Start sampling on a background thread."""
+        self._thread = threading.Thread(target=self._loop, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path: str) -> None:
+        """Write samples in collapsed-stack format."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0  # Profiled runs currently using tracemalloc
+_tracing_owned = False  # Whether profiling started tracemalloc, rather than the user
+
+
+def _start_tracing() -> None:
+    """Start tracemalloc for a profiled run unless it is already tracing."""
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0:
+            _tracing_owned = not tracemalloc.is_tracing()
+            if _tracing_owned:
+                tracemalloc.start()
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    """Stop tracemalloc once the last profiled run using it has finished."""
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+_cprofile_lock = threading.Lock()  # Held by the run cProfile is profiling
+
+
+def _enable_cprofile() -> cProfile.Profile | None:
+    """Start cProfile for a run, or return None if another run is using it.
+
+    Python 3.12+ refuses a second active profiler, and earlier versions would
+    have it replace the first one on a shared thread.
+    """
+    if not _cprofile_lock.acquire(blocking=False):
+        return None
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:  # Another profiling tool, outside the agent, is active
+        _cprofile_lock.release()
+        return None
+    return profile
+
+
+def _disable_cprofile(profile: cProfile.Profile) -> None:
+    """Stop a profile started by ``_enable_cprofile``."""
+    try:
+        profile.disable()
+    finally:
+        _cprofile_lock.release()
+
+
+def _write_memory_report(path: str, start: tracemalloc.Snapshot, top: int) -> None:
+    """Write the allocation sites that grew the most since a snapshot."""
+    end = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    stats = end.compare_to(start, "lineno")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Traced memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+        f.write(f"Top {top} allocation sites by net growth during the run:\n\n")
+        for stat in stats[:top]:
+            f.write(f"{stat}\n")
+
+
+class RunProfiler:
+    """Profiles every Nth run according to a ProfileConfig."""
+
+    def __init__(self, config: ProfileConfig):
+        """Initialize the profiler.
+
+        Args:
+            config: Profiling settings
+        """
+        self.config = config
+        self._runs = 0
+        self._lock = threading.Lock()
+
+    def should_profile(self) -> tuple[bool, int]:
+        """Count a run and decide whether to profile it.
+
+        Returns:
+            Whether to profile, and the run's sequence number
+        """
+        with self._lock:
+            self._runs += 1
+            return (self._runs - 1) % self.config.every == 0, self._runs
+
+    def start(self, stack: ExitStack) -> "ProfileSession | None":
+        """Start profiling the current run if it is due.
+
+        Args:
+            stack: Exit stack that stops the session and writes its reports
+
+        Returns:
+            The active session, or None when this run is not profiled
+        """
+        due, number = self.should_profile()
+        if not due:
+            return None
+        session = ProfileSession(self.config, number)
+        stack.enter_context(session.active())
+        return session
+
+
+class ProfileSession:
+    """Profiling of a single run."""
+
+    def __init__(self, config: ProfileConfig, number: int):
+        """Initialize the session.
+
+        Args:
+            config: Profiling settings
+            number: Run sequence number, used in file names
+        """
+        self.config = config
+        self.tracker = ActivityTracker()
+        self.paths: list[str] = []
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.prefix = os.path.join(config.output_dir, f"run-{number:05d}-{stamp}-{os.getpid()}")
+
+    @contextmanager
+    def active(self) -> Iterator[None]:
+        """Profile the enclosed block and write reports when it exits."""
+        os.makedirs(self.config.output_dir, exist_ok=True)
+
+        mode = self.config.mode
+        tracing = False
+        snapshot = None
+        cpu: cProfile.Profile | None = None
+        sampler: SamplingProfiler | None = None
+        start = time.perf_counter()
+        try:
+            if self.config.memory:
+                _start_tracing()
+                tracing = True
+                snapshot = tracemalloc.take_snapshot()
+            if mode == "cprofile":
+                cpu = _enable_cprofile()
+                if cpu is None:
+                    logger.info("cProfile is busy with another run, sampling instead")
+                    mode = "sampling"
+            if mode == "sampling":
+                sampler = SamplingProfiler(self.config.interval, self.tracker)
+                sampler.start()
+            start = time.perf_counter()
+            yield
+        finally:
+            try:
+                self._write_reports(mode, time.perf_counter() - start, cpu, sampler, snapshot)
+            finally:
+                if tracing:
+                    _stop_tracing()
+
+    def _write_reports(
+        self,
+        mode: str,
+        duration: float,
+        cpu: cProfile.Profile | None,
+        sampler: SamplingProfiler | None,
+        snapshot: tracemalloc.Snapshot | None,
+    ) -> None:
+        """Stop the profilers of a finished run and write its reports."""
+        if cpu is not None:
+            _disable_cprofile(cpu)
+            cpu.dump_stats(self.prefix + ".pstats")
+            self.paths.append(self.prefix + ".pstats")
+        if sampler is not None:
+            sampler.stop()
+            sampler.write(self.prefix + ".collapsed")
+            self.paths.append(self.prefix + ".collapsed")
+        if snapshot is not None:
+            _write_memory_report(self.prefix + ".memory.txt", snapshot, self.config.top)
+            self.paths.append(self.prefix + ".memory.txt")
+
+        summary = {"mode": mode, "duration_s": round(duration, 6)}
+        summary.update(self.tracker.summary())
+        with open(self.prefix + ".summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        self.paths.append(self.prefix + ".summary.json")
+        logger.info("Run profiled", files=self.paths)
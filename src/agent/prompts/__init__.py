@@ -1,8 +1,10 @@
-"""Prompt loading utilities."""
+"""Prompt loading utilities.
 
-from pathlib import Path
+Prompts are read from prompts.yaml on first use, not at import time.
+"""
 
-import yaml
+from collections.abc import Callable
+from pathlib import Path
 
 _prompts_cache: dict[str, str] | None = None
 
@@ -17,6 +19,8 @@ def load_prompts() -> dict[str, str]:
     if _prompts_cache is not None:
         return _prompts_cache
 
+    import yaml
+
     prompts_file = Path(__file__).parent / "prompts.yaml"
     with open(prompts_file) as f:
         data = yaml.safe_load(f)
@@ -39,3 +43,25 @@ def get_prompt(name: str) -> str:
     """
     prompts = load_prompts()
     return prompts[name]
+
+
+def prompt_attributes(module: str, names: dict[str, str]) -> Callable[[str], str]:
+    """Build a module ``__getattr__`` that exposes prompts as lazy constants.
+
+    Example:
+        __getattr__ = prompt_attributes(__name__, {"SYSTEM_PROMPT": "system"})
+
+    Args:
+        module: Name of the module defining the constants
+        names: Prompt names keyed by constant name
+
+    Returns:
+        Function resolving a constant name to its prompt
+    """
+
+    def __getattr__(name: str) -> str:
+        if name in names:
+            return get_prompt(names[name])
+        raise AttributeError(f"module {module!r} has no attribute {name!r}")
+
+    return __getattr__
@@ -0,0 +1,281 @@
+"""Bounded, time-limited execution of tool calls.
+
+ToolEngine runs the tool calls of an AI message on a thread pool shared by
+every agent in the process. It replaces LangGraph's ToolNode in both graphs
+and in the lean runner, and adds:
+
+- A per-tool timeout, after which the call is reported to the LLM as an
+  error. A call that is still running keeps its thread, since Python threads
+  cannot be killed, but the step moves on. The timeout starts once the call
+  is running; a call waiting for a free slot gets the same time again before
+  it is given up on and reported as queued too long
+- A per-tool cap on concurrently running calls
+- A cap on the size of each result sent back to the LLM
+- Metrics: call latency through the run's callbacks as before, plus queue
+  wait time and counts of timed-out, queue-timed-out and truncated calls
+
+Bad calls (unknown tool, invalid arguments) and tools that raise are
+reported back to the LLM as error tool messages instead of failing the run.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import AIMessage, ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from pydantic import ValidationError
+
+from ..cancellation import check_cancelled, current_token
+from ..logging import get_logger
+from ..metrics import observe_tool_wait, record_tool_limit
+
+logger = get_logger(__name__)
+
+MAX_WORKERS = 32
+
+
+@dataclass(frozen=True)
+class ToolLimits:
+    """Execution limits for one tool."""
+
+    timeout: float | None = 30.0  # Seconds before the call is given up on
+    max_concurrency: int | None = None  # Calls of the tool running at once
+    max_output_chars: int = 20_000  # Longer results are truncated
+
+
+DEFAULT_LIMITS = ToolLimits()
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Return the shared thread pool tool calls run on."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="tools")
+        return _pool
+
+
+class _Start:
+    """Start of a submitted call, which is given up on if it waits too long."""
+
+    def __init__(self, timeout: float | None) -> None:
+        """Initialize the start.
+
+        Args:
+            timeout: Seconds from now the call may wait before it runs
+        """
+        self.started_at: float | None = None  # time.monotonic() once running
+        self.queued_until = time.monotonic() + timeout if timeout is not None else None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._abandoned = False
+
+    def begin(self) -> bool:
+        """Mark the call as running; False if it was given up on already."""
+        with self._lock:
+            now = time.monotonic()
+            if self.queued_until is not None and now > self.queued_until:
+                self._abandoned = True
+            if not self._abandoned:
+                self.started_at = now
+        self._event.set()
+        return not self._abandoned
+
+    def wait(self, timeout: float | None) -> float | None:
+        """Wait for the call to start and return when it did.
+
+        Returns None, and gives up on the call, if it has not started in time.
+        """
+        self._event.wait(timeout)
+        with self._lock:
+            if self.started_at is None:
+                self._abandoned = True
+            return self.started_at
+
+
+def _error_message(tool_call: ToolCall, content: str) -> ToolMessage:
+    return ToolMessage(
+        content=content,
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"] or "",
+        status="error",
+    )
+
+
+class ToolEngine:
+    """Executes tool calls with timeouts, concurrency caps and output limits."""
+
+    def __init__(
+        self,
+        tools: list[BaseTool],
+        limits: dict[str, ToolLimits] | None = None,
+        default_limits: ToolLimits = DEFAULT_LIMITS,
+    ):
+        """Initialize the engine.
+
+        Args:
+            tools: Tools the LLM may call
+            limits: Per-tool limits, keyed by tool name
+            default_limits: Limits for tools not in ``limits``
+        """
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.limits = limits or {}
+        self.default_limits = default_limits
+        self._slots = {
+            name: threading.BoundedSemaphore(tool_limits.max_concurrency)
+            for name, tool_limits in self.limits.items()
+            if tool_limits.max_concurrency
+        }
+        if default_limits.max_concurrency:
+            for name in self.tools_by_name.keys() - self.limits.keys():
+                self._slots[name] = threading.BoundedSemaphore(default_limits.max_concurrency)
+
+    def limits_for(self, name: str) -> ToolLimits:
+        """Return the limits that apply to a tool."""
+        return self.limits.get(name, self.default_limits)
+
+    def _invoke(self, tool_call: ToolCall, config: RunnableConfig | None) -> ToolMessage:
+        """Execute one tool call, reporting bad calls and failures back to the LLM."""
+        tool = self.tools_by_name.get(tool_call["name"])
+        if tool is None:
+            available = ", ".join(self.tools_by_name)
+            return _error_message(
+                tool_call,
+                f"Error: {tool_call['name']} is not a valid tool, try one of [{available}].",
+            )
+        try:
+            result = tool.invoke(tool_call, config)
+        except ValidationError as e:
+            return _error_message(
+                tool_call,
+                f"Error invoking tool '{tool_call['name']}' with kwargs "
+                f"{tool_call['args']} with error:\n {e}\n Please fix the error and try again.",
+            )
+        except Exception as e:
+            logger.warning("Tool failed", tool=tool_call["name"], error=str(e))
+            return _error_message(tool_call, f"Error: {type(e).__name__}: {e}")
+        if isinstance(result, ToolMessage):
+            return result
+        return ToolMessage(
+            content=str(result), name=tool_call["name"], tool_call_id=tool_call["id"] or ""
+        )
+
+    def _call(
+        self, tool_call: ToolCall, config: RunnableConfig | None, queued_at: float, start: _Start
+    ) -> ToolMessage | None:
+        """Run a tool call on a pool thread once the tool has a free slot.
+
+        Returns None without running the tool if it waited longer than its
+        timeout for the slot.
+        """
+        slot = self._slots.get(tool_call["name"])
+        if slot is not None:
+            slot.acquire()
+        try:
+            observe_tool_wait(tool_call["name"], time.perf_counter() - queued_at)
+            if not start.begin():
+                return None
+            check_cancelled()
+            return self._invoke(tool_call, config)
+        finally:
+            if slot is not None:
+                slot.release()
+
+    def _truncate(self, message: ToolMessage, limit: int) -> ToolMessage:
+        content = message.content
+        if not isinstance(content, str) or len(content) <= limit:
+            return message
+        record_tool_limit(message.name or "unknown", "truncated")
+        omitted = len(content) - limit
+        return message.model_copy(
+            update={"content": f"{content[:limit]}\n... [truncated {omitted} characters]"}
+        )
+
+    @staticmethod
+    def _wait_time(deadline: float | None) -> float | None:
+        """Seconds to wait for a deadline, capped at the time the run has left."""
+        wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+        token = current_token()
+        remaining = token.remaining() if token is not None else None
+        if remaining is not None:
+            wait = remaining if wait is None else min(wait, remaining)
+        return wait
+
+    def _result(
+        self,
+        tool_call: ToolCall,
+        future: Future[ToolMessage | None],
+        start: _Start,
+    ) -> ToolMessage:
+        """Wait for a submitted call until its timeout or the run's deadline.
+
+        The timeout counts from when the call starts running; waiting for a
+        free slot is limited separately, to the same number of seconds.
+        """
+        name = tool_call["name"]
+        timeout = self.limits_for(name).timeout
+        started_at = start.wait(self._wait_time(start.queued_until))
+        if started_at is None:
+            check_cancelled()
+            future.cancel()
+            record_tool_limit(name, "queue_timeout")
+            logger.warning("Tool queued too long", tool=name, timeout=timeout)
+            return _error_message(
+                tool_call, f"Error: {name} found no free slot within {timeout:g}s"
+            )
+        try:
+            message = future.result(
+                timeout=self._wait_time(None if timeout is None else started_at + timeout)
+            )
+        except FutureTimeoutError:
+            check_cancelled()
+            future.cancel()
+            record_tool_limit(name, "timeout")
+            logger.warning("Tool timed out", tool=name, timeout=timeout)
+            return _error_message(tool_call, f"Error: {name} timed out after {timeout:g}s")
+        if message is None:
+            raise RuntimeError(f"Tool call {tool_call['id']} started but returned no result")
+        return self._truncate(message, self.limits_for(name).max_output_chars)
+
+    def run(
+        self, tool_calls: list[ToolCall], config: RunnableConfig | None = None
+    ) -> list[ToolMessage]:
+        """Execute tool calls concurrently.
+
+        Args:
+            tool_calls: Calls from one AI message
+            config: Runnable config passed on to each tool, so the run's
+                    callbacks see every call
+
+        Returns:
+            One tool message per call, in the order of the calls
+        """
+        pool = _get_pool()
+        submitted = []
+        for tool_call in tool_calls:
+            start = _Start(self.limits_for(tool_call["name"]).timeout)
+            ctx = contextvars.copy_context()
+            future = pool.submit(ctx.run, self._call, tool_call, config, time.perf_counter(), start)
+            submitted.append((tool_call, future, start))
+        return [self._result(*item) for item in submitted]
+
+    def as_node(self) -> Any:
+        """Return a graph node that executes the tool calls of the last AI message."""
+
+        def tools_node(
+            state: dict[str, Any], config: RunnableConfig | None = None
+        ) -> dict[str, Any]:
+            last_msg = state["messages"][-1]
+            tool_calls = last_msg.tool_calls if isinstance(last_msg, AIMessage) else []
+            return {"messages": self.run(tool_calls, config)}
+
+        return tools_node
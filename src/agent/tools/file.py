@@ -1,20 +1,55 @@
 """File manipulation tools for the code agent."""
 
 import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 from langchain_core.tools import tool
 
+from .memo import memoized
+
 RESULT_PATH = "results"
 
+_workspace: ContextVar[str] = ContextVar("workspace", default=RESULT_PATH)
+
+
+def get_workspace() -> str:
+    """Return the directory file tools operate in for the current context."""
+    return _workspace.get()
+
+
+@contextmanager
+def use_workspace(path: str) -> Iterator[str]:
+    """Run file tools against another workspace directory within the block.
+
+    The setting is context-local, so concurrent runs in threads or asyncio
+    tasks can each use their own workspace.
+
+    Args:
+        path: Workspace directory, created if missing
+
+    Yields:
+        The workspace path
+    """
+    os.makedirs(path, exist_ok=True)
+    token = _workspace.set(path)
+    try:
+        yield path
+    finally:
+        _workspace.reset(token)
+
 
-def _resolve_path(path: str) -> str:
-    """Resolve path relative to RESULT_PATH, avoiding duplication."""
-    if path in (".", "", RESULT_PATH) or path.startswith(f"{RESULT_PATH}/"):
-        return RESULT_PATH if path in (".", "", RESULT_PATH) else path
-    return os.path.join(RESULT_PATH, path)
+def resolve_path(path: str) -> str:
+    """Resolve a tool path argument relative to the workspace, avoiding duplication."""
+    root = get_workspace()
+    if path in (".", "", root) or path.startswith(f"{root}/"):
+        return root if path in (".", "", root) else path
+    return os.path.join(root, path)
 
 
 @tool
+@memoized(resolve_path)
 def read_file(path: str) -> str:
     """Read and return the content of a file at the given path.
 
@@ -24,7 +59,7 @@ def read_file(path: str) -> str:
     Returns:
         The file content as a string
     """
-    path = _resolve_path(path)
+    path = resolve_path(path)
     try:
         with open(path, encoding="utf-8") as f:
             return f.read()
@@ -45,7 +80,7 @@ def write_file(path: str, content: str) -> str:
     Returns:
         Success message or error description
     """
-    path = _resolve_path(path)
+    path = resolve_path(path)
     try:
         with open(path, "w", encoding="utf-8") as f:
             f.write(content)
@@ -55,6 +90,7 @@ def write_file(path: str, content: str) -> str:
 
 
 @tool
+@memoized(resolve_path)
 def list_directory(path: str = ".") -> str:
     """List files and directories in the given path.
 
@@ -64,7 +100,7 @@ def list_directory(path: str = ".") -> str:
     Returns:
         Newline-separated list of files and directories
     """
-    path = _resolve_path(path)
+    path = resolve_path(path)
     try:
         entries = os.listdir(path)
         return "\n".join(sorted(entries))
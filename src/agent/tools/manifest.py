@@ -0,0 +1,229 @@
+"""Workspace manifest: what is in the workspace, without asking the LLM to look.
+
+The manifest lists every file under the workspace root with its size and
+top-level symbols (functions and classes, or headings for Markdown). It is
+kept per workspace for the life of the process and refreshed incrementally: a
+file is only re-read when its mtime or size changed. The planner and
+replanner get it rendered within a size budget, so plans need no discovery
+steps. The rendered lines leave out the mtime so that touching a file does
+not change the planner prompt, and with it the cached prompt prefix.
+"""
+
+import ast
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from ..logging import get_logger
+from ..prompts import get_prompt
+
+logger = get_logger(__name__)
+
+DEFAULT_BUDGET = 2000  # Characters of rendered manifest sent to the planner
+MAX_SYMBOLS = 8
+MAX_SYMBOL_BYTES = 256_000  # Larger files are listed without symbols
+
+SKIP_DIRS = frozenset({"__pycache__", "node_modules", "venv", ".venv", ".git"})
+
+_CODE_SYMBOL = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:pub\s+)?(?:async\s+)?"
+    r"(?:def|class|function|fn|func|interface|struct|enum|trait|type)\s+(\w+)",
+    re.MULTILINE,
+)
+_HEADING = re.compile(r"^#{1,3}\s+(.+?)\s*$", re.MULTILINE)
+_CODE_EXTENSIONS = frozenset(
+    {".js", ".jsx", ".ts", ".tsx", ".go", ".rs", ".java", ".kt", ".rb", ".swift", ".c", ".h"}
+)
+
+
+def extract_symbols(path: str, text: str) -> tuple[str, ...]:
+    """Return the top-level symbols defined in a file.
+
+    Args:
+        path: File path, used to pick the parser by extension
+        text: File contents
+
+    Returns:
+        Up to MAX_SYMBOLS names, in order of definition
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".py":
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            names = _CODE_SYMBOL.findall(text)
+        else:
+            names = [
+                node.name
+                for node in tree.body
+                if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef)
+            ]
+    elif ext in _CODE_EXTENSIONS:
+        names = _CODE_SYMBOL.findall(text)
+    elif ext in (".md", ".rst", ".txt"):
+        names = _HEADING.findall(text)
+    else:
+        names = []
+    return tuple(names[:MAX_SYMBOLS])
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    """One file in the manifest."""
+
+    path: str  # Relative to the workspace root
+    size: int
+    mtime_ns: int
+    symbols: tuple[str, ...] = ()
+
+    def render(self) -> str:
+        """Format the entry as one manifest line."""
+        line = f"- {self.path} ({self.size} bytes)"
+        if self.symbols:
+            line += f": {', '.join(self.symbols)}"
+        return line
+
+
+def _read_symbols(full_path: str, rel_path: str, size: int) -> tuple[str, ...]:
+    if size > MAX_SYMBOL_BYTES:
+        return ()
+    try:
+        with open(full_path, encoding="utf-8") as f:
+            return extract_symbols(rel_path, f.read())
+    except (OSError, UnicodeDecodeError):
+        return ()
+
+
+class WorkspaceManifest:
+    """Incrementally maintained listing of a workspace directory."""
+
+    def __init__(self, root: str, max_files: int = 1000):
+        """Initialize the manifest.
+
+        Args:
+            root: Workspace directory
+            max_files: Files scanned before the rest of the tree is ignored
+        """
+        self.root = root
+        self.max_files = max_files
+        self.entries: dict[str, FileEntry] = {}
+        self._lock = threading.Lock()
+
+    def _scan(self) -> dict[str, os.stat_result]:
+        """Stat every file under the root, skipping symlinks, hidden and tool directories."""
+        found: dict[str, os.stat_result] = {}
+        pending = [self.root]
+        while pending and len(found) < self.max_files:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as it:
+                    items = sorted(it, key=lambda item: item.name)
+            except OSError:
+                continue
+            for item in items:
+                if item.name.startswith(".") or item.name in SKIP_DIRS:
+                    continue
+                if item.is_dir(follow_symlinks=False):
+                    pending.append(item.path)
+                elif not item.is_symlink() and item.is_file() and len(found) < self.max_files:
+                    rel_path = os.path.relpath(item.path, self.root).replace(os.sep, "/")
+                    found[rel_path] = item.stat()
+        return found
+
+    def refresh(self) -> int:
+        """Bring the manifest up to date with the workspace.
+
+        Only new files and files whose mtime or size changed are read.
+
+        Returns:
+            Number of files added, changed or removed
+        """
+        with self._lock:
+            found = self._scan()
+            entries: dict[str, FileEntry] = {}
+            changed = 0
+            for rel_path, stat in sorted(found.items()):
+                entry = self.entries.get(rel_path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                if entry is None or (entry.mtime_ns, entry.size) != stamp:
+                    full_path = os.path.join(self.root, rel_path)
+                    symbols = _read_symbols(full_path, rel_path, stat.st_size)
+                    entry = FileEntry(rel_path, stat.st_size, stat.st_mtime_ns, symbols)
+                    changed += 1
+                entries[rel_path] = entry
+            changed += len(self.entries.keys() - entries.keys())
+            self.entries = entries
+        if changed:
+            logger.debug("Workspace manifest refreshed", root=self.root, changed=changed)
+        return changed
+
+    def render(self, budget: int = DEFAULT_BUDGET) -> str:
+        """Format the manifest within a character budget.
+
+        Args:
+            budget: Maximum length of the listing
+
+        Returns:
+            One line per file, ending with a count of the files left out, or
+            an empty string for an empty workspace
+        """
+        with self._lock:
+            entries = list(self.entries.values())
+        lines: list[str] = []
+        used = 0
+        for i, entry in enumerate(entries):
+            line = entry.render()
+            if used + len(line) + 1 > budget:
+                lines.append(f"... and {len(entries) - i} more files")
+                break
+            lines.append(line)
+            used += len(line) + 1
+        return "\n".join(lines)
+
+
+_manifests: OrderedDict[str, WorkspaceManifest] = OrderedDict()
+_manifests_lock = threading.Lock()
+MAX_MANIFESTS = 64
+
+
+def get_manifest(root: str) -> WorkspaceManifest:
+    """Return the process-wide manifest of a workspace, creating it on first use.
+
+    Args:
+        root: Workspace directory
+
+    Returns:
+        The manifest, not yet refreshed
+    """
+    key = os.path.abspath(root)
+    with _manifests_lock:
+        manifest = _manifests.get(key)
+        if manifest is None:
+            manifest = _manifests[key] = WorkspaceManifest(root)
+            while len(_manifests) > MAX_MANIFESTS:
+                _manifests.popitem(last=False)
+        else:
+            _manifests.move_to_end(key)
+        return manifest
+
+
+def workspace_context(root: str, budget: int = DEFAULT_BUDGET) -> str:
+    """Render the up-to-date manifest of a workspace as a prompt block.
+
+    Args:
+        root: Workspace directory
+        budget: Maximum length of the file listing; 0 disables the manifest
+
+    Returns:
+        The prompt block, or an empty string if the workspace is empty
+    """
+    if budget <= 0:
+        return ""
+    manifest = get_manifest(root)
+    manifest.refresh()
+    listing = manifest.render(budget)
+    if not listing:
+        return ""
+    return get_prompt("workspace_manifest_template").format(manifest=listing)
@@ -0,0 +1,154 @@
+"""Memoization of idempotent workspace tool calls.
+
+``read_file`` and ``list_directory`` results are remembered per session (or
+per run), keyed on the tool and the resolved path it reads, and reused while
+the file or directory is unchanged on disk, as judged by its mtime and size.
+Writes invalidate entries implicitly, since they change the mtime.
+
+The active memo is context-local, like the workspace, so concurrent runs
+each use their own.
+"""
+
+import functools
+import os
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from ..metrics import record_cache
+
+# Tools whose result depends only on their arguments and the file they name
+MEMOIZABLE_TOOLS = frozenset({"read_file", "list_directory"})
+
+Stamp = tuple[int, int]  # (mtime_ns, size)
+
+
+def _stamp(path: str) -> Stamp | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ToolMemo:
+    """Results of idempotent tool calls, valid while their target is unchanged."""
+
+    def __init__(self, max_entries: int = 256):
+        """Initialize the memo.
+
+        Args:
+            max_entries: Entries kept before the oldest is dropped
+        """
+        self.max_entries = max_entries
+        self._entries: dict[tuple[str, str], tuple[Stamp, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(tool: str, path: str) -> tuple[str, str]:
+        # Both memoizable tools take a single path argument
+        return tool, os.path.normpath(path)
+
+    def _get(self, tool: str, path: str) -> str | None:
+        if tool not in MEMOIZABLE_TOOLS:
+            return None
+        stamp = _stamp(path)
+        with self._lock:
+            entry = self._entries.get(self._key(tool, path))
+        if entry is None or stamp is None or entry[0] != stamp:
+            return None
+        return entry[1]
+
+    def lookup(self, tool: str, path: str) -> str | None:
+        """Return a remembered result if its target is unchanged.
+
+        Args:
+            tool: Tool name
+            path: Resolved path of the file or directory the call reads
+
+        Returns:
+            The remembered result, or None on a miss
+        """
+        result = self._get(tool, path)
+        if tool in MEMOIZABLE_TOOLS:
+            record_cache("tool_memo", result is not None)
+        return result
+
+    def contains(self, tool: str, path: str) -> bool:
+        """Whether a call would be answered from the memo, without counting a lookup."""
+        return self._get(tool, path) is not None
+
+    def store(self, tool: str, path: str, result: str) -> None:
+        """Remember a successful result.
+
+        Args:
+            tool: Tool name
+            path: Resolved path of the file or directory the call read
+            result: Tool output
+        """
+        stamp = _stamp(path)
+        if tool not in MEMOIZABLE_TOOLS or stamp is None or result.startswith("Error"):
+            return
+        with self._lock:
+            self._entries[self._key(tool, path)] = (stamp, result)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_memo: ContextVar[ToolMemo | None] = ContextVar("tool_memo", default=None)
+
+
+def get_memo() -> ToolMemo | None:
+    """Return the tool memo active in the current context, if any."""
+    return _memo.get()
+
+
+@contextmanager
+def use_memo(memo: ToolMemo) -> Iterator[ToolMemo]:
+    """Memoize idempotent tool calls within the block.
+
+    Args:
+        memo: Memo to read from and add to
+
+    Yields:
+        The memo
+    """
+    token = _memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _memo.reset(token)
+
+
+def memoized(resolve: Callable[[str], str]) -> Callable[[Callable[..., str]], Callable[..., str]]:
+    """Decorate a single-path tool function to use the active memo.
+
+    Args:
+        resolve: Maps the tool's path argument to the path on disk
+
+    Returns:
+        Decorator preserving the function's signature and docstring
+    """
+
+    def decorate(func: Callable[..., str]) -> Callable[..., str]:
+        @functools.wraps(func)
+        def wrapper(path: str = ".") -> str:
+            memo = get_memo()
+            if memo is None:
+                return func(path)
+            resolved = resolve(path)
+            cached = memo.lookup(func.__name__, resolved)
+            if cached is not None:
+                return cached
+            result = func(path)
+            memo.store(func.__name__, resolved, result)
+            return result
+
+        return wrapper
+
+    return decorate
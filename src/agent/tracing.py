@@ -0,0 +1,275 @@
+"""Chrome Trace Event export of single agent runs.
+
+``ChromeTracer`` is a LangChain callback handler that records nested spans
+(run, graph node, LLM call, tool call) and writes them as Chrome Trace
+Event JSON, which chrome://tracing and https://ui.perfetto.dev show as a
+flame-style timeline. Gaps between node spans are time spent in LangGraph
+itself.
+
+Tracing is opt-in: pass ``trace_dir`` to ``CodeAgent`` or set the
+``BSAI_TRACE_DIR`` environment variable.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+TRACE_DIR_ENV = "BSAI_TRACE_DIR"
+
+
+def trace_dir_from_env() -> str | None:
+    """Return the trace directory configured in the environment, if any."""
+    return os.environ.get(TRACE_DIR_ENV) or None
+
+
+def _text_size(value: Any) -> int:
+    """Approximate payload size in characters, counting message content only."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_text_size(v) for v in value.values())
+    if isinstance(value, list | tuple):
+        return sum(_text_size(v) for v in value)
+    content = getattr(value, "content", None)
+    if content is not None:
+        size = _text_size(content)
+        for tool_call in getattr(value, "tool_calls", None) or []:
+            size += len(json.dumps(tool_call.get("args", {}), default=str))
+        return size
+    return 0
+
+
+def _model_name(metadata: dict[str, Any] | None, kwargs: dict[str, Any]) -> str:
+    """Name an LLM call by model, falling back to the chat model type."""
+    model = (metadata or {}).get("ls_model_name")
+    if model:
+        return str(model)
+    return str((kwargs.get("invocation_params") or {}).get("_type") or "model")
+
+
+class ChromeTracer(BaseCallbackHandler):
+    """Records one run's spans and writes them in Chrome Trace Event format.
+
+    Spans are complete ('X') events. A span is drawn on its parent's track
+    so it nests under it; when the parent already has a child open (parallel
+    tool calls), it goes on the track of the thread that started it.
+    """
+
+    def __init__(self, name: str = "agent run") -> None:
+        """Initialize the tracer.
+
+        Args:
+            name: Label of the top-level run span
+        """
+        self.name = name
+        self.events: list[dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._open: dict[UUID, dict[str, Any]] = {}
+        self._open_children: dict[UUID, int] = {}
+        self._threads: dict[int, int] = {}
+
+    def _now_us(self) -> float:
+        return round((time.perf_counter() - self._origin) * 1_000_000, 3)
+
+    def _tid(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            if ident not in self._threads:
+                self._threads[ident] = len(self._threads) + 1
+            return self._threads[ident]
+
+    def _start(
+        self,
+        run_id: UUID,
+        name: str,
+        category: str,
+        parent_run_id: UUID | None = None,
+        **args: Any,
+    ) -> None:
+        with self._lock:
+            parent = self._open.get(parent_run_id) if parent_run_id else None
+            siblings = self._open_children.get(parent_run_id, 0) if parent_run_id else 0
+            if parent_run_id is not None and parent is not None:
+                self._open_children[parent_run_id] = siblings + 1
+        tid = parent["tid"] if parent is not None and not siblings else self._tid()
+        self._open[run_id] = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": self._now_us(),
+            "pid": 1,
+            "tid": tid,
+            "args": args,
+            "_parent": parent_run_id if parent is not None else None,
+        }
+
+    def _end(self, run_id: UUID, **args: Any) -> None:
+        event = self._open.pop(run_id, None)
+        if event is None:
+            return
+        parent_run_id = event.pop("_parent")
+        if parent_run_id is not None:
+            with self._lock:
+                self._open_children[parent_run_id] -= 1
+        event["dur"] = round(self._now_us() - event["ts"], 3)
+        event["args"].update(args)
+        with self._lock:
+            self.events.append(event)
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            self._start(run_id, node, "node", parent_run_id, input_chars=_text_size(inputs))
+        elif parent_run_id is None:
+            # The compiled graph itself; runnables inside a node are not traced
+            self._start(run_id, kwargs.get("name") or "graph", "graph")
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, output_chars=_text_size(outputs))
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=f"{type(error).__name__}: {error}")
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(
+            run_id,
+            f"llm {_model_name(metadata, kwargs)}",
+            "llm",
+            parent_run_id,
+            messages=sum(len(batch) for batch in messages),
+            input_chars=_text_size(messages),
+        )
+
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any],
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(
+            run_id,
+            f"llm {_model_name(metadata, kwargs)}",
+            "llm",
+            parent_run_id,
+            input_chars=_text_size(prompts),
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        args: dict[str, Any] = {}
+        output_chars = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                output_chars += _text_size(message) if message is not None else len(generation.text)
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    args["input_tokens"] = args.get("input_tokens", 0) + usage["input_tokens"]
+                    args["output_tokens"] = args.get("output_tokens", 0) + usage["output_tokens"]
+                    cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+                    if cached:
+                        args["cached_tokens"] = args.get("cached_tokens", 0) + cached
+        self._end(run_id, output_chars=output_chars, **args)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=f"{type(error).__name__}: {error}")
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(run_id, f"tool {name}", "tool", parent_run_id, input_chars=len(input_str))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, output_chars=_text_size(output) or len(str(output)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=f"{type(error).__name__}: {error}")
+
+    @contextmanager
+    def span(self, name: str, category: str = "run", **args: Any) -> Iterator[None]:
+        """Record a span around a block of code, e.g. the whole run.
+
+        Args:
+            name: Span label
+            category: Span category
+            **args: Extra span arguments
+        """
+        run_id = uuid.uuid4()
+        self._start(run_id, name, category, **args)
+        try:
+            yield
+        finally:
+            self._end(run_id)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the trace as a Chrome Trace Event document."""
+        with self._lock:
+            events = sorted(self.events, key=lambda event: (event["ts"], -event["dur"]))
+            threads = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"name": "main" if tid == 1 else f"worker {tid - 1}"},
+                }
+                for tid in sorted(self._threads.values())
+            ]
+        process = {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": self.name}}
+        return {"traceEvents": [process, *threads, *events], "displayTimeUnit": "ms"}
+
+    def write(self, directory: str) -> str:
+        """Write the trace to a new file in a directory.
+
+        Args:
+            directory: Output directory, created if missing
+
+        Returns:
+            Path of the written trace file
+        """
+        os.makedirs(directory, exist_ok=True)
+        filename = f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.json"
+        path = os.path.join(directory, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        return path
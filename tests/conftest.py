@@ -0,0 +1,28 @@
+"""Plan builders shared by the test modules."""
+
+from src.agent.models.plan import Plan, PlanStep
+
+
+def make_step(
+    number: int, action: str, input_data: str = "a.txt", description: str = ""
+) -> PlanStep:
+    """Build a plan step; the description defaults to "Step <number>"."""
+    return PlanStep(
+        step_number=number,
+        action=action,
+        description=description or f"Step {number}",
+        input_data=input_data,
+        expected_output="ok",
+    )
+
+
+def make_plan(*steps: str | tuple[str, ...]) -> Plan:
+    """Build a plan from actions or (action, input_data[, description]) tuples."""
+    return Plan(
+        goal="goal",
+        reasoning="reasoning",
+        steps=[
+            make_step(i + 1, *((step,) if isinstance(step, str) else step))
+            for i, step in enumerate(steps)
+        ],
+    )
@@ -2,9 +2,11 @@
 
 from unittest.mock import MagicMock, patch
 
+import pytest
 from langchain_core.messages import AIMessage, HumanMessage
 
 from src.agent.core.agent import CodeAgent
+from src.agent.graph.runner import LeanPlanRunner
 
 
 class TestCodeAgentInit:
@@ -118,6 +120,81 @@ class TestCodeAgentInit:
         assert agent_simple.mode == "simple"
 
 
+class TestCodeAgentModelRouting:
+    """Tests for per-node model configuration."""
+
+    @patch("src.agent.core.agent.create_planning_agent_graph")
+    @patch("src.agent.core.agent.create_llm")
+    def test_node_models_create_one_llm_per_model(self, mock_create_llm, mock_create_graph):
+        """Test that each distinct model name is created once."""
+        mock_create_llm.side_effect = lambda name: MagicMock(name=name)
+
+        agent = CodeAgent(
+            model="gpt-4o",
+            node_models={"executor": "gpt-4o-mini", "replanner": "gpt-4o-mini"},
+        )
+
+        assert [c.args[0] for c in mock_create_llm.call_args_list] == ["gpt-4o", "gpt-4o-mini"]
+        assert agent.node_llms["executor"] is agent.node_llms["replanner"]
+        assert agent.node_llms["planner"] is agent.llm
+
+    @patch("src.agent.core.agent.create_planning_agent_graph")
+    @patch("src.agent.core.agent.create_llm")
+    def test_node_models_are_passed_to_graph(self, mock_create_llm, mock_create_graph):
+        """Test that the planning graph receives per-node models."""
+        mock_create_llm.side_effect = lambda name: MagicMock(name=name)
+
+        agent = CodeAgent(
+            model="gpt-4o", node_models={"executor": "gpt-4o-mini"}, executor_fallback=True
+        )
+
+        kwargs = mock_create_graph.call_args.kwargs
+        assert mock_create_graph.call_args.args[0] is agent.llm
+        assert kwargs["executor_llm"] is agent.node_llms["executor"]
+        assert kwargs["replanner_llm"] is agent.llm
+        assert kwargs["executor_fallback_llm"] is agent.llm
+
+    @patch("src.agent.core.agent.create_planning_agent_graph")
+    @patch("src.agent.core.agent.create_llm")
+    def test_no_fallback_when_executor_uses_planner_model(
+        self, mock_create_llm, mock_create_graph
+    ):
+        """Test that fallback is skipped when there is no cheaper model."""
+        mock_create_llm.return_value = MagicMock()
+
+        CodeAgent(executor_fallback=True)
+
+        assert mock_create_graph.call_args.kwargs["executor_fallback_llm"] is None
+
+    @patch("src.agent.core.agent.create_agent_graph")
+    @patch("src.agent.core.agent.create_llm")
+    def test_simple_mode_uses_agent_model(self, mock_create_llm, mock_create_graph):
+        """Test that the simple graph uses the 'agent' role model."""
+        mock_create_llm.side_effect = lambda name: MagicMock(name=name)
+
+        agent = CodeAgent(mode="simple", node_models={"agent": "gpt-4o-mini"})
+
+        assert mock_create_graph.call_args.args[0] is agent.node_llms["agent"]
+
+    def test_unknown_role_raises(self):
+        """Test that an unknown role is rejected."""
+        with pytest.raises(ValueError, match="Unknown model roles"):
+            CodeAgent(node_models={"critic": "gpt-4o"})
+
+
+class TestCodeAgentEngine:
+    """Tests for choosing the plan execution engine."""
+
+    @patch("src.agent.core.agent.create_llm")
+    def test_lean_engine_uses_lean_runner(self, mock_create_llm):
+        """Test that engine='lean' runs plans without the LangGraph workflow."""
+        mock_create_llm.return_value = MagicMock()
+
+        agent = CodeAgent(engine="lean")
+
+        assert isinstance(agent.graph, LeanPlanRunner)
+
+
 class TestCodeAgentRun:
     """Tests for CodeAgent.run method."""
 
@@ -208,3 +285,28 @@ class TestCodeAgentRun:
         result = agent.run("Test")
 
         assert result == "Only response"
+
+    @patch("src.agent.core.agent.create_planning_agent_graph")
+    @patch("src.agent.core.agent.create_llm")
+    def test_run_detailed_returns_state_and_stats(self, mock_create_llm, mock_create_graph):
+        """Test that run_detailed exposes the final state and run stats."""
+        mock_create_llm.return_value = MagicMock()
+        mock_graph = MagicMock()
+        final_state = {
+            "messages": [HumanMessage(content="Hello"), AIMessage(content="Done")],
+            "plan": MagicMock(total_steps=3),
+            "step_results": {0: "a", 1: "b"},
+            "replans_count": 1,
+        }
+        mock_graph.invoke.return_value = final_state
+        mock_create_graph.return_value = mock_graph
+
+        result = CodeAgent().run_detailed("Hello")
+
+        assert result.output == "Done"
+        assert result.state is final_state
+        stats = result.stats()
+        assert stats["plan_steps"] == 3
+        assert stats["completed_steps"] == 2
+        assert stats["replans"] == 1
+        assert stats["messages"] == 2
@@ -0,0 +1,130 @@
+"""Tests for the JSONL batch runner."""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from src.agent.core import batch
+from src.agent.core.agent import RunResult
+from src.agent.tools.file import get_workspace
+
+
+class FakeAgent:
+    """Agent stand-in that records the workspace each run used."""
+
+    def __init__(self, model: str = "", mode: str = ""):
+        self.model = model
+
+    def run_detailed(self, user_input: str, timeout: float | None = None) -> RunResult:
+        if user_input == "fail":
+            raise RuntimeError("boom")
+        with open(os.path.join(get_workspace(), "out.txt"), "w") as f:
+            f.write(user_input)
+        return RunResult(output=f"done: {user_input}", state={"messages": []}, duration_s=0.5)
+
+
+def _write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestReadRequests:
+    """Tests for reading batch input."""
+
+    def test_reads_requests_and_skips_blank_lines(self, tmp_path):
+        """Test that requests are parsed and IDs normalized to strings."""
+        path = tmp_path / "in.jsonl"
+        path.write_text('{"id": 1, "input": "a"}\n\n{"id": "b", "input": "b"}\n')
+
+        requests = list(batch.read_requests(str(path)))
+
+        assert [r["id"] for r in requests] == ["1", "b"]
+
+    def test_missing_fields_raise(self, tmp_path):
+        """Test that a request without input is rejected."""
+        path = tmp_path / "in.jsonl"
+        path.write_text('{"id": 1}\n')
+
+        with pytest.raises(ValueError, match="needs 'id' and 'input'"):
+            list(batch.read_requests(str(path)))
+
+    @pytest.mark.parametrize("request_id", ["../x", "/abs", "a/b", "..", ""])
+    def test_ids_escaping_workspace_root_raise(self, tmp_path, request_id):
+        """Test that IDs must be a single directory name under the root."""
+        path = tmp_path / "in.jsonl"
+        path.write_text(json.dumps({"id": request_id, "input": "a"}) + "\n")
+
+        with pytest.raises(ValueError, match="single path component"):
+            list(batch.read_requests(str(path)))
+
+    def test_duplicate_ids_raise(self, tmp_path):
+        """Test that two requests cannot share one workspace."""
+        path = tmp_path / "in.jsonl"
+        path.write_text(
+            '{"id": 1, "input": "a"}\n{"id": "2", "input": "b"}\n{"id": "1", "input": "c"}\n'
+        )
+
+        with pytest.raises(ValueError, match="3: id '1' already used on line 1"):
+            list(batch.read_requests(str(path)))
+
+    def test_workspace_path_rejects_traversal(self):
+        """Test that run_request's workspace lookup validates IDs too."""
+        with pytest.raises(ValueError, match="not a valid directory name"):
+            batch.workspace_path("workspaces", "../x")
+
+
+class TestCompletedIds:
+    """Tests for restart bookkeeping."""
+
+    def test_only_successful_ids_are_completed(self, tmp_path):
+        """Test that failed and truncated records are retried."""
+        path = tmp_path / "out.jsonl"
+        path.write_text(
+            '{"id": "a", "status": "ok"}\n{"id": "b", "status": "error"}\n{"id": "c", "sta'
+        )
+
+        assert batch.completed_ids(str(path)) == {"a"}
+
+    def test_missing_output_file(self, tmp_path):
+        """Test that a fresh batch has no completed IDs."""
+        assert batch.completed_ids(str(tmp_path / "missing.jsonl")) == set()
+
+
+@patch("src.agent.core.batch.CodeAgent", FakeAgent)
+class TestRunBatch:
+    """Tests for run_batch."""
+
+    @pytest.mark.parametrize("executor", ["async", "process"])
+    def test_runs_requests_in_own_workspaces(self, tmp_path, executor):
+        """Test that every request runs in its own workspace and is recorded."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, [{"id": "a", "input": "one"}, {"id": "b", "input": "fail"}])
+        config = batch.BatchConfig(workspace_root=str(tmp_path / "ws"))
+
+        summary = batch.run_batch(str(input_path), str(output_path), config, 2, executor)
+
+        records = {r["id"]: r for r in _read_jsonl(output_path)}
+        assert summary == {"total": 2, "skipped": 0, "run": 2, "failed": 1}
+        assert records["a"]["status"] == "ok"
+        assert records["a"]["output"] == "done: one"
+        assert records["a"]["stats"]["duration_s"] == 0.5
+        assert records["b"]["status"] == "error"
+        assert "boom" in records["b"]["error"]
+        assert (tmp_path / "ws" / "a" / "out.txt").read_text() == "one"
+
+    def test_restart_skips_finished_ids(self, tmp_path):
+        """Test that a rerun only executes requests that did not succeed."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, [{"id": "a", "input": "one"}, {"id": "b", "input": "two"}])
+        _write_jsonl(output_path, [{"id": "a", "status": "ok"}])
+        config = batch.BatchConfig(workspace_root=str(tmp_path / "ws"))
+
+        summary = batch.run_batch(str(input_path), str(output_path), config, 1, "async")
+
+        assert summary["skipped"] == 1
+        assert [r["id"] for r in _read_jsonl(output_path)] == ["a", "b"]
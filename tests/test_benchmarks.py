@@ -0,0 +1,52 @@
+"""Tests for the graph benchmark suite."""
+
+from benchmarks.bench_graphs import benchmark, compare
+from benchmarks.bench_import import benchmark as import_benchmark
+from benchmarks.bench_import import parse_importtime
+
+
+class TestGraphBenchmark:
+    """Tests for benchmarks.bench_graphs."""
+
+    def test_reports_both_graphs(self):
+        report = benchmark(sizes=[2], runs=1)
+
+        by_graph = {result["graph"]: result for result in report["results"]}
+        assert set(by_graph) == {"simple", "planning"}
+        assert set(by_graph["planning"]["nodes_ms"]) == {
+            "planner",
+            "optimizer",
+            "executor",
+            "tools",
+            "process_result",
+        }
+        assert by_graph["simple"]["peak_kb"] > 0
+
+    def test_compare_flags_regressions_past_tolerance(self):
+        baseline = {"results": [{"graph": "simple", "size": 1, "run_ms": 10.0, "peak_kb": 50.0}]}
+        report = {"results": [{"graph": "simple", "size": 1, "run_ms": 12.0, "peak_kb": 70.0}]}
+
+        regressions = compare(report, baseline, tolerance=0.25)
+
+        assert len(regressions) == 1
+        assert "peak_kb" in regressions[0]
+
+
+class TestImportBenchmark:
+    """Tests for benchmarks.bench_import."""
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   yaml.error\n"
+            "import time:       300 |        420 | yaml\n"
+        )
+
+        assert parse_importtime(stderr) == {"yaml.error": (120, 120), "yaml": (300, 420)}
+
+    def test_agent_import_defers_providers_and_prompts(self):
+        report = import_benchmark(runs=1, top=3)
+
+        assert report["deferred_imported"] == []
+        assert report["median_ms"] > 0
+        assert len(report["slowest_self_ms"]) == 3
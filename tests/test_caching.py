@@ -0,0 +1,74 @@
+"""Tests for provider prompt caching."""
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.agent.llm.caching import PromptCachingChatModel, mark_cache_breakpoints
+from src.agent.llm.fake import ScriptedChatModel
+
+EPHEMERAL = {"type": "ephemeral"}
+
+
+class TestMarkCacheBreakpoints:
+    """Tests for mark_cache_breakpoints."""
+
+    def test_marks_system_prompt_and_stable_prefix(self):
+        messages = [
+            SystemMessage(content="system"),
+            HumanMessage(content="plan"),
+            HumanMessage(content="step"),
+        ]
+
+        marked = mark_cache_breakpoints(messages, EPHEMERAL)
+
+        assert marked[0].content == [{"type": "text", "text": "system", "cache_control": EPHEMERAL}]
+        assert marked[1].content == [{"type": "text", "text": "plan", "cache_control": EPHEMERAL}]
+        assert marked[2].content == "step"
+        assert messages[1].content == "plan"
+
+    def test_leaves_ai_messages_alone(self):
+        messages = [
+            SystemMessage(content="system"),
+            HumanMessage(content="question"),
+            AIMessage(content=""),
+            HumanMessage(content="next"),
+        ]
+
+        marked = mark_cache_breakpoints(messages, EPHEMERAL)
+
+        assert marked[1:] == messages[1:]
+
+
+class TestPromptCachingChatModel:
+    """Tests for PromptCachingChatModel."""
+
+    def test_sends_marked_prompt_with_bound_tools(self):
+        seen = []
+
+        def respond(messages, kwargs):
+            seen.append((messages, kwargs))
+            return AIMessage(content="done")
+
+        inner = ScriptedChatModel(responder=respond)
+        llm = PromptCachingChatModel(model=inner).bind_tools([])
+
+        response = llm.invoke([SystemMessage(content="system"), HumanMessage(content="hi")])
+
+        messages, kwargs = seen[0]
+        assert response.content == "done"
+        assert messages[0].content[0]["cache_control"] == EPHEMERAL
+        assert messages[1].content == "hi"
+        assert "tools" in kwargs
+
+    def test_streams_marked_prompt(self):
+        seen = []
+
+        def respond(messages, kwargs):
+            seen.append(messages)
+            return AIMessage(content="one two three")
+
+        llm = PromptCachingChatModel(model=ScriptedChatModel(responder=respond))
+
+        chunks = [chunk.content for chunk in llm.stream([SystemMessage(content="system")])]
+
+        assert chunks[:3] == ["one ", "two ", "three"]
+        assert seen[0][0].content[0]["cache_control"] == EPHEMERAL
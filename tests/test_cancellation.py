@@ -0,0 +1,144 @@
+"""Tests for run deadlines and cancellation."""
+
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from src.agent.cancellation import (
+    CancellationToken,
+    RunCancelled,
+    check_cancelled,
+    use_cancellation,
+)
+from src.agent.core.agent import CodeAgent
+from src.agent.llm.fake import ScriptedChatModel, plan_responder
+from src.agent.llm.pool import _apply_deadline
+from src.agent.metrics import REGISTRY
+from src.agent.tools.file import use_workspace
+
+
+class TestCancellationToken:
+    """Tests for CancellationToken."""
+
+    def test_cancel_sets_reason_once(self):
+        token = CancellationToken()
+
+        assert not token.cancelled
+        token.cancel()
+        token.cancel("other")
+
+        assert token.reason == "cancelled"
+        with pytest.raises(RunCancelled):
+            token.raise_if_cancelled()
+
+    def test_deadline_expires(self):
+        token = CancellationToken(timeout=0.01)
+
+        assert token.wait() is True
+        assert token.reason == "deadline_exceeded"
+        assert token.remaining() == 0.0
+
+    def test_check_uses_current_token(self):
+        check_cancelled()
+        token = CancellationToken()
+        token.cancel()
+
+        with use_cancellation(token), pytest.raises(RunCancelled):
+            check_cancelled()
+
+    def test_child_obeys_parent_without_changing_it(self):
+        parent = CancellationToken(timeout=60)
+        child = CancellationToken(timeout=0.01, parent=parent)
+
+        assert child.wait() is True
+        assert child.reason == "deadline_exceeded"
+        assert not parent.cancelled
+        assert parent.remaining() > 30
+
+        sibling = CancellationToken(timeout=60, parent=parent)
+        parent.cancel()
+        assert sibling.wait(1) is True
+        assert sibling.reason == "cancelled"
+        assert CancellationToken(parent=parent).reason == "cancelled"
+
+
+class TestRequestDeadline:
+    """Tests for the provider HTTP request hook."""
+
+    def test_caps_timeouts_at_time_left(self):
+        request = httpx.Request("POST", "http://llm/v1", extensions={"timeout": {"read": 120.0}})
+
+        with use_cancellation(CancellationToken(timeout=5)):
+            _apply_deadline(request)
+
+        timeouts = request.extensions["timeout"]
+        assert 0 < timeouts["read"] <= 5
+        assert 0 < timeouts["connect"] <= 5
+
+    def test_refuses_to_send_after_cancel(self):
+        token = CancellationToken()
+        token.cancel()
+
+        with use_cancellation(token), pytest.raises(RunCancelled):
+            _apply_deadline(httpx.Request("POST", "http://llm/v1"))
+
+
+def _agent(responder, engine: str = "graph") -> CodeAgent:
+    llm = ScriptedChatModel(responder=responder)
+    with patch("src.agent.core.agent.create_llm", return_value=llm):
+        return CodeAgent(mode="planning", engine=engine)
+
+
+@pytest.mark.parametrize("engine", ["graph", "lean"])
+class TestCodeAgentCancellation:
+    """Tests for stopping CodeAgent runs."""
+
+    def test_cancel_returns_completed_steps(self, tmp_path, engine):
+        token = CancellationToken()
+        respond = plan_responder(3, tool_name="read_file", arg_name="path")
+
+        def cancelling(messages, kwargs):
+            if "Current Step 2" in str(messages[-1].content):
+                token.cancel()
+            return respond(messages, kwargs)
+
+        agent = _agent(cancelling, engine)
+        with use_workspace(str(tmp_path)):
+            (tmp_path / "item 1").write_text("first")
+            result = agent.run_detailed("Read the items", cancel_token=token)
+
+        assert result.status == "cancelled"
+        assert result.output == "Run was cancelled after 1 of 3 steps."
+        assert result.state["step_results"] == {0: "first"}
+        assert result.stats()["status"] == "cancelled"
+        assert REGISTRY.counter_value("agent_runs_total", mode="planning", status="cancelled")
+
+    def test_deadline_stops_stream(self, tmp_path, engine):
+        respond = plan_responder(3, tool_name="read_file", arg_name="path")
+
+        def slow(messages, kwargs):
+            time.sleep(0.05)
+            return respond(messages, kwargs)
+
+        agent = _agent(slow, engine)
+        with use_workspace(str(tmp_path)):
+            events = list(agent.stream("Read the items", timeout=0.02))
+
+        done = events[-1]
+        assert done.type == "done"
+        assert done.data["status"] == "deadline_exceeded"
+        assert done.data["output"].startswith("Run hit its deadline")
+
+    def test_timeout_leaves_caller_token_unchanged(self, tmp_path, engine):
+        token = CancellationToken()
+        agent = _agent(plan_responder(1, tool_name="read_file", arg_name="path"), engine)
+
+        with use_workspace(str(tmp_path)):
+            (tmp_path / "item 1").write_text("first")
+            first = agent.run_detailed("Read the item", timeout=30, cancel_token=token)
+            second = agent.run_detailed("Read the item", cancel_token=token)
+
+        assert token.deadline is None
+        assert first.status == second.status == "completed"
@@ -0,0 +1,93 @@
+"""Tests for the offline request classifier and auto mode."""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.agent.core.agent import CodeAgent
+from src.agent.core.complexity import PLANNING, SIMPLE, classify_request
+from src.agent.llm.fake import ScriptedChatModel, plan_responder
+from src.agent.metrics import REGISTRY
+from src.agent.tools.file import use_workspace
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+
+
+class TestClassifyRequest:
+    """Tests for classify_request."""
+
+    @pytest.mark.parametrize(
+        "request_text",
+        [
+            "read foo.txt",
+            "Show me the contents of src/app.py",
+            "What's in README.md?",
+            "list the files",
+            "ls src/",
+            "Write hello to notes.txt",
+            "Shows notes.txt",
+            "Listing of src/",
+        ],
+    )
+    def test_single_actions_are_simple(self, request_text):
+        assert classify_request(request_text).mode == SIMPLE
+
+    @pytest.mark.parametrize(
+        "request_text, rule",
+        [
+            ("Read a.txt and b.txt", "multi_path"),
+            ("Read config.yaml and list its keys", "multi_action"),
+            ("Refactor utils.py", "complex_verb"),
+            ("create app.py that implements auth", "complex_verb"),
+            ("Show the refactoring notes in plan.md", "complex_verb"),
+            ("Apply the fixes to auth.py", "complex_verb"),
+            ("Read the updated config.yaml", "complex_verb"),
+            ("Read notes.txt then write a summary to out.md", "sequence"),
+            ("Summarize all markdown files", "quantifier"),
+            ("hello", "no_action"),
+            ("read " + "word " * 30, "long"),
+        ],
+    )
+    def test_multi_step_work_is_planned(self, request_text, rule):
+        decision = classify_request(request_text)
+
+        assert decision.mode == PLANNING
+        assert decision.rule == rule
+
+
+class TestAutoMode:
+    """Tests for CodeAgent in auto mode."""
+
+    def test_routes_each_request_and_counts_decisions(self, tmp_path):
+        llm = ScriptedChatModel(
+            responder=plan_responder(1, tool_name="list_directory", arg_name="path")
+        )
+        with patch("src.agent.core.agent.create_llm", return_value=llm):
+            agent = CodeAgent(mode="auto")
+
+        with use_workspace(str(tmp_path)):
+            simple = agent.run_detailed("read notes.txt")
+            calls = llm.call_count
+            planned = agent.run_detailed("List the files then write a summary")
+
+        assert simple.mode == SIMPLE
+        assert calls == 1
+        assert "plan" not in simple.state
+        assert planned.mode == PLANNING
+        assert planned.state["plan"].total_steps == 1
+        assert planned.stats()["mode"] == PLANNING
+        assert REGISTRY.counter_value("agent_routes_total", mode=SIMPLE, rule="single_action") == 1
+        assert REGISTRY.counter_value("agent_runs_total", mode=PLANNING, status="ok") == 1
+
+    def test_fixed_modes_do_not_route(self):
+        with patch("src.agent.core.agent.create_llm", return_value=ScriptedChatModel()):
+            agent = CodeAgent(mode="simple")
+
+        assert list(agent.graphs) == [SIMPLE]
+        assert agent._route("Refactor everything") == SIMPLE
+        assert REGISTRY.counter_value("agent_routes_total", mode=PLANNING, rule="complex_verb") == 0
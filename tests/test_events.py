@@ -0,0 +1,142 @@
+"""Tests for streamed run events."""
+
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from src.agent.core.agent import CodeAgent
+from src.agent.core.events import EventTranslator
+from src.agent.llm.fake import ScriptedChatModel
+from src.agent.models.plan import Plan
+
+PLAN = {
+    "goal": "Inspect workspace",
+    "reasoning": "List then read",
+    "steps": [
+        {
+            "step_number": 1,
+            "action": "list_directory",
+            "description": "List files",
+            "input_data": ".",
+            "expected_output": "Listing",
+        },
+        {
+            "step_number": 2,
+            "action": "read_file",
+            "description": "Read notes",
+            "input_data": "notes.txt",
+            "expected_output": "Content",
+        },
+    ],
+}
+
+
+def _tool_call(name: str, args: dict, call_id: str) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": call_id}])
+
+
+def _agent(mode: str, responses: list[AIMessage]) -> CodeAgent:
+    with patch(
+        "src.agent.core.agent.create_llm", return_value=ScriptedChatModel(responses=responses)
+    ):
+        return CodeAgent(mode=mode)
+
+
+class TestCodeAgentStream:
+    """Tests for CodeAgent.stream and astream."""
+
+    def test_planning_stream_event_sequence(self, tmp_path, monkeypatch):
+        """Test that a planning run yields plan, step and tool events in order."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "results").mkdir()
+        (tmp_path / "results" / "notes.txt").write_text("hello")
+        agent = _agent(
+            "planning",
+            [
+                _tool_call(Plan.__name__, PLAN, "plan"),
+                _tool_call("list_directory", {"path": "."}, "1"),
+                _tool_call("read_file", {"path": "notes.txt"}, "2"),
+            ],
+        )
+
+        events = list(agent.stream("Inspect workspace"))
+
+        assert [event.type for event in events] == [
+            "plan_created",
+            "step_started",
+            "tool_called",
+            "step_finished",
+            "step_started",
+            "tool_called",
+            "step_finished",
+            "done",
+        ]
+        assert events[1].data["step"] == 1
+        assert events[3].data["result"] == "notes.txt"
+        assert events[-1].data["output"] == "hello"
+
+    def test_simple_stream_yields_tokens(self):
+        """Test that the final answer streams as token events."""
+        agent = _agent("simple", [AIMessage(content="all done here")])
+
+        events = list(agent.stream("Hi"))
+
+        tokens = [event.data["text"] for event in events if event.type == "token"]
+        assert "".join(tokens) == "all done here"
+        assert events[0].data["node"] == "agent"
+        assert events[-1].type == "done"
+        assert events[-1].data["output"] == "all done here"
+        assert events[-1].data["metrics"]["llm"]["calls"] == 1
+
+    def test_astream_matches_stream(self):
+        """Test that the async stream yields the same events."""
+        agent = _agent("simple", [AIMessage(content="async answer")])
+
+        async def collect():
+            return [event async for event in agent.astream("Hi")]
+
+        events = asyncio.run(collect())
+
+        assert events[-1].type == "done"
+        assert any(event.type == "token" for event in events)
+
+
+class TestEventTranslator:
+    """Tests for EventTranslator."""
+
+    def test_fused_window_starts_every_step(self):
+        """Test that a fused executor call starts all steps in its window."""
+        translator = EventTranslator()
+        plan = Plan.model_validate(PLAN)
+        translator.translate("updates", {"planner": {"plan": plan, "current_step_index": 0}})
+
+        fused = AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "list_directory", "args": {"path": "."}, "id": "1"},
+                {"name": "read_file", "args": {"path": "notes.txt"}, "id": "2"},
+            ],
+        )
+        events = translator.translate(
+            "updates", {"executor": {"messages": [fused], "active_steps": 2}}
+        )
+
+        assert [event.type for event in events] == ["step_started", "tool_called", "tool_called"]
+        assert events[0].data["step"] == 2
+
+    def test_empty_updates_are_ignored(self):
+        """Test that nodes returning no update produce no events."""
+        assert EventTranslator().translate("updates", {"executor": None}) == []
+
+    def test_optimized_plan_replaces_current_plan(self):
+        """Test that an optimizer update reports the shortened plan without restarting it."""
+        translator = EventTranslator()
+        plan = Plan.model_validate(PLAN)
+        translator.translate("updates", {"planner": {"plan": plan, "current_step_index": 0}})
+
+        shorter = plan.model_copy(update={"steps": plan.steps[:1]})
+        events = translator.translate("updates", {"optimizer": {"plan": shorter}})
+
+        assert [event.type for event in events] == ["plan_optimized"]
+        assert len(events[0].data["steps"]) == 1
@@ -0,0 +1,290 @@
+"""Tests for the executor node and fused step execution."""
+
+from unittest.mock import MagicMock
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.agent.graph.nodes.executor import create_executor_node, select_fusable_steps
+from src.agent.graph.workflow import _create_result_processor
+from tests.conftest import make_plan
+
+
+class TestSelectFusableSteps:
+    """Tests for select_fusable_steps."""
+
+    def test_fuses_consecutive_read_only_steps(self):
+        """Test that adjacent read-only steps form one window."""
+        plan = make_plan("read_file", "list_directory", "read_file", "write_file")
+
+        window = select_fusable_steps(plan.steps, 0, 5)
+
+        assert [step.step_number for step in window] == [1, 2, 3]
+
+    def test_window_respects_maximum(self):
+        """Test that the window never exceeds the configured size."""
+        plan = make_plan("read_file", "read_file", "read_file")
+
+        assert len(select_fusable_steps(plan.steps, 0, 2)) == 2
+
+    def test_write_step_is_never_fused(self):
+        """Test that a write step runs on its own."""
+        plan = make_plan("write_file", "read_file")
+
+        assert select_fusable_steps(plan.steps, 0, 5) == [plan.steps[0]]
+
+
+class TestExecutorNode:
+    """Tests for create_executor_node."""
+
+    def test_single_step_by_default(self):
+        """Test that only the current step is executed without fusion."""
+        mock_llm = MagicMock()
+        mock_llm.bind_tools.return_value.invoke.return_value = AIMessage(content="done")
+        node = create_executor_node(mock_llm, [])
+
+        result = node(
+            {
+                "messages": [HumanMessage(content="go")],
+                "plan": make_plan("read_file", "read_file"),
+                "current_step_index": 0,
+                "step_results": {},
+                "replans_count": 0,
+            }
+        )
+
+        assert result["active_steps"] == 1
+        prompt = mock_llm.bind_tools.return_value.invoke.call_args[0][0][-1].content
+        assert "Step 2" not in prompt
+
+    def test_fused_steps_share_one_prompt(self):
+        """Test that a fused window is sent as one prompt."""
+        mock_llm = MagicMock()
+        mock_llm.bind_tools.return_value.invoke.return_value = AIMessage(content="done")
+        node = create_executor_node(mock_llm, [], fuse_steps=3)
+
+        result = node(
+            {
+                "messages": [HumanMessage(content="go")],
+                "plan": make_plan("read_file", "list_directory", "write_file"),
+                "current_step_index": 0,
+                "step_results": {},
+                "replans_count": 0,
+            }
+        )
+
+        assert result["active_steps"] == 2
+        mock_llm.bind_tools.return_value.invoke.assert_called_once()
+        prompt = mock_llm.bind_tools.return_value.invoke.call_args[0][0][-1].content
+        assert "Step 1: read_file" in prompt
+        assert "Step 2: list_directory" in prompt
+        assert "Step 3" not in prompt
+
+    def test_plan_forms_a_stable_prompt_prefix(self):
+        """Test that the goal and plan precede the per-step prompt."""
+        mock_llm = MagicMock()
+        mock_llm.bind_tools.return_value.invoke.return_value = AIMessage(content="done")
+        node = create_executor_node(mock_llm, [])
+        plan = make_plan("read_file", "write_file")
+
+        prompts = []
+        for index, step_results in ((0, {}), (1, {0: "content"})):
+            node(
+                {
+                    "messages": [HumanMessage(content="go")],
+                    "plan": plan,
+                    "current_step_index": index,
+                    "step_results": step_results,
+                    "replans_count": 0,
+                }
+            )
+            prompts.append(mock_llm.bind_tools.return_value.invoke.call_args[0][0])
+
+        first, second = prompts
+        assert first[:2] == second[:2]
+        assert first[1].content.startswith("Goal: goal")
+        assert "2. [write_file] Step 2 (a.txt)" in first[1].content
+        assert "Current Step 2: write_file" in second[-1].content
+
+    def test_invalid_tool_call_retries_with_fallback(self):
+        """Test that a tool call that fails to parse is retried on the fallback."""
+        cheap_llm = MagicMock()
+        cheap_llm.bind_tools.return_value.invoke.return_value = AIMessage(
+            content="",
+            invalid_tool_calls=[
+                {"name": "read_file", "args": "{bad", "id": "x", "error": "bad json"}
+            ],
+        )
+        strong_llm = MagicMock()
+        strong_response = AIMessage(content="done")
+        strong_llm.bind_tools.return_value.invoke.return_value = strong_response
+        node = create_executor_node(cheap_llm, [], fallback_llm=strong_llm)
+
+        result = node(
+            {
+                "messages": [HumanMessage(content="go")],
+                "plan": make_plan("read_file"),
+                "current_step_index": 0,
+                "step_results": {},
+                "replans_count": 0,
+            }
+        )
+
+        assert result["messages"] == [strong_response]
+
+    def test_valid_tool_call_does_not_use_fallback(self):
+        """Test that the fallback model is not called for valid responses."""
+        cheap_llm = MagicMock()
+        cheap_llm.bind_tools.return_value.invoke.return_value = AIMessage(content="done")
+        strong_llm = MagicMock()
+        node = create_executor_node(cheap_llm, [], fallback_llm=strong_llm)
+
+        node(
+            {
+                "messages": [HumanMessage(content="go")],
+                "plan": make_plan("read_file"),
+                "current_step_index": 0,
+                "step_results": {},
+                "replans_count": 0,
+            }
+        )
+
+        strong_llm.bind_tools.return_value.invoke.assert_not_called()
+
+
+class TestProcessResult:
+    """Tests for the result processor node."""
+
+    def _ai_with_calls(self, *call_ids: str) -> AIMessage:
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "read_file", "args": {"path": call_id}, "id": call_id}
+                for call_id in call_ids
+            ],
+        )
+
+    def test_single_step_records_last_message(self):
+        """Test that unfused execution records the last tool message."""
+        process_result = _create_result_processor()
+
+        result = process_result(
+            {
+                "messages": [
+                    self._ai_with_calls("a"),
+                    ToolMessage(content="content a", tool_call_id="a"),
+                ],
+                "current_step_index": 2,
+                "step_results": {0: "x", 1: "y"},
+                "active_steps": 1,
+            }
+        )
+
+        assert result["step_results"][2] == "content a"
+        assert result["current_step_index"] == 3
+
+    def test_fused_results_are_attributed_per_step(self):
+        """Test that each tool message is recorded under its own step."""
+        process_result = _create_result_processor()
+
+        result = process_result(
+            {
+                "messages": [
+                    self._ai_with_calls("a", "b", "c"),
+                    ToolMessage(content="content c", tool_call_id="c"),
+                    ToolMessage(content="content a", tool_call_id="a"),
+                    ToolMessage(content="content b", tool_call_id="b"),
+                ],
+                "current_step_index": 1,
+                "step_results": {0: "x"},
+                "active_steps": 3,
+            }
+        )
+
+        assert result["step_results"] == {
+            0: "x",
+            1: "content a",
+            2: "content b",
+            3: "content c",
+        }
+        assert result["current_step_index"] == 4
+
+    def _fused_state(self, calls: list[tuple[str, str]], *results: str) -> dict:
+        plan = make_plan(
+            ("read_file", "a.txt"), ("list_directory", "src"), ("read_file", "./b.txt")
+        )
+        ai_msg = AIMessage(
+            content="",
+            tool_calls=[
+                {"name": name, "args": {"path": path}, "id": f"call_{i}"}
+                for i, (name, path) in enumerate(calls)
+            ],
+        )
+        tool_messages = [
+            ToolMessage(content=result, tool_call_id=f"call_{i}")
+            for i, result in enumerate(results)
+        ]
+        return {
+            "messages": [ai_msg, *tool_messages],
+            "plan": plan,
+            "current_step_index": 0,
+            "step_results": {},
+            "active_steps": 3,
+        }
+
+    def test_reordered_calls_are_matched_by_action_and_path(self):
+        """Test that results follow their step, not the order of the calls."""
+        calls = [("read_file", "b.txt"), ("list_directory", "src"), ("read_file", "a.txt")]
+
+        result = _create_result_processor()(self._fused_state(calls, "B", "listing", "A"))
+
+        assert result["step_results"] == {0: "A", 1: "listing", 2: "B"}
+        assert result["current_step_index"] == 3
+
+    def test_skipped_step_is_left_for_the_next_round(self):
+        """Test that a step the model skipped does not receive another step's result."""
+        calls = [("read_file", "a.txt"), ("read_file", "b.txt")]
+
+        result = _create_result_processor()(self._fused_state(calls, "A", "B"))
+
+        assert result["step_results"] == {0: "A", 2: "B"}
+        assert result["current_step_index"] == 1
+
+    def test_repeated_call_is_added_to_its_step(self):
+        """Test that an extra call for a step is recorded with that step."""
+        calls = [
+            ("read_file", "a.txt"),
+            ("list_directory", "src"),
+            ("read_file", "b.txt"),
+            ("read_file", "a.txt"),
+        ]
+
+        result = _create_result_processor()(self._fused_state(calls, "A", "listing", "B", "A2"))
+
+        assert result["step_results"] == {0: "A\nA2", 1: "listing", 2: "B"}
+
+    def test_unmatched_calls_fall_back_to_position(self):
+        """Test that calls matching no step are attributed by their position."""
+        calls = [("read_file", "a.txt"), ("list_directory", "."), ("read_file", "c.txt")]
+
+        result = _create_result_processor()(self._fused_state(calls, "A", "listing", "C"))
+
+        assert result["step_results"] == {0: "A", 1: "listing", 2: "C"}
+
+    def test_fused_window_advances_only_answered_steps(self):
+        """Test that steps without a tool call are left for the next round."""
+        process_result = _create_result_processor()
+
+        result = process_result(
+            {
+                "messages": [
+                    self._ai_with_calls("a"),
+                    ToolMessage(content="content a", tool_call_id="a"),
+                ],
+                "current_step_index": 0,
+                "step_results": {},
+                "active_steps": 3,
+            }
+        )
+
+        assert result["step_results"] == {0: "content a"}
+        assert result["current_step_index"] == 1
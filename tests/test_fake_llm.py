@@ -0,0 +1,63 @@
+"""Tests for the scripted chat model and its responders."""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.agent.graph.nodes.executor import build_batch_executor_messages, build_executor_messages
+from src.agent.llm.fake import ScriptedChatModel, plan_responder, tool_loop_responder
+from src.agent.models.plan import Plan
+
+
+class TestScriptedChatModel:
+    """Tests for ScriptedChatModel."""
+
+    def test_responses_in_order(self):
+        llm = ScriptedChatModel(responses=[AIMessage(content="one"), AIMessage(content="two")])
+
+        assert llm.invoke("a").content == "one"
+        assert llm.invoke("b").content == "two"
+        assert llm.call_count == 2
+        with pytest.raises(IndexError):
+            llm.invoke("c")
+
+    def test_structured_output(self):
+        llm = ScriptedChatModel(responder=plan_responder(3))
+
+        plan = llm.with_structured_output(Plan).invoke("plan it")
+
+        assert isinstance(plan, Plan)
+        assert [step.step_number for step in plan.steps] == [1, 2, 3]
+
+    def test_streams_text_word_by_word(self):
+        llm = ScriptedChatModel(responses=[AIMessage(content="hello big world")])
+
+        chunks = [chunk.content for chunk in llm.stream("hi") if chunk.content]
+
+        assert chunks == ["hello ", "big ", "world"]
+
+
+class TestResponders:
+    """Tests for the scripted responders."""
+
+    def test_plan_responder_calls_tool_per_listed_step(self):
+        llm = ScriptedChatModel(responder=plan_responder(3))
+        plan = llm.with_structured_output(Plan).invoke("plan it")
+
+        single = llm.invoke(build_executor_messages(plan.steps[1], {0: "done"}))
+        fused = llm.invoke(build_batch_executor_messages(plan.steps[1:], {0: "done"}))
+
+        assert [call["id"] for call in single.tool_calls] == ["call_2"]
+        assert [call["id"] for call in fused.tool_calls] == ["call_2", "call_3"]
+
+    def test_tool_loop_responder_answers_after_rounds(self):
+        respond = tool_loop_responder(2)
+        messages = [HumanMessage(content="go")]
+
+        assert respond(messages, {}).tool_calls
+        messages.append(ToolMessage(content="ok", tool_call_id="call_0"))
+        assert respond(messages, {}).tool_calls
+        messages.append(ToolMessage(content="ok", tool_call_id="call_1"))
+
+        final = respond(messages, {})
+        assert not final.tool_calls
+        assert final.content == "Finished after 2 tool calls"
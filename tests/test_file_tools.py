@@ -1,6 +1,12 @@
 """Tests for file manipulation tools."""
 
-from src.agent.tools.file import list_directory, read_file, write_file
+from src.agent.tools.file import (
+    get_workspace,
+    list_directory,
+    read_file,
+    use_workspace,
+    write_file,
+)
 
 
 class TestReadFile:
@@ -99,3 +105,25 @@ class TestListDirectory:
         lines = result.split("\n")
 
         assert lines == ["alpha.txt", "beta.txt", "zebra.txt"]
+
+
+class TestWorkspace:
+    """Tests for per-context workspaces."""
+
+    def test_use_workspace_redirects_relative_paths(self, tmp_path):
+        """Test that relative paths resolve inside the active workspace."""
+        workspace = tmp_path / "run-1"
+
+        with use_workspace(str(workspace)):
+            write_file.invoke({"path": "notes.txt", "content": "hi"})
+            listing = list_directory.invoke({"path": "."})
+
+        assert (workspace / "notes.txt").read_text() == "hi"
+        assert listing == "notes.txt"
+
+    def test_workspace_is_restored(self, tmp_path):
+        """Test that the default workspace is restored after the block."""
+        with use_workspace(str(tmp_path)):
+            assert get_workspace() == str(tmp_path)
+
+        assert get_workspace() == "results"
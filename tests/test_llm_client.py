@@ -1,7 +1,7 @@
 """Tests for LLM client configuration."""
 
 import sys
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 
@@ -31,11 +31,14 @@ class TestCreateLLM:
             {
                 "langchain_anthropic": self.mock_anthropic_module,
                 "langchain_openai": self.mock_openai_module,
+                "anthropic": MagicMock(),
             },
         ):
             # Clear any cached imports
             if "src.agent.llm.client" in sys.modules:
                 del sys.modules["src.agent.llm.client"]
+            if "src.agent.llm.pool" in sys.modules:
+                del sys.modules["src.agent.llm.pool"]
             if "src.agent.llm" in sys.modules:
                 del sys.modules["src.agent.llm"]
 
@@ -48,7 +51,11 @@ class TestCreateLLM:
         create_llm()
 
         self.mock_chat_openai.assert_called_once_with(
-            model="gpt-4o-mini", temperature=0
+            model="gpt-4o-mini",
+            temperature=0,
+            http_client=ANY,
+            http_async_client=ANY,
+            base_url=None,
         )
 
     def test_create_openai_model_gpt4(self, setup_mocks):
@@ -57,7 +64,13 @@ class TestCreateLLM:
 
         create_llm("gpt-4")
 
-        self.mock_chat_openai.assert_called_once_with(model="gpt-4", temperature=0)
+        self.mock_chat_openai.assert_called_once_with(
+            model="gpt-4",
+            temperature=0,
+            http_client=ANY,
+            http_async_client=ANY,
+            base_url=None,
+        )
 
     def test_create_anthropic_model_claude(self, setup_mocks):
         """Test creating Claude model."""
@@ -86,7 +99,11 @@ class TestCreateLLM:
         create_llm("some-other-model")
 
         self.mock_chat_openai.assert_called_once_with(
-            model="some-other-model", temperature=0
+            model="some-other-model",
+            temperature=0,
+            http_client=ANY,
+            http_async_client=ANY,
+            base_url=None,
         )
 
     def test_claude_prefix_routing(self, setup_mocks):
@@ -106,3 +123,111 @@ class TestCreateLLM:
 
         self.mock_chat_openai.assert_called_once()
         self.mock_chat_anthropic.assert_not_called()
+
+    def test_fallbacks_create_router(self, setup_mocks):
+        """Test that fallback models produce a router over each provider."""
+        from src.agent.llm.client import create_llm
+        from src.agent.llm.router import RouterChatModel
+
+        llm = create_llm("gpt-4o-mini", fallbacks=["claude-sonnet-4-20250514"])
+
+        assert isinstance(llm, RouterChatModel)
+        assert llm.route_names == ["gpt-4o-mini", "claude-sonnet-4-20250514"]
+        self.mock_chat_openai.assert_called_once_with(
+            model="gpt-4o-mini",
+            temperature=0,
+            http_client=ANY,
+            http_async_client=ANY,
+            base_url=None,
+        )
+        self.mock_chat_anthropic.assert_called_once_with(
+            model="claude-sonnet-4-20250514", temperature=0
+        )
+
+    def test_registry_reuses_instances(self, setup_mocks):
+        """Test that the same model name returns the registered instance."""
+        from src.agent.llm.client import create_llm
+
+        first = create_llm("gpt-4o")
+        second = create_llm("gpt-4o")
+
+        assert first is second
+        self.mock_chat_openai.assert_called_once()
+
+    def test_models_share_http_clients(self, setup_mocks):
+        """Test that different models are given the same pooled clients."""
+        from src.agent.llm.client import create_llm
+
+        create_llm("gpt-4o")
+        create_llm("gpt-4o-mini")
+
+        first, second = self.mock_chat_openai.call_args_list
+        assert first.kwargs["http_client"] is second.kwargs["http_client"]
+        assert first.kwargs["http_async_client"] is second.kwargs["http_async_client"]
+
+    def test_clear_registry(self, setup_mocks):
+        """Test that clearing the registry creates fresh instances."""
+        from src.agent.llm.client import clear_llm_registry, create_llm
+
+        create_llm("gpt-4o")
+        clear_llm_registry()
+        create_llm("gpt-4o")
+
+        assert self.mock_chat_openai.call_count == 2
+
+    def test_base_url_overrides_endpoint(self, setup_mocks):
+        """Test that base_url is passed to the provider and keys the registry."""
+        from src.agent.llm.client import create_llm
+
+        create_llm("gpt-4o")
+        create_llm("gpt-4o", base_url="http://127.0.0.1:8900/v1")
+
+        default, local = self.mock_chat_openai.call_args_list
+        assert default.kwargs["base_url"] is None
+        assert local.kwargs["base_url"] == "http://127.0.0.1:8900/v1"
+
+    def test_prompt_cache_wraps_anthropic_models(self, setup_mocks):
+        """Test that prompt caching is requested explicitly only for Anthropic."""
+        from src.agent.llm.caching import PromptCachingChatModel
+        from src.agent.llm.client import create_llm
+
+        claude = create_llm("claude-sonnet-4-20250514", prompt_cache=True)
+        gpt = create_llm("gpt-4o", prompt_cache=True)
+
+        assert isinstance(claude, PromptCachingChatModel)
+        assert claude.model is create_llm("claude-sonnet-4-20250514")
+        assert gpt is create_llm("gpt-4o")
+        self.mock_chat_anthropic.assert_called_once()
+
+
+class TestAnthropicPool:
+    """Tests for sharing the HTTP pool with ChatAnthropic."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_registry(self, monkeypatch):
+        """Create real models without touching the network."""
+        from src.agent.llm.client import clear_llm_registry
+
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        clear_llm_registry()
+        yield
+        clear_llm_registry()
+
+    def test_pooled_clients_are_used(self):
+        """Test that the SDK clients send through the shared pool."""
+        from src.agent.llm import pool
+        from src.agent.llm.client import create_llm
+
+        llm = create_llm("claude-sonnet-4-20250514")
+
+        assert llm._client._client is pool.get_sync_client()
+        assert llm._async_client._client is pool.get_async_client()
+
+    def test_unknown_version_keeps_default_clients(self, monkeypatch):
+        """Test that an untested langchain-anthropic version is left alone."""
+        from src.agent.llm import client, pool
+
+        monkeypatch.setattr(client, "_ANTHROPIC_POOL_MAJORS", ())
+        llm = client.create_llm("claude-sonnet-4-20250514")
+
+        assert llm._client._client is not pool.get_sync_client()
@@ -0,0 +1,55 @@
+"""Tests for the stub server and load test harness."""
+
+import json
+
+from benchmarks.load_test import percentiles, run_load_test
+from benchmarks.stub_server import build_reply
+
+
+class TestStubReplies:
+    """Tests for the stub server's reply selection."""
+
+    def test_plan_tool_gets_plan(self):
+        body = {"tools": [{"type": "function", "function": {"name": "Plan"}}], "messages": []}
+
+        reply = build_reply(body, plan_steps=3)
+
+        name, args = reply["tool_calls"][0]
+        assert name == "Plan"
+        assert len(args["steps"]) == 3
+
+    def test_json_schema_gets_plan_content(self):
+        body = {"response_format": {"type": "json_schema"}, "messages": []}
+
+        reply = build_reply(body, plan_steps=2)
+
+        assert len(json.loads(reply["content"])["steps"]) == 2
+
+    def test_tool_result_gets_final_answer(self):
+        body = {
+            "tools": [{"type": "function", "function": {"name": "list_directory"}}],
+            "messages": [{"role": "user", "content": "go"}, {"role": "tool", "content": "a.txt"}],
+        }
+
+        reply = build_reply(body, plan_steps=2)
+
+        assert reply["tool_calls"] == []
+        assert reply["content"]
+
+
+class TestLoadTest:
+    """Tests for run_load_test."""
+
+    def test_percentiles(self):
+        summary = percentiles([float(i) for i in range(1, 101)])
+
+        assert summary == {"p50": 50.0, "p95": 95.0, "p99": 99.0, "max": 100.0}
+
+    def test_runs_sessions_against_stub(self):
+        report = run_load_test(sessions=3, concurrency=2, profile="instant", plan_steps=1)
+
+        assert report["completed"] == 3
+        assert report["errors"] == 0
+        # One planner and one executor call per session
+        assert report["llm_requests"] == 6
+        assert set(report["latency_s"]) == {"p50", "p95", "p99", "max"}
@@ -0,0 +1,110 @@
+"""Tests for logging configuration."""
+
+import json
+import logging
+
+import pytest
+import structlog
+
+from src.agent import logging as agent_logging
+from src.agent.logging import (
+    EventSampler,
+    debug_enabled,
+    lazy,
+    preview,
+    resolve_lazy_fields,
+    setup_logging,
+)
+
+
+@pytest.fixture
+def restore_logging():
+    """Undo setup_logging's global changes after a test."""
+    config = structlog.get_config()
+    root = logging.getLogger()
+    level = root.level
+    yield
+    agent_logging._stop_listener()
+    if agent_logging._handler is not None:
+        root.removeHandler(agent_logging._handler)
+        agent_logging._handler = None
+    root.setLevel(level)
+    structlog.configure(**config)
+
+
+class TestLazyFields:
+    """Tests for lazily computed log fields."""
+
+    def test_resolved_when_emitted(self):
+        event = {"event": "x", "args": preview({"path": "a" * 200}, 10), "n": 1}
+
+        assert resolve_lazy_fields(None, "info", event) == {
+            "event": "x",
+            "args": "{'path': '",
+            "n": 1,
+        }
+
+    def test_not_computed_for_disabled_level(self, restore_logging):
+        setup_logging(level="INFO", fmt="json", queue=False)
+        calls = []
+
+        structlog.get_logger("lazy-test").debug("skipped", value=lazy(calls.append, 1))
+
+        assert calls == []
+        assert not debug_enabled("lazy-test")
+
+
+class TestEventSampler:
+    """Tests for event sampling."""
+
+    def _emit(self, sampler: EventSampler, event: str, method: str = "info") -> bool:
+        try:
+            sampler(None, method, {"event": event})
+        except structlog.DropEvent:
+            return False
+        return True
+
+    def test_keeps_every_nth_event(self):
+        sampler = EventSampler({"Tool called": 0.25})
+
+        kept = [self._emit(sampler, "Tool called") for _ in range(8)]
+
+        assert kept == [True, False, False, False, True, False, False, False]
+        assert self._emit(sampler, "Plan created")
+
+    @pytest.mark.parametrize("rate", [0.1, 0.25, 0.4, 0.7, 0.9])
+    def test_keeps_the_configured_fraction(self, rate):
+        sampler = EventSampler({"Tool called": rate})
+
+        kept = sum(self._emit(sampler, "Tool called") for _ in range(1000))
+
+        assert kept == round(rate * 1000)
+
+    def test_never_samples_warnings(self):
+        sampler = EventSampler({"Step prefetch failed": 0})
+
+        assert self._emit(sampler, "Step prefetch failed", "warning")
+        assert not self._emit(sampler, "Step prefetch failed", "info")
+
+
+class TestSetupLogging:
+    """Tests for setup_logging output formats."""
+
+    def test_json_through_queue(self, restore_logging, capsys):
+        setup_logging(level="INFO", fmt="json", sample_rates={"Tick": 0.5})
+        logger = structlog.get_logger("json-test")
+
+        for i in range(4):
+            logger.info("Tick", i=i, text=preview("x" * 10, 3))
+        agent_logging._stop_listener()
+
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [line["i"] for line in lines] == [0, 2]
+        assert lines[0]["text"] == "xxx"
+        assert lines[0]["level"] == "info"
+        assert lines[0]["sample_rate"] == 0.5
+        assert "timestamp" in lines[0]
+
+    def test_rejects_unknown_format(self):
+        with pytest.raises(ValueError, match="Unknown log format"):
+            setup_logging(fmt="xml")
@@ -0,0 +1,125 @@
+"""Tests for the workspace manifest."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import HumanMessage
+
+from src.agent.graph.nodes.planner import create_planner_node
+from src.agent.models.plan import Plan, PlanStep
+from src.agent.tools.file import use_workspace
+from src.agent.tools.manifest import WorkspaceManifest, extract_symbols, workspace_context
+
+
+class TestExtractSymbols:
+    """Tests for extract_symbols."""
+
+    def test_python_top_level_definitions(self):
+        source = "import os\n\nclass Config:\n    def load(self): ...\n\nasync def main(): ...\n"
+
+        assert extract_symbols("app.py", source) == ("Config", "main")
+
+    def test_other_languages_and_markdown(self):
+        assert extract_symbols("a.ts", "export function run() {}\nclass Box {}") == ("run", "Box")
+        assert extract_symbols("README.md", "# Title\ntext\n## Usage\n") == ("Title", "Usage")
+        assert extract_symbols("data.json", '{"def x": 1}') == ()
+
+
+class TestWorkspaceManifest:
+    """Tests for WorkspaceManifest."""
+
+    def test_lists_files_and_skips_hidden_directories(self, tmp_path):
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "app.py").write_text("def main(): ...\n")
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "HEAD").write_text("ref")
+        manifest = WorkspaceManifest(str(tmp_path))
+
+        assert manifest.refresh() == 1
+
+        entry = manifest.entries["src/app.py"]
+        assert entry.symbols == ("main",)
+        assert manifest.render().startswith("- src/app.py (16 bytes): main")
+
+    def test_refresh_only_rereads_changed_files(self, tmp_path):
+        for name in ("a.py", "b.py"):
+            (tmp_path / name).write_text("x = 1\n")
+        manifest = WorkspaceManifest(str(tmp_path))
+        manifest.refresh()
+
+        (tmp_path / "b.py").write_text("def changed(): ...\n")
+        os.remove(tmp_path / "a.py")
+        with patch("src.agent.tools.manifest._read_symbols", return_value=()) as read:
+            assert manifest.refresh() == 2
+
+        read.assert_called_once()
+        assert list(manifest.entries) == ["b.py"]
+
+    def test_render_ignores_modification_time(self, tmp_path):
+        path = tmp_path / "notes.md"
+        path.write_text("# Notes\n")
+        manifest = WorkspaceManifest(str(tmp_path))
+        manifest.refresh()
+        before = manifest.render()
+
+        os.utime(path, ns=(0, 0))
+
+        assert manifest.refresh() == 1
+        assert manifest.render() == before
+
+    def test_symlinks_are_not_listed(self, tmp_path):
+        outside = tmp_path / "outside.txt"
+        outside.write_text("secret")
+        workspace = tmp_path / "workspace"
+        workspace.mkdir()
+        (workspace / "notes.md").write_text("# Notes\n")
+        (workspace / "link.txt").symlink_to(outside)
+        manifest = WorkspaceManifest(str(workspace))
+
+        manifest.refresh()
+
+        assert list(manifest.entries) == ["notes.md"]
+
+    def test_render_respects_budget(self, tmp_path):
+        for i in range(20):
+            (tmp_path / f"file_{i:02}.txt").write_text("x")
+        manifest = WorkspaceManifest(str(tmp_path))
+        manifest.refresh()
+
+        listing = manifest.render(budget=200)
+
+        assert len(listing) < 250
+        assert listing.endswith("more files")
+
+
+class TestPlannerManifest:
+    """Tests for giving the planner the manifest."""
+
+    def test_empty_workspace_adds_nothing(self, tmp_path):
+        assert workspace_context(str(tmp_path)) == ""
+
+    def test_planner_prompt_includes_manifest(self, tmp_path):
+        llm = MagicMock()
+        llm.with_structured_output.return_value.invoke.return_value = Plan(
+            goal="g",
+            reasoning="r",
+            steps=[
+                PlanStep(
+                    step_number=1,
+                    action="read_file",
+                    description="Read the notes",
+                    input_data="notes.md",
+                    expected_output="The notes",
+                )
+            ],
+        )
+        node = create_planner_node(llm)
+
+        with use_workspace(str(tmp_path)):
+            (tmp_path / "notes.md").write_text("# Notes\n")
+            node({"messages": [HumanMessage(content="Summarize the notes")]})
+
+        messages = llm.with_structured_output.return_value.invoke.call_args[0][0]
+        assert len(messages) == 3
+        assert "- notes.md (8 bytes): Notes" in messages[1].content
+        assert messages[2].content == "Create a plan for: Summarize the notes"
@@ -0,0 +1,87 @@
+"""Tests for tool call memoization."""
+
+import os
+from unittest.mock import patch
+
+from src.agent.core.agent import CodeAgent
+from src.agent.graph.nodes.executor import memoized_response
+from src.agent.llm.fake import ScriptedChatModel, plan_responder
+from src.agent.metrics import collect_run
+from src.agent.tools.file import list_directory, read_file, use_workspace
+from src.agent.tools.memo import ToolMemo, use_memo
+from tests.conftest import make_step
+
+
+class TestToolMemo:
+    """Tests for memoized tools."""
+
+    def test_reuses_result_until_file_changes(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("v1")
+        with use_workspace(str(tmp_path)), use_memo(ToolMemo()) as memo, collect_run() as run:
+            assert read_file.invoke({"path": "notes.txt"}) == "v1"
+            with patch("builtins.open", side_effect=AssertionError("read from disk")):
+                assert read_file.invoke({"path": "./notes.txt"}) == "v1"
+
+            path.write_text("version 2")
+            assert read_file.invoke({"path": "notes.txt"}) == "version 2"
+
+        assert len(memo) == 1
+        assert run.summary()["cache_hit_rates"]["tool_memo"] == 0.3333
+
+    def test_listing_invalidated_by_new_entry(self, tmp_path):
+        with use_workspace(str(tmp_path)), use_memo(ToolMemo()):
+            (tmp_path / "a.txt").write_text("a")
+            assert list_directory.invoke({"path": "."}) == "a.txt"
+            (tmp_path / "b.txt").write_text("b")
+            mtime = os.path.getmtime(tmp_path)
+            os.utime(tmp_path, (mtime + 1, mtime + 1))
+
+            assert list_directory.invoke({"path": "."}) == "a.txt\nb.txt"
+
+    def test_errors_are_not_memoized(self, tmp_path):
+        with use_workspace(str(tmp_path)), use_memo(ToolMemo()) as memo:
+            assert read_file.invoke({"path": "missing.txt"}).startswith("Error")
+
+        assert len(memo) == 0
+
+
+class TestMemoizedResponse:
+    """Tests for executor tool calls synthesized from the memo."""
+
+    def test_only_when_every_step_is_memoized(self, tmp_path):
+        (tmp_path / "a.txt").write_text("a")
+        tools = {"read_file", "list_directory"}
+        with use_workspace(str(tmp_path)), use_memo(ToolMemo()):
+            read_file.invoke({"path": "a.txt"})
+
+            response = memoized_response([make_step(1, "read_file", "a.txt")], tools)
+            partial = memoized_response(
+                [make_step(1, "read_file", "a.txt"), make_step(2, "list_directory", ".")], tools
+            )
+
+        assert response is not None
+        assert response.tool_calls[0]["args"] == {"path": "a.txt"}
+        assert partial is None
+        assert memoized_response([make_step(1, "read_file", "a.txt")], tools) is None
+
+
+class TestSessionMemo:
+    """Tests for tool memoization across session turns."""
+
+    def test_repeated_reads_skip_the_executor_llm(self, tmp_path):
+        llm = ScriptedChatModel(responder=plan_responder(2, "read_file", "path"))
+        with patch("src.agent.core.agent.create_llm", return_value=llm):
+            agent = CodeAgent(mode="planning")
+
+        with use_workspace(str(tmp_path)):
+            for name in ("item 1", "item 2"):
+                (tmp_path / name).write_text(name)
+            agent.run("Read the items", session_id="s")
+            calls_after_first = llm.call_count
+            second = agent.run_detailed("Read them again", session_id="s")
+
+        # Only the planner is called on the second turn
+        assert calls_after_first == 3
+        assert llm.call_count == 4
+        assert second.state["step_results"] == {0: "item 1", 1: "item 2"}
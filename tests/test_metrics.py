@@ -0,0 +1,160 @@
+"""Tests for in-process metrics."""
+
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from benchmarks.fixtures import echo, planning_state
+from src.agent.core.agent import CodeAgent
+from src.agent.graph.runner import LeanPlanRunner
+from src.agent.graph.workflow import create_planning_agent_graph
+from src.agent.llm.fake import ScriptedChatModel, plan_responder
+from src.agent.llm.scheduler import LLMScheduler, Priority, ScheduledChatModel
+from src.agent.metrics import (
+    REGISTRY,
+    MetricsCallbackHandler,
+    MetricsRegistry,
+    collect_run,
+    record_cache,
+    record_retry,
+)
+
+
+def _with_usage(responder):
+    """Attach token usage, including cached input, to every scripted response."""
+
+    def respond(messages, kwargs):
+        message = responder(messages, kwargs)
+        message.usage_metadata = {
+            "input_tokens": 100,
+            "output_tokens": 10,
+            "total_tokens": 110,
+            "input_token_details": {"cache_read": 40},
+        }
+        return message
+
+    return respond
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+
+
+class TestMetricsRegistry:
+    """Tests for MetricsRegistry."""
+
+    def test_renders_prometheus_text(self):
+        registry = MetricsRegistry()
+        registry.describe("calls_total", "counter", "Calls")
+        registry.describe("latency_seconds", "histogram", "Latency")
+
+        registry.inc("calls_total", tool="read_file")
+        registry.inc("calls_total", tool="read_file")
+        registry.observe("latency_seconds", 0.02, tool="read_file")
+
+        text = registry.render()
+        assert "# TYPE calls_total counter" in text
+        assert 'calls_total{tool="read_file"} 2' in text
+        assert 'latency_seconds_bucket{tool="read_file",le="0.01"} 0' in text
+        assert 'latency_seconds_bucket{tool="read_file",le="0.025"} 1' in text
+        assert 'latency_seconds_bucket{tool="read_file",le="+Inf"} 1' in text
+        assert 'latency_seconds_count{tool="read_file"} 1' in text
+
+
+class TestRunMetrics:
+    """Tests for per-run collection."""
+
+    def test_collects_only_inside_run(self):
+        record_retry("llm")
+        with collect_run() as run:
+            record_retry("llm")
+            record_cache("prefetch", hit=True)
+            record_cache("prefetch", hit=False)
+
+        summary = run.summary()
+        assert summary["retries"] == {"llm": 1}
+        assert summary["cache_hit_rates"] == {"prefetch": 0.5}
+        assert REGISTRY.counter_value("agent_retries_total", kind="llm") == 2
+
+    def test_graph_run_records_nodes_llm_tokens_and_tools(self):
+        llm = ScriptedChatModel(responder=_with_usage(plan_responder(2)))
+        graph = create_planning_agent_graph(llm, [echo])
+
+        with collect_run() as run:
+            graph.invoke(planning_state(), config={"callbacks": [MetricsCallbackHandler()]})
+
+        summary = run.summary()
+        # The executor runs once more to find the plan finished
+        assert summary["nodes"]["executor"]["count"] == 3
+        assert summary["nodes"]["tools"]["count"] == 2
+        assert summary["llm"]["calls"] == 3
+        assert summary["tokens"] == {"input": 300, "output": 30, "cached": 120}
+        assert summary["prompt_cache_hit_rate"] == 0.4
+        assert summary["tools"] == {"calls": 2, "errors": 0, "total_s": summary["tools"]["total_s"]}
+        assert REGISTRY.histogram_count("agent_node_duration_seconds", node="planner") == 1
+
+    def test_wrapped_models_are_counted_once(self):
+        inner = ScriptedChatModel(responder=_with_usage(plan_responder(1)))
+        llm = ScheduledChatModel(
+            model=inner, scheduler=LLMScheduler(), priority=Priority.PLANNER, tenant="t"
+        )
+        graph = create_planning_agent_graph(llm, [echo])
+
+        with collect_run() as run:
+            graph.invoke(planning_state(), config={"callbacks": [MetricsCallbackHandler()]})
+
+        summary = run.summary()
+        assert summary["llm"]["calls"] == 2
+        assert summary["tokens"]["input"] == 200
+
+    def test_lean_runner_reports_nodes(self):
+        runner = LeanPlanRunner(ScriptedChatModel(responder=plan_responder(2)), [echo])
+
+        with collect_run() as run:
+            runner.invoke(planning_state(), config={"callbacks": [MetricsCallbackHandler()]})
+
+        nodes = run.summary()["nodes"]
+        assert nodes["executor"]["count"] == 3
+        assert nodes["tools"]["count"] == 2
+        assert run.summary()["tools"]["calls"] == 2
+
+
+class TestCodeAgentMetrics:
+    """Tests for metrics returned from CodeAgent runs."""
+
+    def test_run_detailed_returns_summary(self):
+        llm = ScriptedChatModel(responses=[AIMessage(content="hello")])
+        with patch("src.agent.core.agent.create_llm", return_value=llm):
+            agent = CodeAgent(mode="simple")
+
+        result = agent.run_detailed("Hi")
+
+        assert result.metrics["llm"]["calls"] == 1
+        assert result.stats()["metrics"] is result.metrics
+        assert REGISTRY.counter_value("agent_runs_total", mode="simple", status="ok") == 1
+
+    def test_abandoned_stream_is_recorded(self):
+        llm = ScriptedChatModel(responses=[AIMessage(content="one two three")])
+        with patch("src.agent.core.agent.create_llm", return_value=llm):
+            agent = CodeAgent(mode="simple")
+
+        events = agent.stream("Hi")
+        assert next(events).type == "token"
+        events.close()
+
+        assert REGISTRY.counter_value("agent_runs_total", mode="simple", status="cancelled") == 1
+
+    async def test_abandoned_astream_is_recorded(self):
+        llm = ScriptedChatModel(responses=[AIMessage(content="one two three")])
+        with patch("src.agent.core.agent.create_llm", return_value=llm):
+            agent = CodeAgent(mode="simple")
+
+        events = agent.astream("Hi")
+        assert (await anext(events)).type == "token"
+        await events.aclose()
+
+        assert REGISTRY.counter_value("agent_runs_total", mode="simple", status="cancelled") == 1
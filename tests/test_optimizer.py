@@ -0,0 +1,67 @@
+"""Tests for the plan optimizer node."""
+
+from src.agent.graph.nodes.optimizer import create_optimizer_node, optimize_plan
+from tests.conftest import make_plan
+
+
+class TestOptimizePlan:
+    """Tests for optimize_plan."""
+
+    def test_removes_repeated_reads_and_renumbers(self):
+        plan = make_plan(
+            ("read_file", "notes.txt"),
+            ("list_directory", "."),
+            ("read_file", "./notes.txt"),
+            ("list_directory", ""),
+            ("write_file", "summary.txt"),
+        )
+
+        optimized, removed = optimize_plan(plan)
+
+        assert [(s.step_number, s.action) for s in optimized.steps] == [
+            (1, "read_file"),
+            (2, "list_directory"),
+            (3, "write_file"),
+        ]
+        assert len(removed) == 2
+
+    def test_keeps_read_after_write_to_same_file(self):
+        plan = make_plan(
+            ("read_file", "notes.txt"),
+            ("write_file", "notes.txt"),
+            ("read_file", "notes.txt", "Show the new notes"),
+        )
+
+        optimized, removed = optimize_plan(plan)
+
+        assert optimized is plan
+        assert removed == []
+
+    def test_removes_verification_after_write(self):
+        plan = make_plan(
+            ("write_file", "out/report.md"),
+            ("list_directory", "out", "Verify the report was created"),
+            ("read_file", "notes.txt"),
+        )
+
+        optimized, removed = optimize_plan(plan)
+
+        assert [s.action for s in optimized.steps] == ["write_file", "read_file"]
+        assert "verifies the write" in removed[0]
+
+
+class TestOptimizerNode:
+    """Tests for the optimizer node."""
+
+    def test_no_update_without_changes(self):
+        node = create_optimizer_node()
+
+        assert node({"plan": make_plan(("read_file", "a.txt"))}) == {}
+        assert node({"plan": None}) == {}
+
+    def test_updates_plan(self):
+        node = create_optimizer_node()
+
+        update = node({"plan": make_plan(("read_file", "a.txt"), ("read_file", "a.txt"))})
+
+        assert update["plan"].total_steps == 1
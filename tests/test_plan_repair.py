@@ -0,0 +1,190 @@
+"""Tests for local plan validation and repair."""
+
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.graph.nodes.planner import create_planner_node
+from src.agent.llm.fake import ScriptedChatModel
+from src.agent.models.plan import Plan
+from src.agent.models.repair import force_valid, normalize_action, plan_actions, repair_plan
+
+
+def _step(number, action, description="Do it", input_data="a.txt"):
+    return {
+        "step_number": number,
+        "action": action,
+        "description": description,
+        "input_data": input_data,
+        "expected_output": "Done",
+    }
+
+
+def _plan(*steps):
+    return {"goal": "Summarize notes", "reasoning": "Read then write", "steps": list(steps)}
+
+
+def _plan_message(args):
+    return AIMessage(content="", tool_calls=[{"name": "Plan", "args": args, "id": "plan"}])
+
+
+class TestNormalizeAction:
+    """Tests for normalize_action."""
+
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            ("read_file", "read_file"),
+            ("ReadFile", "read_file"),
+            ("Write-File", "write_file"),
+            ("ls", "list_directory"),
+            ("analyse", "analyze"),
+            ("raed_file", "read_file"),
+            ("deploy", None),
+            (None, None),
+        ],
+    )
+    def test_maps_variants_to_valid_actions(self, raw, expected):
+        """Test casing, separators, aliases and typos."""
+        assert normalize_action(raw) == expected
+
+    def test_tool_names_are_valid_actions(self):
+        """Test that the agent's own tools can be plan actions."""
+        actions = plan_actions(["echo"])
+
+        assert normalize_action("Echo", actions) == "echo"
+        assert normalize_action("echo") is None
+
+
+class TestRepairPlan:
+    """Tests for repair_plan."""
+
+    def test_valid_plan_is_unchanged(self):
+        """Test that a valid plan needs no fixes."""
+        plan = Plan.model_validate(_plan(_step(1, "read_file"), _step(2, "write_file")))
+
+        repair = repair_plan(plan)
+
+        assert repair.ok
+        assert repair.plan == plan
+        assert repair.fixes == []
+
+    def test_fixes_actions_numbering_and_empty_steps(self):
+        """Test the fixes that need no LLM call."""
+        raw = _plan(
+            _step(0, "Read", input_data="notes.txt"),
+            {"action": "", "description": ""},
+            {"step_number": 5, "action": "write", "input_data": "out.txt"},
+        )
+
+        repair = repair_plan(raw)
+
+        assert repair.ok
+        assert [step.step_number for step in repair.plan.steps] == [1, 2]
+        assert [step.action for step in repair.plan.steps] == ["read_file", "write_file"]
+        assert repair.plan.steps[1].description == "write_file out.txt"
+        assert "renumbered steps" in repair.fixes
+
+    def test_completes_truncated_json(self):
+        """Test that JSON cut off mid-plan is closed and parsed."""
+        text = json.dumps(_plan(_step(1, "read_file"), _step(2, "write_file")))[:-30]
+
+        repair = repair_plan(f"```json\n{text}", goal="Summarize notes")
+
+        assert repair.ok
+        assert repair.plan.steps[0].action == "read_file"
+        assert "completed truncated JSON" in repair.fixes
+
+    def test_reports_what_needs_the_llm(self):
+        """Test that unknown actions and long plans are left as problems."""
+        raw = _plan(_step(1, "deploy"), *(_step(i, "read_file") for i in range(2, 10)))
+
+        repair = repair_plan(raw)
+
+        assert not repair.ok
+        assert "unknown action 'deploy'" in repair.problems[0]
+        assert "9 steps" in repair.problems[1]
+
+    def test_plan_without_steps_needs_the_llm(self):
+        """Test that an empty plan is a problem, except as a replan."""
+        raw = {"goal": "Summarize notes", "steps": []}
+
+        assert repair_plan(raw).problems == ["plan has no steps"]
+        assert repair_plan(raw, allow_empty=True).ok
+
+    def test_rejects_output_that_is_not_a_plan(self):
+        """Test that non-JSON output has no plan to repair."""
+        repair = repair_plan("I cannot help with that")
+
+        assert repair.plan is None
+        assert force_valid(repair) is None
+
+    def test_force_valid_drops_unrepairable_parts(self):
+        """Test the last resort once the LLM could not fix the plan."""
+        raw = _plan(_step(1, "deploy"), *(_step(i, "read_file") for i in range(2, 10)))
+
+        plan = force_valid(repair_plan(raw))
+
+        assert plan.total_steps == 7
+        assert plan.steps[0].action == "analyze"
+
+
+class TestPlannerRepair:
+    """Tests for plan repair in the planner node."""
+
+    def test_local_repair_needs_no_extra_call(self):
+        """Test that a fixable plan costs a single LLM call."""
+        llm = ScriptedChatModel(responses=[_plan_message(_plan(_step(3, "ReadFile")))])
+
+        result = create_planner_node(llm)({"messages": [HumanMessage(content="Summarize")]})
+
+        assert result["plan"].steps[0].step_number == 1
+        assert result["plan"].steps[0].action == "read_file"
+        assert llm.call_count == 1
+
+    def test_invalid_plan_schema_is_repaired(self):
+        """Test that arguments failing Plan validation are repaired, not fatal."""
+        args = {"steps": [{"action": "read", "input_data": "notes.txt"}]}
+        llm = ScriptedChatModel(responses=[_plan_message(args)])
+
+        result = create_planner_node(llm)({"messages": [HumanMessage(content="Summarize")]})
+
+        assert result["plan"].goal == "Summarize"
+        assert result["plan"].steps[0].action == "read_file"
+        assert llm.call_count == 1
+
+    def test_llm_fixes_remaining_problems(self):
+        """Test that the LLM is asked only about problems repair cannot fix."""
+        llm = ScriptedChatModel(
+            responses=[
+                _plan_message(_plan(_step(1, "read_file"), _step(2, "deploy"))),
+                _plan_message(_plan(_step(1, "read_file"), _step(2, "write_file"))),
+            ]
+        )
+
+        result = create_planner_node(llm)({"messages": [HumanMessage(content="Summarize")]})
+
+        assert [step.action for step in result["plan"].steps] == ["read_file", "write_file"]
+        assert llm.call_count == 2
+
+    def test_empty_plan_is_sent_back_to_the_llm(self):
+        """Test that a plan without steps costs a repair call, then fails."""
+        empty = _plan_message({"goal": "Summarize", "steps": []})
+        llm = ScriptedChatModel(responses=[empty, _plan_message(_plan(_step(1, "read_file")))])
+
+        result = create_planner_node(llm)({"messages": [HumanMessage(content="Summarize")]})
+
+        assert result["plan"].steps[0].action == "read_file"
+        assert llm.call_count == 2
+        with pytest.raises(ValueError, match="no steps"):
+            create_planner_node(ScriptedChatModel(responses=[empty, empty]))(
+                {"messages": [HumanMessage(content="Summarize")]}
+            )
+
+    def test_unusable_output_fails(self):
+        """Test that the planner fails when no plan can be recovered."""
+        llm = ScriptedChatModel(responses=[AIMessage(content="no"), AIMessage(content="still no")])
+
+        with pytest.raises(ValueError, match="usable plan"):
+            create_planner_node(llm)({"messages": [HumanMessage(content="Summarize")]})
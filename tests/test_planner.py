@@ -0,0 +1,216 @@
+"""Tests for the planner node and streamed plan generation."""
+
+import json
+from unittest.mock import MagicMock
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+
+from src.agent.graph.nodes.executor import build_executor_messages
+from src.agent.graph.nodes.planner import create_planner_node
+from src.agent.graph.nodes.prefetch import StepPrefetcher
+from src.agent.graph.workflow import create_planning_agent_graph
+from src.agent.llm.fake import ScriptedChatModel, plan_responder
+from src.agent.metrics import collect_run
+from src.agent.models.plan import Plan, PlanStep
+from src.agent.tools.file import read_file, use_workspace
+
+PLAN = {
+    "goal": "Summarize notes",
+    "reasoning": "Read then write",
+    "steps": [
+        {
+            "step_number": 1,
+            "action": "read_file",
+            "description": "Read notes",
+            "input_data": "notes.txt",
+            "expected_output": "File content",
+        },
+        {
+            "step_number": 2,
+            "action": "write_file",
+            "description": "Write summary",
+            "input_data": "summary.txt",
+            "expected_output": "Summary written",
+        },
+    ],
+}
+
+
+def _streaming_llm(payload: str, chunk_size: int = 7) -> MagicMock:
+    """Create a mock LLM that streams a Plan tool call in small chunks."""
+    chunks = [
+        AIMessageChunk(
+            content="",
+            tool_call_chunks=[
+                {
+                    "name": "Plan" if i == 0 else None,
+                    "args": payload[i : i + chunk_size],
+                    "id": "call_1" if i == 0 else None,
+                    "index": 0,
+                }
+            ],
+        )
+        for i in range(0, len(payload), chunk_size)
+    ]
+    mock_llm = MagicMock()
+    mock_llm.bind_tools.return_value.stream.return_value = iter(chunks)
+    return mock_llm
+
+
+class TestPlannerNode:
+    """Tests for create_planner_node."""
+
+    def test_planner_uses_structured_output_by_default(self):
+        """Test that the non-streaming planner returns the structured plan."""
+        mock_llm = MagicMock()
+        plan = Plan.model_validate(PLAN)
+        mock_llm.with_structured_output.return_value.invoke.return_value = plan
+
+        node = create_planner_node(mock_llm)
+        result = node({"messages": [HumanMessage(content="Summarize notes")]})
+
+        assert result["plan"] == plan
+        assert result["current_step_index"] == 0
+        mock_llm.bind_tools.assert_not_called()
+
+    def test_planner_returns_empty_without_request(self):
+        """Test that the planner does nothing without a human message."""
+        node = create_planner_node(MagicMock())
+
+        assert node({"messages": []}) == {}
+
+    def test_streaming_planner_builds_full_plan(self):
+        """Test that the streaming planner assembles the complete plan."""
+        mock_llm = _streaming_llm(json.dumps(PLAN))
+
+        node = create_planner_node(mock_llm, stream=True)
+        result = node({"messages": [HumanMessage(content="Summarize notes")]})
+
+        assert result["plan"] == Plan.model_validate(PLAN)
+        mock_llm.bind_tools.assert_called_once_with([Plan], tool_choice="Plan")
+
+    def test_streaming_planner_reports_first_step_before_completion(self):
+        """Test that step 1 is reported while later steps are still streaming."""
+        payload = json.dumps(PLAN)
+        mock_llm = _streaming_llm(payload)
+        consumed: list[int] = []
+        original = mock_llm.bind_tools.return_value.stream.return_value
+
+        def tracking_stream():
+            for count, chunk in enumerate(original, start=1):
+                consumed.append(count)
+                yield chunk
+
+        mock_llm.bind_tools.return_value.stream.return_value = tracking_stream()
+        seen: list[tuple[int, int, int]] = []
+
+        def on_step(index: int, step: PlanStep) -> None:
+            seen.append((index, step.step_number, len(consumed)))
+
+        node = create_planner_node(mock_llm, stream=True, on_step=on_step)
+        node({"messages": [HumanMessage(content="Summarize notes")]})
+
+        assert [(index, number) for index, number, _ in seen] == [(0, 1), (1, 2)]
+        total_chunks = len(consumed)
+        assert seen[0][2] < total_chunks
+
+    def test_streaming_planner_accepts_complete_tool_calls(self):
+        """Test a stream that delivers the whole tool call instead of chunks."""
+        mock_llm = MagicMock()
+        message = AIMessage(content="", tool_calls=[{"name": "Plan", "args": PLAN, "id": "1"}])
+        mock_llm.bind_tools.return_value.stream.return_value = iter([message])
+        seen: list[int] = []
+
+        node = create_planner_node(mock_llm, stream=True, on_step=lambda i, _: seen.append(i))
+        result = node({"messages": [HumanMessage(content="Summarize notes")]})
+
+        assert result["plan"] == Plan.model_validate(PLAN)
+        assert seen == [0, 1]
+        mock_llm.with_structured_output.assert_not_called()
+
+
+class TestStepPrefetcher:
+    """Tests for StepPrefetcher."""
+
+    def test_pop_returns_prefetched_response(self):
+        """Test that a submitted prompt is answered from the prefetch."""
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value = AIMessage(content="done")
+        prefetcher = StepPrefetcher(mock_llm)
+        step = PlanStep.model_validate(PLAN["steps"][0])
+
+        prefetcher.submit("run", build_executor_messages(step, {}))
+        response = prefetcher.pop("run", build_executor_messages(step, {}))
+
+        assert response.content == "done"
+        mock_llm.invoke.assert_called_once()
+
+    def test_pop_misses_for_different_prompt(self):
+        """Test that a different prompt is not served from the prefetch."""
+        prefetcher = StepPrefetcher(MagicMock())
+        step = PlanStep.model_validate(PLAN["steps"][0])
+        prefetcher.submit("run", build_executor_messages(step, {}))
+
+        assert prefetcher.pop("run", build_executor_messages(step, {0: "previous"})) is None
+
+    def test_pop_returns_none_when_call_failed(self):
+        """Test that a failed speculative call falls back to a normal call."""
+        mock_llm = MagicMock()
+        mock_llm.invoke.side_effect = RuntimeError("boom")
+        prefetcher = StepPrefetcher(mock_llm)
+        messages = [SystemMessage(content="s"), HumanMessage(content="h")]
+        prefetcher.submit("run", messages)
+
+        assert prefetcher.pop("run", messages) is None
+
+    def test_runs_keep_their_own_prefetches(self):
+        """Test that one run's prefetch is neither used nor replaced by another's."""
+        mock_llm = MagicMock()
+        mock_llm.invoke.side_effect = lambda messages: AIMessage(content=messages[-1].content)
+        prefetcher = StepPrefetcher(mock_llm)
+        first, second = (PlanStep.model_validate(step) for step in PLAN["steps"])
+
+        prefetcher.submit("a", build_executor_messages(first, {}))
+        prefetcher.submit("b", build_executor_messages(second, {}))
+
+        assert prefetcher.pop("b", build_executor_messages(first, {})) is None
+        response = prefetcher.pop("a", build_executor_messages(first, {}))
+        assert response.content == build_executor_messages(first, {})[-1].content
+
+    def test_only_prefetched_steps_count_towards_hit_rate(self):
+        """Test that calls the run never prefetched are not cache misses."""
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value = AIMessage(content="done")
+        prefetcher = StepPrefetcher(mock_llm)
+        first, second = (PlanStep.model_validate(step) for step in PLAN["steps"])
+
+        with collect_run() as run:
+            prefetcher.submit("run", build_executor_messages(first, {}))
+            prefetcher.pop("run", build_executor_messages(first, {}))
+            prefetcher.pop("run", build_executor_messages(second, {0: "notes"}))
+            prefetcher.pop(None, build_executor_messages(second, {0: "notes"}))
+
+        assert run.summary()["cache_hit_rates"] == {"prefetch": 1.0}
+
+    def test_graph_runs_use_their_own_prefetch(self, tmp_path):
+        """Test that each run of a shared graph picks up the step it prefetched."""
+        llm = ScriptedChatModel(responder=plan_responder(2, tool_name="read_file", arg_name="path"))
+        graph = create_planning_agent_graph(llm, [read_file], stream_plan=True)
+
+        (tmp_path / "item 1").write_text("first")
+        (tmp_path / "item 2").write_text("second")
+        with use_workspace(str(tmp_path)), collect_run() as run:
+            for _ in range(2):
+                graph.invoke(
+                    {
+                        "messages": [HumanMessage(content="Read the items")],
+                        "plan": None,
+                        "current_step_index": 0,
+                        "step_results": {},
+                        "replans_count": 0,
+                        "active_steps": 1,
+                    }
+                )
+
+        assert run.summary()["cache_hit_rates"] == {"prefetch": 1.0}
+        assert llm.call_count == 6  # Per run: planner, prefetched step 1, step 2
@@ -0,0 +1,101 @@
+"""Tests for the shared HTTP connection pools."""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.agent.llm import pool
+
+
+@pytest.fixture(autouse=True)
+def reset_pool():
+    """Restore default pool settings around each test."""
+    pool.configure_pool(**vars(pool.PoolConfig()))
+    yield
+    pool.configure_pool(**vars(pool.PoolConfig()))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):  # noqa: N802
+        self.send_response(401)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class TestPool:
+    """Tests for the pool module."""
+
+    def test_clients_are_shared(self):
+        """Test that repeated calls return the same clients."""
+        assert pool.get_sync_client() is pool.get_sync_client()
+        assert pool.get_async_client() is pool.get_async_client()
+
+    def test_configure_pool_applies_limits(self):
+        """Test that pool settings are applied to new clients."""
+        config = pool.configure_pool(max_connections=7, keepalive_expiry=5.0)
+        client = pool.get_sync_client()
+
+        assert config.max_connections == 7
+        assert client._transport._pool._max_connections == 7
+        assert client._transport._pool._keepalive_expiry == 5.0
+
+    def test_configure_pool_replaces_clients(self):
+        """Test that reconfiguring closes the old clients and creates new ones."""
+        old = pool.get_sync_client()
+
+        pool.configure_pool(max_keepalive_connections=2)
+
+        assert old.is_closed
+        assert pool.get_sync_client() is not old
+
+    def test_async_client_works_across_event_loops(self):
+        """Test that successive asyncio.run calls do not reuse dead connections."""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+        async def head() -> int:
+            response = await pool.get_async_client().head(url)
+            return response.status_code
+
+        try:
+            assert asyncio.run(head()) == 401
+            assert asyncio.run(head()) == 401
+        finally:
+            server.shutdown()
+
+    def test_http2_without_h2_falls_back(self, monkeypatch):
+        """Test that HTTP/2 is disabled when the h2 package is missing."""
+        monkeypatch.setattr(pool, "_http2_available", lambda: False)
+        pool.configure_pool(http2=True)
+
+        assert isinstance(pool.get_sync_client(), httpx.Client)
+
+    def test_prewarm_keeps_connection_open(self):
+        """Test that prewarming leaves an idle keep-alive connection."""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+            reached = pool.prewarm([url, url])
+
+            assert reached == 1
+            assert len(pool.get_sync_client()._transport._pool.connections) == 1
+        finally:
+            server.shutdown()
+
+    def test_prewarm_skips_unreachable(self):
+        """Test that unreachable endpoints are reported, not raised."""
+        pool.configure_pool(connect_timeout=0.5)
+
+        assert pool.prewarm(["http://127.0.0.1:9/"]) == 0
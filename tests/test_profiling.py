@@ -0,0 +1,165 @@
+"""Tests for on-demand run profiling."""
+
+import json
+import pstats
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from benchmarks.fixtures import echo, planning_state
+from src.agent.core.agent import CodeAgent
+from src.agent.graph.workflow import create_planning_agent_graph
+from src.agent.llm.fake import ScriptedChatModel, plan_responder
+from src.agent.profiling import (
+    ActivityTracker,
+    ProfileConfig,
+    ProfileSession,
+    RunProfiler,
+    profile_config_from_env,
+)
+
+
+class TestProfileConfig:
+    """Tests for profiling configuration."""
+
+    def test_disabled_without_env(self, monkeypatch):
+        monkeypatch.delenv("BSAI_PROFILE", raising=False)
+
+        assert profile_config_from_env() is None
+
+    def test_from_env(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("BSAI_PROFILE", "1")
+        monkeypatch.setenv("BSAI_PROFILE_DIR", str(tmp_path))
+        monkeypatch.setenv("BSAI_PROFILE_EVERY", "10")
+        monkeypatch.setenv("BSAI_PROFILE_MEMORY", "0")
+
+        config = profile_config_from_env()
+
+        assert config == ProfileConfig(
+            mode="cprofile", output_dir=str(tmp_path), every=10, memory=False
+        )
+
+    def test_rejects_unknown_mode(self):
+        with pytest.raises(ValueError, match="Unknown profile mode"):
+            ProfileConfig(mode="perf")
+
+    def test_profiles_every_nth_run(self):
+        profiler = RunProfiler(ProfileConfig(every=3))
+
+        due = [profiler.should_profile()[0] for _ in range(7)]
+
+        assert due == [True, False, False, True, False, False, True]
+
+
+class TestActivityTracker:
+    """Tests for per-node and per-tool attribution."""
+
+    def test_attributes_nodes_and_tools(self):
+        graph = create_planning_agent_graph(ScriptedChatModel(responder=plan_responder(2)), [echo])
+        tracker = ActivityTracker()
+
+        graph.invoke(planning_state(), config={"callbacks": [tracker]})
+
+        summary = tracker.summary()
+        assert summary["nodes"]["executor"]["calls"] == 3
+        assert summary["nodes"]["planner"]["calls"] == 1
+        assert summary["tools"]["echo"]["calls"] == 2
+        assert not any(tracker.labels(thread) for thread in list(tracker._active))
+
+
+class TestProfileSession:
+    """Tests for ProfileSession."""
+
+    def test_overlapping_runs_share_tracemalloc(self, tmp_path):
+        """Test that the first run to finish does not stop the other's tracing."""
+        config = ProfileConfig(mode="sampling", output_dir=str(tmp_path))
+        first, second = ProfileSession(config, 1), ProfileSession(config, 2)
+
+        first_run, second_run = first.active(), second.active()
+        first_run.__enter__()
+        second_run.__enter__()
+        first_run.__exit__(None, None, None)
+        assert tracemalloc.is_tracing()
+        second_run.__exit__(None, None, None)
+
+        assert not tracemalloc.is_tracing()
+        assert any(path.endswith(".memory.txt") for path in second.paths)
+
+    def test_overlapping_cprofile_runs_fall_back_to_sampling(self, tmp_path):
+        """Test that a run overlapping a cProfile'd one is sampled instead."""
+        config = ProfileConfig(output_dir=str(tmp_path), memory=False)
+        first, second = ProfileSession(config, 1), ProfileSession(config, 2)
+
+        with first.active(), second.active():
+            sum(range(1000))
+        third = ProfileSession(config, 3)
+        with third.active():
+            pass
+
+        assert any(path.endswith(".pstats") for path in first.paths)
+        assert any(path.endswith(".pstats") for path in third.paths)
+        assert any(path.endswith(".collapsed") for path in second.paths)
+        with open(second.paths[-1], encoding="utf-8") as f:
+            assert json.load(f)["mode"] == "sampling"
+
+    def test_failed_start_releases_tracemalloc(self, tmp_path):
+        """Test that a profiler failing to start does not leave tracing on."""
+        config = ProfileConfig(output_dir=str(tmp_path))
+
+        with (
+            patch("src.agent.profiling._enable_cprofile", side_effect=RuntimeError("busy")),
+            pytest.raises(RuntimeError),
+        ):
+            with ProfileSession(config, 1).active():
+                pass
+
+        assert not tracemalloc.is_tracing()
+
+
+class TestCodeAgentProfiling:
+    """Tests for profiling on CodeAgent."""
+
+    def _agent(self, **kwargs) -> CodeAgent:
+        llm = ScriptedChatModel(responses=[AIMessage(content="hello")] * 3)
+        with patch("src.agent.core.agent.create_llm", return_value=llm):
+            return CodeAgent(mode="simple", **kwargs)
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("BSAI_PROFILE", raising=False)
+
+        result = self._agent().run_detailed("Hi")
+
+        assert result.profile_paths == []
+
+    def test_cprofile_writes_reports(self, tmp_path):
+        agent = self._agent(profile=ProfileConfig(output_dir=str(tmp_path)))
+
+        result = agent.run_detailed("Hi")
+
+        suffixes = sorted(path.rsplit(".", 1)[1] for path in result.profile_paths)
+        assert suffixes == ["json", "pstats", "txt"]
+        stats_path = next(p for p in result.profile_paths if p.endswith(".pstats"))
+        assert pstats.Stats(stats_path).total_calls > 0
+        summary_path = next(p for p in result.profile_paths if p.endswith(".summary.json"))
+        with open(summary_path, encoding="utf-8") as f:
+            summary = json.load(f)
+        assert summary["nodes"]["agent"]["calls"] == 1
+        assert "allocated_kb" in summary["nodes"]["agent"]
+
+    def test_sampling_writes_collapsed_stacks(self, tmp_path):
+        config = ProfileConfig(mode="sampling", output_dir=str(tmp_path), memory=False)
+        agent = self._agent(profile=config)
+
+        result = agent.run_detailed("Hi")
+
+        assert [p.rsplit(".", 1)[1] for p in result.profile_paths] == ["collapsed", "json"]
+
+    def test_every_nth_run(self, tmp_path):
+        config = ProfileConfig(output_dir=str(tmp_path), every=2, memory=False)
+        agent = self._agent(profile=config)
+
+        results = [agent.run_detailed("Hi") for _ in range(3)]
+
+        assert [bool(result.profile_paths) for result in results] == [True, False, True]
@@ -0,0 +1,244 @@
+"""Tests for the hedging and failover router model."""
+
+import threading
+import time
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import BaseModel
+
+from src.agent.core.agent import CodeAgent
+from src.agent.graph.nodes.planner import create_planner_node
+from src.agent.llm.fake import ScriptedChatModel
+from src.agent.llm.router import ProviderHealth, RouterChatModel
+
+
+class StubModel(BaseChatModel):
+    """Local stub model with a fixed latency and optional failure."""
+
+    reply: str = "ok"
+    delay: float = 0.0
+    fail: bool = False
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.reply} unavailable")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    def bind_tools(self, tools, **kwargs: Any):
+        return self.bind(tools=tools, **kwargs)
+
+
+def _router(*models: StubModel, **kwargs: Any) -> RouterChatModel:
+    return RouterChatModel(routes=list(models), route_names=[m.reply for m in models], **kwargs)
+
+
+class TestRouterChatModel:
+    """Tests for RouterChatModel."""
+
+    def test_uses_primary_when_fast(self):
+        """Test that a fast primary answers without hedging."""
+        primary, secondary = StubModel(reply="primary"), StubModel(reply="secondary")
+
+        result = _router(primary, secondary, hedge_delay=1.0).invoke([HumanMessage("hi")])
+
+        assert result.content == "primary"
+        assert secondary.calls == 0
+
+    def test_hedges_slow_primary(self):
+        """Test that a slow primary is hedged and the faster answer wins."""
+        primary = StubModel(reply="primary", delay=1.0)
+        secondary = StubModel(reply="secondary")
+
+        start = time.monotonic()
+        result = _router(primary, secondary, hedge_delay=0.05).invoke([HumanMessage("hi")])
+
+        assert result.content == "secondary"
+        assert time.monotonic() - start < 0.9
+
+    def test_no_hedge_when_disabled(self):
+        """Test that hedging can be turned off."""
+        primary = StubModel(reply="primary", delay=0.2)
+        secondary = StubModel(reply="secondary")
+
+        result = _router(primary, secondary, hedge_delay=0.01, hedge=False).invoke(
+            [HumanMessage("hi")]
+        )
+
+        assert result.content == "primary"
+        assert secondary.calls == 0
+
+    def test_fails_over_on_error(self):
+        """Test that an error from the primary fails over immediately."""
+        primary = StubModel(reply="primary", fail=True)
+        secondary = StubModel(reply="secondary")
+
+        result = _router(primary, secondary, hedge_delay=5.0).invoke([HumanMessage("hi")])
+
+        assert result.content == "secondary"
+
+    def test_raises_last_error_when_all_fail(self):
+        """Test that the error is raised when every model fails."""
+        router = _router(StubModel(reply="a", fail=True), StubModel(reply="b", fail=True))
+
+        with pytest.raises(ConnectionError, match="b unavailable"):
+            router.invoke([HumanMessage("hi")])
+
+    def test_circuit_opens_after_repeated_failures(self):
+        """Test that a failing provider is skipped once its circuit opens."""
+        primary = StubModel(reply="primary", fail=True)
+        secondary = StubModel(reply="secondary")
+        router = _router(primary, secondary, failure_threshold=2, reset_timeout=60)
+
+        for _ in range(4):
+            router.invoke([HumanMessage("hi")])
+
+        assert primary.calls == 2
+        assert router.health[0].is_open
+
+    def test_timeout_raises(self):
+        """Test that the overall timeout is enforced."""
+        router = _router(StubModel(reply="slow", delay=0.5), timeout=0.05)
+
+        with pytest.raises(TimeoutError):
+            router.invoke([HumanMessage("hi")])
+
+    def test_bind_tools_shares_health(self):
+        """Test that tool-bound routers share circuit state."""
+        router = _router(StubModel(reply="a"), StubModel(reply="b"))
+
+        bound = router.bind_tools([])
+
+        assert bound.health is router.health
+        assert bound.invoke([HumanMessage("hi")]).content == "a"
+
+    def test_with_structured_output_routes_tool_calls(self):
+        """Test that structured output works through the router."""
+
+        class Answer(BaseModel):
+            value: int
+
+        class ToolStub(StubModel):
+            def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+                message = AIMessage(
+                    content="",
+                    tool_calls=[{"name": "Answer", "args": {"value": 42}, "id": "1"}],
+                )
+                return ChatResult(generations=[ChatGeneration(message=message)])
+
+        router = _router(ToolStub(reply="tools"))
+
+        assert router.with_structured_output(Answer).invoke("q") == Answer(value=42)
+
+
+class TestRouterStreaming:
+    """Tests for streaming through RouterChatModel."""
+
+    def test_streams_chunks_from_primary(self):
+        """Test that tokens arrive as the primary streams them."""
+        primary = ScriptedChatModel(responses=[AIMessage(content="one two three")])
+        secondary = StubModel(reply="secondary")
+        router = RouterChatModel(routes=[primary, secondary], route_names=["p", "s"])
+
+        chunks = [chunk.content for chunk in router.stream([HumanMessage("hi")])]
+
+        assert "".join(chunks) == "one two three"
+        assert len(chunks) >= 3
+        assert secondary.calls == 0
+
+    def test_agent_token_events_arrive_once(self):
+        """Test that token events pass through the router without duplicates."""
+        primary = ScriptedChatModel(responses=[AIMessage(content="all done here")])
+        router = RouterChatModel(routes=[primary, StubModel()], route_names=["p", "s"])
+        with patch("src.agent.core.agent.create_llm", return_value=router):
+            agent = CodeAgent(mode="simple")
+
+        tokens = [event.data["text"] for event in agent.stream("hi") if event.type == "token"]
+
+        assert tokens == ["all ", "done ", "here"]
+
+    def test_fails_over_before_first_chunk(self):
+        """Test that a model failing before any output fails over."""
+        primary, secondary = StubModel(reply="primary", fail=True), StubModel(reply="secondary")
+
+        chunks = list(_router(primary, secondary).stream([HumanMessage("hi")]))
+
+        assert "".join(str(chunk.content) for chunk in chunks) == "secondary"
+        assert primary.calls == 1
+
+    def test_streamed_plan_needs_no_repair_call(self):
+        """Test that a routed streaming planner gets the plan tool call."""
+        plan = {
+            "goal": "Read notes",
+            "reasoning": "One read",
+            "steps": [
+                {
+                    "step_number": 1,
+                    "action": "read_file",
+                    "description": "Read notes",
+                    "input_data": "notes.txt",
+                    "expected_output": "Content",
+                }
+            ],
+        }
+        message = AIMessage(content="", tool_calls=[{"name": "Plan", "args": plan, "id": "p"}])
+        primary = ScriptedChatModel(responses=[message])
+        router = RouterChatModel(routes=[primary, StubModel()], route_names=["p", "s"])
+
+        result = create_planner_node(router, stream=True)(
+            {"messages": [HumanMessage(content="Read notes")]}
+        )
+
+        assert result["plan"].steps[0].action == "read_file"
+        assert primary.call_count == 1
+
+
+class TestProviderHealth:
+    """Tests for ProviderHealth."""
+
+    def test_percentile(self):
+        """Test the latency percentile computation."""
+        health = ProviderHealth("m")
+        for latency in range(1, 101):
+            health.record_success(latency / 100)
+
+        assert health.percentile(95) == 0.95
+        assert health.percentile(50) == 0.5
+
+    def test_half_open_allows_single_trial(self):
+        """Test that only one trial request passes after the reset timeout."""
+        health = ProviderHealth("m", failure_threshold=1, reset_timeout=0.0)
+        health.record_failure()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(health.allow_request()))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results.count(True) == 1
+
+    def test_success_closes_circuit(self):
+        """Test that a successful trial closes the circuit."""
+        health = ProviderHealth("m", failure_threshold=1, reset_timeout=0.0)
+        health.record_failure()
+        health.allow_request()
+
+        health.record_success(0.1)
+
+        assert not health.is_open
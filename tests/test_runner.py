@@ -0,0 +1,134 @@
+"""Tests for the lean plan runner."""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.errors import GraphRecursionError
+
+from benchmarks.fixtures import echo, planning_state
+from src.agent.graph.runner import LeanPlanRunner
+from src.agent.graph.workflow import create_planning_agent_graph
+from src.agent.llm.fake import ScriptedChatModel
+
+
+def _plan(n_steps: int) -> AIMessage:
+    steps = [
+        {
+            "step_number": i + 1,
+            "action": "echo",
+            "description": f"Echo {i + 1}",
+            "input_data": str(i + 1),
+            "expected_output": "echoed",
+        }
+        for i in range(n_steps)
+    ]
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {"name": "Plan", "args": {"goal": "g", "reasoning": "r", "steps": steps}, "id": "p"}
+        ],
+    )
+
+
+def _echo_call(i: int) -> AIMessage:
+    return AIMessage(
+        content="", tool_calls=[{"name": "echo", "args": {"text": str(i)}, "id": f"c{i}"}]
+    )
+
+
+def _script(n_steps: int) -> list[AIMessage]:
+    return [_plan(n_steps)] + [_echo_call(i + 1) for i in range(n_steps)]
+
+
+def _summary(state: dict) -> tuple:
+    return (
+        state["plan"],
+        state["current_step_index"],
+        state["step_results"],
+        state["replans_count"],
+        [(type(m).__name__, m.content) for m in state["messages"]],
+    )
+
+
+class TestLeanPlanRunner:
+    """Tests for LeanPlanRunner."""
+
+    def test_matches_graph_output(self):
+        """Test that the lean runner produces the same state as the graph."""
+        graph = create_planning_agent_graph(ScriptedChatModel(responses=_script(3)), [echo])
+        runner = LeanPlanRunner(ScriptedChatModel(responses=_script(3)), [echo])
+
+        expected = graph.invoke(planning_state("Echo things"))
+        actual = runner.invoke(planning_state("Echo things"))
+
+        assert _summary(actual) == _summary(expected)
+        assert actual["step_results"] == {0: "1", 1: "2", 2: "3"}
+
+    def test_fused_steps_run_tools_in_parallel(self):
+        """Test that several tool calls in one response are all executed."""
+        plan = _plan(2)
+        for step in plan.tool_calls[0]["args"]["steps"]:
+            step["action"] = "read_file"
+        fused = AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "echo", "args": {"text": "a"}, "id": "a"},
+                {"name": "echo", "args": {"text": "b"}, "id": "b"},
+            ],
+        )
+        runner = LeanPlanRunner(ScriptedChatModel(responses=[plan, fused]), [echo], fuse_steps=2)
+
+        result = runner.invoke(planning_state("Echo things"))
+
+        tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+        assert [m.content for m in tool_messages] == ["a", "b"]
+
+    def test_invalid_tool_is_reported_to_llm(self):
+        """Test that an unknown tool name becomes an error tool message."""
+        bad_call = AIMessage(content="", tool_calls=[{"name": "missing", "args": {}, "id": "x"}])
+        runner = LeanPlanRunner(ScriptedChatModel(responses=[_plan(1), bad_call, _plan(0)]), [echo])
+
+        result = runner.invoke(planning_state("Echo things"))
+
+        error = next(m for m in result["messages"] if isinstance(m, ToolMessage))
+        assert "missing is not a valid tool" in error.content
+        assert result["replans_count"] == 1
+
+    def test_recursion_limit(self):
+        """Test that runaway runs stop at the recursion limit."""
+        runner = LeanPlanRunner(ScriptedChatModel(responses=_script(5)), [echo], recursion_limit=4)
+
+        with pytest.raises(GraphRecursionError):
+            runner.invoke(planning_state("Echo things"))
+
+    def test_stream_modes(self):
+        """Test that stream yields graph-compatible updates and values."""
+        runner = LeanPlanRunner(ScriptedChatModel(responses=_script(1)), [echo])
+
+        items = list(
+            runner.stream(planning_state("Echo things"), stream_mode=["updates", "values"])
+        )
+
+        updates = [payload for mode, payload in items if mode == "updates"]
+        assert [next(iter(update)) for update in updates] == [
+            "planner",
+            "optimizer",
+            "executor",
+            "tools",
+            "process_result",
+            "executor",
+        ]
+        assert items[-1][0] == "values"
+        assert items[-1][1]["current_step_index"] == 1
+
+    def test_astream(self):
+        """Test the async stream variant."""
+        runner = LeanPlanRunner(ScriptedChatModel(responses=_script(1)), [echo])
+
+        async def collect():
+            return [item async for item in runner.astream(planning_state("Echo things"))]
+
+        updates = asyncio.run(collect())
+
+        assert next(iter(updates[0])) == "planner"
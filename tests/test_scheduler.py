@@ -0,0 +1,301 @@
+"""Tests for the LLM rate limiter and fair scheduler."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.cancellation import CancellationToken, RunCancelled, use_cancellation
+from src.agent.llm.fake import ScriptedChatModel
+from src.agent.llm.scheduler import (
+    LLMScheduler,
+    Priority,
+    ScheduledChatModel,
+    TokenBucket,
+    configure_scheduler,
+    estimate_tokens,
+    reset_scheduler,
+)
+
+
+def _wait_for_queue(scheduler: LLMScheduler, depth: int) -> None:
+    deadline = time.monotonic() + 2
+    while scheduler.stats()["queue_depth"] < depth:
+        assert time.monotonic() < deadline, "tickets were never queued"
+        time.sleep(0.005)
+
+
+def _run_queued(scheduler: LLMScheduler, calls: list[tuple[int, str]]) -> list[str]:
+    """Queue calls behind a held slot, release it and return the admission order."""
+    order: list[str] = []
+    lock = threading.Lock()
+
+    def call(priority: int, label: str) -> None:
+        with scheduler.acquire(priority, tenant=label.split(":")[0]):
+            with lock:
+                order.append(label)
+
+    with scheduler.acquire(Priority.PLANNER, tenant="holder"):
+        threads = []
+        for depth, (priority, label) in enumerate(calls, start=1):
+            thread = threading.Thread(target=call, args=(priority, label))
+            thread.start()
+            threads.append(thread)
+            _wait_for_queue(scheduler, depth)
+
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket."""
+
+    def test_full_bucket_has_no_wait(self):
+        """Test that a fresh bucket admits up to its capacity."""
+        bucket = TokenBucket(rate_per_minute=60)
+
+        assert bucket.wait_time(60) == 0
+
+    def test_wait_after_consume(self):
+        """Test that the wait reflects the refill rate."""
+        bucket = TokenBucket(rate_per_minute=60, capacity=1)
+        bucket.consume(1)
+
+        assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+    def test_adjust_credits_overestimate(self):
+        """Test that an overestimate is returned to the bucket."""
+        bucket = TokenBucket(rate_per_minute=600, capacity=100)
+        bucket.consume(100)
+
+        bucket.adjust(-50)
+
+        assert bucket.wait_time(50) == 0
+
+
+class TestLLMScheduler:
+    """Tests for LLMScheduler."""
+
+    def test_planner_outranks_executor(self):
+        """Test that a queued planner call is admitted before an executor call."""
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+
+        order = _run_queued(
+            scheduler, [(Priority.EXECUTOR, "a:executor"), (Priority.PLANNER, "b:planner")]
+        )
+
+        assert order == ["b:planner", "a:executor"]
+
+    def test_tenants_are_served_round_robin(self):
+        """Test that one busy tenant can't monopolize a priority class."""
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+
+        order = _run_queued(
+            scheduler,
+            [
+                (Priority.EXECUTOR, "a:1"),
+                (Priority.EXECUTOR, "a:2"),
+                (Priority.EXECUTOR, "a:3"),
+                (Priority.EXECUTOR, "b:1"),
+            ],
+        )
+
+        assert order.index("b:1") < order.index("a:3")
+
+    def test_round_robin_with_aging(self):
+        """Test that aging does not turn tenant turns into arrival order."""
+        scheduler = LLMScheduler(max_concurrency=1)
+
+        order = _run_queued(
+            scheduler,
+            [
+                (Priority.EXECUTOR, "a:1"),
+                (Priority.EXECUTOR, "a:2"),
+                (Priority.EXECUTOR, "a:3"),
+                (Priority.EXECUTOR, "b:1"),
+            ],
+        )
+
+        assert order.index("b:1") < order.index("a:3")
+
+    def test_request_rate_limit_delays_calls(self):
+        """Test that the request bucket spaces out calls."""
+        scheduler = LLMScheduler(requests_per_minute=600)
+        scheduler._requests = TokenBucket(600, capacity=1)
+
+        start = time.monotonic()
+        for _ in range(3):
+            with scheduler.acquire():
+                pass
+
+        assert time.monotonic() - start >= 0.18
+
+    def test_stats_report_queue_depth(self):
+        """Test that waiting calls show up in the queue metrics."""
+        scheduler = LLMScheduler(max_concurrency=1)
+        with scheduler.acquire(Priority.PLANNER, tenant="a"):
+            thread = threading.Thread(
+                target=lambda: scheduler.acquire(Priority.EXECUTOR, tenant="b").__enter__()
+            )
+            thread.start()
+            _wait_for_queue(scheduler, 1)
+            stats = scheduler.stats()
+        thread.join(timeout=5)
+
+        assert stats["queue_depth_by_priority"] == {"executor": 1}
+        assert stats["queue_depth_by_tenant"] == {"b": 1}
+        assert stats["in_flight"] == 1
+
+    def test_stats_name_custom_priorities(self):
+        """Test that priorities outside the Priority enum are reported by value."""
+        scheduler = LLMScheduler(max_concurrency=1)
+        with scheduler.acquire(Priority.PLANNER, tenant="a"):
+            thread = threading.Thread(target=lambda: scheduler.acquire(7).__enter__())
+            thread.start()
+            _wait_for_queue(scheduler, 1)
+            stats = scheduler.stats()
+        thread.join(timeout=5)
+
+        assert stats["queue_depth_by_priority"] == {"7": 1}
+
+    def test_stopped_run_leaves_the_queue(self):
+        """Test that a queued call gives up once its run's deadline passes."""
+        scheduler = LLMScheduler(max_concurrency=1)
+
+        with scheduler.acquire(Priority.PLANNER, tenant="a"):
+            start = time.monotonic()
+            with use_cancellation(CancellationToken(timeout=0.05)), pytest.raises(RunCancelled):
+                with scheduler.acquire(tenant="b"):
+                    pass
+            waited = time.monotonic() - start
+            stats = scheduler.stats()
+
+        assert waited < 0.5
+        assert stats["queue_depth"] == 0
+        assert stats["queue_depth_by_tenant"] == {}
+
+    def test_cancelled_run_frees_its_place(self):
+        """Test that cancelling a queued run lets the calls behind it through."""
+        scheduler = LLMScheduler(max_concurrency=1)
+        token = CancellationToken()
+        errors: list[BaseException] = []
+
+        def cancelled_call() -> None:
+            with use_cancellation(token):
+                try:
+                    with scheduler.acquire(Priority.PLANNER, tenant="b"):
+                        pass
+                except RunCancelled as e:
+                    errors.append(e)
+
+        with scheduler.acquire(Priority.PLANNER, tenant="a"):
+            thread = threading.Thread(target=cancelled_call)
+            thread.start()
+            _wait_for_queue(scheduler, 1)
+            token.cancel()
+            thread.join(timeout=5)
+
+        with scheduler.acquire():
+            pass
+        assert [e.reason for e in errors] == ["cancelled"]
+
+    def test_rate_limited_pauses_admission(self):
+        """Test that a provider 429 holds new calls back."""
+        scheduler = LLMScheduler()
+        scheduler.record_rate_limited(0.1)
+
+        start = time.monotonic()
+        with scheduler.acquire():
+            pass
+
+        assert time.monotonic() - start >= 0.09
+        assert scheduler.stats()["rate_limited"] == 1
+
+
+class TestScheduledChatModel:
+    """Tests for ScheduledChatModel."""
+
+    def test_invoke_passes_through_scheduler(self):
+        """Test that calls are admitted and usage is recorded."""
+        scheduler = LLMScheduler(tokens_per_minute=10_000)
+        inner = MagicMock()
+        inner.invoke.return_value = AIMessage(
+            content="hi",
+            usage_metadata={"input_tokens": 5, "output_tokens": 5, "total_tokens": 10},
+        )
+        model = ScheduledChatModel(model=inner, scheduler=scheduler, priority=Priority.PLANNER)
+
+        result = model.invoke([HumanMessage(content="hello")])
+
+        assert result.content == "hi"
+        assert scheduler.stats()["granted"] == 1
+
+    def test_stream_passes_through_scheduler(self):
+        """Test that streamed calls are admitted and still stream tokens."""
+        scheduler = LLMScheduler(max_concurrency=1)
+        inner = ScriptedChatModel(responses=[AIMessage(content="one two three")])
+        model = ScheduledChatModel(model=inner, scheduler=scheduler)
+
+        chunks = [chunk.content for chunk in model.stream([HumanMessage(content="hello")])]
+
+        assert chunks[:3] == ["one ", "two ", "three"]
+        assert scheduler.stats()["granted"] == 1
+        assert scheduler.stats()["in_flight"] == 0
+
+    def test_rate_limit_error_is_recorded(self):
+        """Test that a 429 from the provider pauses the scheduler."""
+
+        class RateLimitError(Exception):
+            status_code = 429
+            response = None
+
+        scheduler = LLMScheduler()
+        inner = MagicMock()
+        inner.invoke.side_effect = RateLimitError()
+        model = ScheduledChatModel(model=inner, scheduler=scheduler)
+
+        with pytest.raises(RateLimitError):
+            model.invoke([HumanMessage(content="hello")])
+
+        assert scheduler.stats()["rate_limited"] == 1
+
+    def test_bind_tools_keeps_scheduling(self):
+        """Test that tool binding wraps the bound model."""
+        inner = MagicMock()
+        model = ScheduledChatModel(model=inner, scheduler=LLMScheduler(), tenant="t")
+
+        bound = model.bind_tools([])
+
+        assert bound.model is inner.bind_tools.return_value
+        assert bound.tenant == "t"
+
+    def test_estimate_tokens(self):
+        """Test the rough token estimate."""
+        assert estimate_tokens([HumanMessage(content="x" * 400)], output_tokens=0) == 104
+
+
+class TestCodeAgentScheduling:
+    """Tests for scheduler integration in CodeAgent."""
+
+    @patch("src.agent.core.agent.create_planning_agent_graph")
+    @patch("src.agent.core.agent.create_llm")
+    def test_agent_wraps_models_when_scheduler_configured(self, mock_create_llm, mock_create_graph):
+        """Test that node models are scheduled with role priorities."""
+        from src.agent.core.agent import CodeAgent
+
+        mock_create_llm.return_value = MagicMock()
+        configure_scheduler(requests_per_minute=100)
+        try:
+            agent = CodeAgent(tenant="session-1")
+        finally:
+            reset_scheduler()
+
+        planner = agent.node_llms["planner"]
+        executor = agent.node_llms["executor"]
+        assert isinstance(planner, ScheduledChatModel)
+        assert planner.priority == Priority.PLANNER
+        assert executor.priority == Priority.EXECUTOR
+        assert executor.tenant == "session-1"
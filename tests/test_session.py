@@ -0,0 +1,184 @@
+"""Tests for persistent multi-turn sessions."""
+
+import os
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.agent.core.agent import CodeAgent
+from src.agent.core.session import Session, SessionStore, SqliteSessionStore
+from src.agent.llm.fake import ScriptedChatModel, plan_responder
+from src.agent.tools.file import use_workspace
+
+
+def _turn_state(path: str, content: str) -> dict:
+    return {
+        "messages": [
+            HumanMessage(content="Read it"),
+            AIMessage(
+                content="",
+                tool_calls=[{"name": "read_file", "args": {"path": path}, "id": "c1"}],
+            ),
+            ToolMessage(content=content, tool_call_id="c1"),
+            AIMessage(content="Done"),
+        ]
+    }
+
+
+class TestSession:
+    """Tests for Session."""
+
+    def test_context_empty_before_first_turn(self):
+        assert Session("s").context() == ""
+
+    def test_record_turn_compacts_conversation(self):
+        session = Session("s", max_turns=2)
+
+        for i in range(3):
+            session.record_turn(f"request {i}", {"messages": []}, f"answer {i}")
+
+        assert [m.content for m in session.messages] == [
+            "request 1",
+            "answer 1",
+            "request 2",
+            "answer 2",
+        ]
+        assert session.turns == 3
+
+    def test_remembers_read_files_until_they_change(self, tmp_path):
+        with use_workspace(str(tmp_path)):
+            (tmp_path / "notes.txt").write_text("hello")
+            session = Session("s")
+            session.record_turn("Read notes", _turn_state("notes.txt", "hello"), "Done")
+
+            assert "--- notes.txt ---\nhello" in session.context()
+
+            session.refresh()
+            assert "read_file:notes.txt" in session.files
+
+            mtime = os.path.getmtime(tmp_path / "notes.txt")
+            os.utime(tmp_path / "notes.txt", (mtime + 10, mtime + 10))
+            session.refresh()
+            assert session.files == {}
+
+    def test_written_content_is_known(self, tmp_path):
+        with use_workspace(str(tmp_path)):
+            state = {
+                "messages": [
+                    AIMessage(
+                        content="",
+                        tool_calls=[
+                            {
+                                "name": "write_file",
+                                "args": {"path": "out.txt", "content": "new text"},
+                                "id": "w1",
+                            }
+                        ],
+                    ),
+                    ToolMessage(content="Successfully wrote", tool_call_id="w1"),
+                ]
+            }
+            session = Session("s")
+            session.record_turn("Write", state, "Done")
+
+        assert session.files["read_file:out.txt"].content == "new text"
+
+
+class TestSessionStore:
+    """Tests for SessionStore."""
+
+    def test_evicts_least_recently_used(self):
+        store = SessionStore(max_sessions=2)
+        for session_id in ("a", "b"):
+            store.save(Session(session_id))
+        store.get("a")
+
+        store.save(Session("c"))
+
+        assert store.get("b") is None
+        assert store.get("a") is not None
+        assert len(store) == 2
+
+
+class TestSqliteSessionStore:
+    """Tests for SqliteSessionStore."""
+
+    def test_round_trips_sessions_between_stores(self, tmp_path):
+        with use_workspace(str(tmp_path)):
+            (tmp_path / "notes.txt").write_text("hello")
+            session = Session("s", max_turns=3)
+            session.record_turn("Read notes", _turn_state("notes.txt", "hello"), "Done")
+            session.step_results = {0: "read"}
+            SqliteSessionStore(str(tmp_path / "sessions.db")).save(session)
+
+            loaded = SqliteSessionStore(str(tmp_path / "sessions.db")).get("s")
+
+        assert loaded.context() == session.context()
+        assert loaded.step_results == {0: "read"}
+        assert loaded.max_turns == 3
+        assert len(loaded.memo) == 0
+
+    def test_keeps_memo_in_process(self, tmp_path):
+        store = SqliteSessionStore(str(tmp_path / "sessions.db"))
+        session = store.get_or_create("s")
+        store.save(session)
+
+        assert store.get("s").memo is session.memo
+
+    def test_evicts_least_recently_saved(self, tmp_path):
+        store = SqliteSessionStore(str(tmp_path / "sessions.db"), max_sessions=2)
+        for i, session_id in enumerate(("a", "b", "c")):
+            store.save(Session(session_id, updated_at=i))
+
+        assert store.get("a") is None
+        assert len(store) == 2
+        store.delete("b")
+        assert len(store) == 1
+
+
+class TestCodeAgentSessions:
+    """Tests for multi-turn runs on CodeAgent."""
+
+    def test_follow_up_plans_with_session_context(self, tmp_path):
+        planner_prompts = []
+        respond = plan_responder(2, tool_name="read_file", arg_name="path")
+
+        def recording(messages, kwargs):
+            if "Plan" in [getattr(t, "__name__", "") for t in kwargs.get("tools") or []]:
+                planner_prompts.append(str(messages[-1].content))
+            return respond(messages, kwargs)
+
+        llm = ScriptedChatModel(responder=recording)
+        with patch("src.agent.core.agent.create_llm", return_value=llm):
+            agent = CodeAgent(mode="planning")
+
+        with use_workspace(str(tmp_path)):
+            for name in ("item 1", "item 2"):
+                (tmp_path / name).write_text(f"contents of {name}")
+            first = agent.run_detailed("Read the items", session_id="s")
+            agent.run_detailed("Now summarize them", session_id="s")
+            agent.run_detailed("Unrelated", session_id="other")
+
+        assert first.session_id == "s"
+        assert planner_prompts[0] == "Create a plan for: Read the items"
+        assert "Follow-up request: Now summarize them" in planner_prompts[1]
+        assert "- User: Read the items" in planner_prompts[1]
+        assert "--- item 2 ---\ncontents of item 2" in planner_prompts[1]
+        assert planner_prompts[2] == "Create a plan for: Unrelated"
+        assert agent.sessions.get("s").turns == 2
+
+    def test_simple_mode_keeps_conversation(self):
+        seen = []
+
+        def respond(messages, kwargs):
+            seen.append([m.content for m in messages if m.type in ("human", "ai")])
+            return AIMessage(content=f"answer {len(seen)}")
+
+        llm = ScriptedChatModel(responder=respond)
+        with patch("src.agent.core.agent.create_llm", return_value=llm):
+            agent = CodeAgent(mode="simple")
+
+        agent.run("first", session_id="s")
+        agent.run("second", session_id="s")
+
+        assert seen[1] == ["first", "answer 1", "second"]
@@ -0,0 +1,123 @@
+"""Tests for the tool execution engine."""
+
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from src.agent.metrics import collect_run
+from src.agent.tools.engine import ToolEngine, ToolLimits
+
+_active = 0
+_peak = 0
+_lock = threading.Lock()
+
+
+@tool
+def slow(seconds: float) -> str:
+    """Sleep, tracking how many calls run at once."""
+    global _active, _peak
+    with _lock:
+        _active += 1
+        _peak = max(_peak, _active)
+    time.sleep(seconds)
+    with _lock:
+        _active -= 1
+    return f"slept {seconds}"
+
+
+@tool
+def stall(seconds: float) -> str:
+    """Sleep without tracking concurrency."""
+    time.sleep(seconds)
+    return "done"
+
+
+@tool
+def shout(text: str) -> str:
+    """Repeat text in upper case."""
+    return text.upper()
+
+
+@tool
+def broken(text: str) -> str:
+    """Always fail."""
+    raise RuntimeError("disk on fire")
+
+
+def _call(name: str, call_id: str, **args) -> dict:
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+def _peak_concurrency(engine: ToolEngine, calls: int) -> int:
+    global _peak
+    _peak = 0
+    engine.run([_call("slow", str(i), seconds=0.05) for i in range(calls)])
+    return _peak
+
+
+class TestToolEngine:
+    """Tests for ToolEngine."""
+
+    def test_results_keep_call_order(self):
+        engine = ToolEngine([slow, shout])
+
+        messages = engine.run([_call("slow", "a", seconds=0.05), _call("shout", "b", text="hi")])
+
+        assert [(m.tool_call_id, m.content) for m in messages] == [("a", "slept 0.05"), ("b", "HI")]
+
+    def test_timeout_is_reported_to_llm(self):
+        engine = ToolEngine([stall], limits={"stall": ToolLimits(timeout=0.05)})
+
+        with collect_run() as run:
+            (message,) = engine.run([_call("stall", "a", seconds=0.5)])
+
+        assert message.status == "error"
+        assert message.content == "Error: stall timed out after 0.05s"
+        assert run.summary()["tool_limits"] == {"timeout": 1}
+
+    def test_timeout_starts_once_the_call_runs(self):
+        engine = ToolEngine([slow], limits={"slow": ToolLimits(timeout=0.3, max_concurrency=1)})
+        global _peak
+        _peak = 0
+
+        with collect_run() as run:
+            messages = engine.run([_call("slow", str(i), seconds=0.2) for i in range(3)])
+        time.sleep(0.3)
+
+        assert [m.content for m in messages[:2]] == ["slept 0.2", "slept 0.2"]
+        assert messages[2].content == "Error: slow found no free slot within 0.3s"
+        assert run.summary()["tool_limits"] == {"queue_timeout": 1}
+        assert _active == 0  # The abandoned call never ran
+
+    def test_concurrency_cap(self):
+        capped = ToolEngine([slow], limits={"slow": ToolLimits(max_concurrency=1)})
+        uncapped = ToolEngine([slow])
+
+        assert _peak_concurrency(capped, 3) == 1
+        assert _peak_concurrency(uncapped, 3) == 3
+
+    def test_long_output_is_truncated(self):
+        engine = ToolEngine([shout], default_limits=ToolLimits(max_output_chars=10))
+
+        (message,) = engine.run([_call("shout", "a", text="x" * 25)])
+
+        assert message.content == "X" * 10 + "\n... [truncated 15 characters]"
+
+    def test_failures_become_error_messages(self):
+        engine = ToolEngine([broken])
+
+        unknown, failed = engine.run([_call("missing", "a"), _call("broken", "b", text="x")])
+
+        assert unknown.content == "Error: missing is not a valid tool, try one of [broken]."
+        assert failed.content == "Error: RuntimeError: disk on fire"
+        assert failed.status == "error"
+
+    def test_node_runs_calls_of_last_message(self):
+        node = ToolEngine([shout]).as_node()
+        last = AIMessage(content="", tool_calls=[_call("shout", "a", text="ok")])
+
+        update = node({"messages": [last]})
+
+        assert update["messages"][0].content == "OK"
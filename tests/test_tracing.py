@@ -0,0 +1,78 @@
+"""Tests for Chrome trace export."""
+
+import json
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from benchmarks.fixtures import echo, planning_state
+from src.agent.core.agent import CodeAgent
+from src.agent.graph.workflow import create_planning_agent_graph
+from src.agent.llm.fake import ScriptedChatModel, plan_responder
+from src.agent.tracing import TRACE_DIR_ENV, ChromeTracer
+
+
+class TestChromeTracer:
+    """Tests for ChromeTracer."""
+
+    def test_records_nested_spans(self):
+        graph = create_planning_agent_graph(ScriptedChatModel(responder=plan_responder(2)), [echo])
+        tracer = ChromeTracer()
+
+        with tracer.span("run"):
+            graph.invoke(planning_state(), config={"callbacks": [tracer]})
+
+        events = [e for e in tracer.to_dict()["traceEvents"] if e["ph"] == "X"]
+        names = [e["name"] for e in events]
+        assert names[0] == "run"
+        assert names.count("executor") == 3
+        assert names.count("llm scripted") == 3
+        assert names.count("tool echo") == 2
+
+        run = events[0]
+        for event in events[1:]:
+            assert event["ts"] >= run["ts"]
+            assert event["ts"] + event["dur"] <= run["ts"] + run["dur"]
+
+        tool_span = next(e for e in events if e["name"] == "tool echo")
+        tools_node = next(e for e in events if e["name"] == "tools")
+        assert tool_span["tid"] == tools_node["tid"]
+        assert tool_span["args"]["output_chars"] == len("item 1")
+
+    def test_write_creates_trace_file(self, tmp_path):
+        tracer = ChromeTracer()
+        with tracer.span("run"):
+            pass
+
+        path = tracer.write(str(tmp_path / "traces"))
+
+        with open(path, encoding="utf-8") as f:
+            document = json.load(f)
+        assert document["traceEvents"][-1]["name"] == "run"
+
+
+class TestCodeAgentTracing:
+    """Tests for opt-in tracing on CodeAgent."""
+
+    def _agent(self, **kwargs) -> CodeAgent:
+        llm = ScriptedChatModel(responses=[AIMessage(content="hello")])
+        with patch("src.agent.core.agent.create_llm", return_value=llm):
+            return CodeAgent(mode="simple", **kwargs)
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv(TRACE_DIR_ENV, raising=False)
+
+        result = self._agent().run_detailed("Hi")
+
+        assert result.trace_path is None
+
+    def test_trace_dir_from_env(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(TRACE_DIR_ENV, str(tmp_path))
+
+        result = self._agent().run_detailed("Hi")
+
+        assert result.trace_path is not None
+        assert result.trace_path.startswith(str(tmp_path))
+        with open(result.trace_path, encoding="utf-8") as f:
+            names = [e["name"] for e in json.load(f)["traceEvents"]]
+        assert {"run", "agent", "llm scripted"} <= set(names)
@@ -0,0 +1,83 @@
+"""Tests for the multi-process worker pool."""
+
+import os
+
+import pytest
+
+from src.agent.core import workers
+from src.agent.core.agent import RunResult
+from src.agent.core.session import SqliteSessionStore
+
+
+class FakeAgent:
+    """Agent stand-in that counts session turns in the shared store."""
+
+    def __init__(self, model: str = "", mode: str = "", session_store=None):
+        self.sessions = session_store
+
+    def run_detailed(self, user_input, session_id=None, timeout=None) -> RunResult:
+        if user_input == "crash":
+            os._exit(3)
+        if user_input == "fail":
+            raise RuntimeError("boom")
+        turns = 0
+        if session_id is not None:
+            session = self.sessions.get_or_create(session_id)
+            session.record_turn(user_input, {"messages": []}, "done")
+            self.sessions.save(session)
+            turns = session.turns
+        return RunResult(output=f"{user_input}:{turns}", duration_s=0.1)
+
+
+def fake_agent(config, session_store):
+    return FakeAgent(session_store=session_store)
+
+
+def test_worker_for_is_stable():
+    """Test that a session always maps to the same worker."""
+    assert workers.worker_for("alice", 4) == workers.worker_for("alice", 4)
+    assert {workers.worker_for(f"s{i}", 4) for i in range(50)} == {0, 1, 2, 3}
+
+
+class TestWorkerPool:
+    """Tests for WorkerPool."""
+
+    def test_sessions_stick_to_one_worker(self, tmp_path):
+        """Test that a session's turns run on the same worker and share state."""
+        config = workers.WorkerConfig(session_db=str(tmp_path / "sessions.db"))
+
+        with workers.WorkerPool(config, 3, fake_agent) as pool:
+            futures = [pool.submit(f"turn {i}", session_id="alice") for i in range(4)]
+            records = [future.result(timeout=30) for future in futures]
+            other = pool.run("hello")
+
+        assert [r["output"] for r in records] == [f"turn {i}:{i + 1}" for i in range(4)]
+        assert len({r["worker"] for r in records}) == 1
+        assert other["status"] == "ok"
+        assert other["stats"]["duration_s"] == 0.1
+
+    def test_sessions_survive_pool_restart(self, tmp_path):
+        """Test that a resized pool continues sessions from the shared store."""
+        config = workers.WorkerConfig(session_db=str(tmp_path / "sessions.db"))
+        with workers.WorkerPool(config, 2, fake_agent) as pool:
+            pool.run("first", session_id="alice")
+
+        with workers.WorkerPool(config, 3, fake_agent) as pool:
+            record = pool.run("second", session_id="alice")
+
+        assert record["output"] == "second:2"
+        assert SqliteSessionStore(config.session_db).get("alice").turns == 2
+
+    def test_failures_and_dead_workers(self, tmp_path):
+        """Test that errors are recorded and a crashed worker is replaced."""
+        config = workers.WorkerConfig(session_db=str(tmp_path / "sessions.db"))
+
+        with workers.WorkerPool(config, 1, fake_agent) as pool:
+            failed = pool.run("fail")
+            with pytest.raises(RuntimeError, match="exited with code 3"):
+                pool.submit("crash").result(timeout=30)
+            after = pool.run("still serving")
+
+        assert failed["status"] == "error"
+        assert "boom" in failed["error"]
+        assert after["output"] == "still serving:0"